@@ -9,25 +9,17 @@
 ####  predictions on test for Classification or Regression problems.        ####
 ################################################################################
 import pandas as pd
-import seaborn as sns
 
 # get_ipython().magic('matplotlib inline')
-pd.set_option('display.max_columns', 100)
-pd.set_option('display.max_rows', 100)
-pd.set_option('display.max_colwidth', 1000)
-sns.set(style="white", color_codes=True)
+#### Plotting libraries (matplotlib, seaborn) and NLP libraries (nltk, textblob, vaderSentiment, bs4)
+####   are slow to import. So they are imported inside the functions that need them. This also
+####   means that importing this module does not change any pandas display or matplotlib settings.
 import time
-import matplotlib
-
-matplotlib.style.use('ggplot')
 from sklearn.pipeline import Pipeline
 import warnings
 
 warnings.filterwarnings("ignore")
 
-### For NLP problems
-from textblob import TextBlob
-
 #### For Classification problems
 
 #### For Regression problems
@@ -122,29 +114,17 @@ def tokenize_test_by_metric(model, X_train, X_cv, y_train, y_cv,
 '''Metrics/Evaluation'''
 
 '''Plotting'''
-import seaborn as sns
-
-sns.set_style('darkgrid')
 
 '''Display'''
-from IPython.core.display import display, HTML
-
-display(HTML("<style>.container { width:95% !important; }</style>"))
 import warnings
 
 warnings.filterwarnings('ignore')
-pd.options.display.float_format = '{:,.2f}'.format
 ################################################################################
 ####   The below Process_Text section is Re-used with Permission from:
 ####  R O B   S A L G A D O    robert.salgado@gmail.com     Thank YOU!
 # https://github.com/robsalgado/personal_data_science_projects/tree/master/mulitclass_text_class
 ################################################################################
-import nltk
 import string
-from nltk.corpus import wordnet
-from nltk.stem import WordNetLemmatizer
-from nltk.tokenize import TweetTokenizer
-from bs4 import BeautifulSoup
 import numpy as np
 from collections import Counter
 import regex as re
@@ -308,20 +288,26 @@ def return_stop_words():
 
 
 ##################################################################################
-tokenizer = TweetTokenizer()
+#### The nltk tokenizer and lemmatizer are created the first time they are used since nltk is slow to import
+tokenizer = None
 pattern = r"(?u)\b\w\w+\b"
-lemmatizer = WordNetLemmatizer()
+lemmatizer = None
 punc = list(set(string.punctuation)) + ['/;', '//']
 
 
 def casual_tokenizer(
         text):  # Splits words on white spaces (leaves contractions intact) and splits out trailing punctuation
+    global tokenizer
+    if tokenizer is None:
+        from nltk.tokenize import TweetTokenizer
+        tokenizer = TweetTokenizer()
     tokens = tokenizer.tokenize(text)
     return tokens
 
 
 # Function to replace the nltk pos tags with the corresponding wordnet pos tag to use the wordnet lemmatizer
 def get_word_net_pos(treebank_tag):
+    from nltk.corpus import wordnet
     if treebank_tag.startswith('J'):
         return wordnet.ADJ
     elif treebank_tag.startswith('V'):
@@ -335,6 +321,10 @@ def get_word_net_pos(treebank_tag):
 
 
 def lemma_wordnet(tagged_text):
+    global lemmatizer
+    if lemmatizer is None:
+        from nltk.stem import WordNetLemmatizer
+        lemmatizer = WordNetLemmatizer()
     final = []
     for word, tag in tagged_text:
         wordnet_tag = get_word_net_pos(tag)
@@ -366,10 +356,8 @@ def remove_html(text):
 
 
 # Convert Emojis to Text
-import emoji
-
-
 def convert_emojis(text):
+    import emoji
     try:
         return emoji.demojize(text)
     except:
@@ -652,6 +640,8 @@ def remove_punctuations(text):
 
 
 def process_text(text):
+    import nltk
+    from bs4 import BeautifulSoup
     text = text.split(" ")
     decontract = join_words([expandContractions(item, c_re=c_re) for item in text])
     soup = BeautifulSoup(decontract, "lxml")
@@ -677,10 +667,8 @@ def clean_text(df_x):
 
 
 ##########################################################################################################
-from nltk.stem import PorterStemmer
-
-
 def stemming(text):
+    from nltk.stem import PorterStemmer
     stemmer = PorterStemmer()
     return " ".join([stemmer.stem(i) for i in re.sub("[^a-zA-Z]", " ", text).split()])
 
@@ -840,6 +828,8 @@ def plot_confusion_matrix(y_test, y_pred, model_name='Model'):
     """
     # Confusion Matrix
     '''Plotting CONFUSION MATRIX'''
+    import matplotlib.pyplot as plt
+    import seaborn as sns
     sns.set_style('darkgrid')
 
     '''Display'''
@@ -1072,6 +1062,8 @@ def print_sparse_stats(X_dtm):
 
 ################################################################################
 def tokenize_and_stem(text):
+    import nltk
+    from nltk.stem.snowball import SnowballStemmer
     stemmer = SnowballStemmer("english")
     text = re.sub("^\d+\s|\s\d+\s|\s\d+$", " ", text)
     # first tokenize by sentence, then by word to ensure that punctuation is caught as its own token
@@ -1085,9 +1077,6 @@ def tokenize_and_stem(text):
     return stems
 
 
-################################################################################
-from nltk.stem.snowball import SnowballStemmer
-
 
 ################################################################################
 def select_best_nlp_vectorizer(model, data, col, target, metric,
@@ -1338,7 +1327,7 @@ from sklearn.ensemble import RandomForestClassifier
 def Auto_NLP(nlp_column, train, test, target, score_type='',
              modeltype='Classification',
              top_num_features=300, verbose=0,
-             build_model=True):
+             build_model=True, return_transformer=False, headless=False):
     """
     ##################################################################################
     #### Auto_NLP expects both train and test to be data frames with one NLP column
@@ -1350,6 +1339,10 @@ def Auto_NLP(nlp_column, train, test, target, score_type='',
     #### I have selected min_df to be 10% (i.e. 0.1) to select the best features from NLP.
     #### You can make it smaller to return higher number of features and vice versa.
     #### You can use top_num_features (default = 200) to control how many features to add.
+    #### If build_model is False and return_transformer is True, it returns a dictionary of fitted
+    ####  vectorizer, TruncatedSVD and KMeans instead of just the vectorizer. Send that dictionary to
+    ####  transform_nlp_column_using_transformer to transform new data the same way as test data.
+    #### If headless is True, no charts are drawn. The same results are printed and returned.
     ##################################################################################
     """
     import nltk
@@ -1424,7 +1417,8 @@ def Auto_NLP(nlp_column, train, test, target, score_type='',
         return
     ########################  S U M M A R Y  C O L U M N S  C R E A T I O N ######################
     #### Since NLP Summary Columns do more harm than good, I am not adding them to features of train
-    train, nlp_summary_cols = create_summary_of_nlp_cols(train, nlp_column, target, is_train=True, verbose=verbose)
+    train, nlp_summary_cols = create_summary_of_nlp_cols(train, nlp_column, target, is_train=True,
+                                                           verbose=verbose, headless=headless)
     nlp_result_columns += nlp_summary_cols
     print('    Added %d summary columns for counts of words and characters in each row' % len(nlp_summary_cols))
     if not isinstance(test, str):
@@ -1623,7 +1617,8 @@ def Auto_NLP(nlp_column, train, test, target, score_type='',
     print('Training completed. Time taken for training = %0.1f minutes' % ((time.time() - start_time) / 60))
     print('Best Params of NLP pipeline are: %s' % gs.best_params_)
     if modeltype == 'Regression':
-        print_regression_model_stats(y_test, y_pred, '%s Model: Predicted vs Actual for %s' % (model_name, target))
+        print_regression_model_stats(y_test, y_pred, '%s Model: Predicted vs Actual for %s' % (model_name, target),
+                                     headless=headless)
     else:
         if isinstance(target, list):
             from sklearn.metrics import multilabel_confusion_matrix
@@ -1631,6 +1626,10 @@ def Auto_NLP(nlp_column, train, test, target, score_type='',
                 'Multi Label Confusion Matrix for each label:\n%s' % multilabel_confusion_matrix(y_test.values, y_pred))
             from sklearn.metrics import classification_report
             print(classification_report(y_test.values, y_pred, target_names=target))
+        elif headless:
+            from sklearn.metrics import confusion_matrix, classification_report
+            print('Confusion Matrix:\n%s' % confusion_matrix(y_test, y_pred))
+            print(classification_report(y_test, y_pred))
         else:
             plot_confusion_matrix(y_test, y_pred, model_name)
             plot_classification_matrix(y_test, y_pred, model_name)
@@ -1719,7 +1718,7 @@ def Auto_NLP(nlp_column, train, test, target, score_type='',
             test_best, _ = reduce_dimensions_with_Truncated_SVD(test,
                                                                 testm, is_train=False, trained_svd=trained_svd)
             test_best = test_best.fillna(0)
-            test_nlp = test.join(test_best, rs='_SVD_Dim_' + nlp_column)
+            test_nlp = test.join(test_best, rsuffix='_SVD_Dim_' + nlp_column)
         ########################################################################
         ##### C R E A T E   C L U S T E R   L A B E L S    U S I N G   TruncatedSVD
         ########################################################################
@@ -1773,22 +1772,15 @@ def Auto_NLP(nlp_column, train, test, target, score_type='',
         ########################################################################################
         if len(nlp_data) <= 10000:
             ### VADER is accurate but very SLOOOWWW. Do not do this for Large data sets
+            sentiment_method = 'vader'
             nlp_data, pos_cols = add_sentiment(nlp_data, nlp_column)
             nlp_result_columns += pos_cols
         else:
             ### TEXTBLOB is faster but somewhat less accurate. So we do this for Large data sets
             print('Since samples in data > 10000 using TextBlob, which is faster to add sentiment scores...')
-            senti_cols = [nlp_column + '_text_sentiment', nlp_column + '_senti_polarity',
-                          nlp_column + '_senti_subjectivity', nlp_column + '_overall_sentiment']
-            start_time2 = time.time()
-            nlp_data[senti_cols[0]] = nlp_data[nlp_column].map(detect_sentiment).fillna(0)
-            nlp_data[senti_cols[1]] = nlp_data[nlp_column].apply(calculate_line_sentiment, 'polarity').fillna(0).values
-            nlp_data[senti_cols[2]] = nlp_data[nlp_column].apply(calculate_line_sentiment, 'subjectivity').fillna(
-                0).values
-            nlp_data[senti_cols[3]] = nlp_data[nlp_column].apply(calculate_paragraph_sentiment).fillna(0).values
+            sentiment_method = 'textblob'
+            nlp_data, senti_cols = add_textblob_sentiment(nlp_data, nlp_column)
             nlp_result_columns += senti_cols
-            print('    Added %d columns using TextBlob Sentiment Analyzer. Time Taken = %d seconds' % (
-                len(senti_cols), time.time() - start_time2))
         ########################################################################################
         #########      SPLIT DATA INTO BACK INTO TRAIN AND TEST HERE   #########################
         ########################################################################################
@@ -1804,9 +1796,43 @@ def Auto_NLP(nlp_column, train, test, target, score_type='',
         number_of_created_columns = train_full.shape[1] - 1
         print('Number of new columns created using NLP = %d' % number_of_created_columns)
         print('Time taken for Auto_NLP to complete = %0.1f minutes' % ((time.time() - start_time4) / 60))
+        if return_transformer:
+            nlp_transformer = {
+                'target': target,
+                'vectorizer': best_nlp_vect,
+                'svd': trained_svd,
+                'kmeans': kme,
+                'n_clusters': n_clusters,
+                'cluster_col': cluster_col,
+                'sentiment': sentiment_method,
+            }
+            return train_full, test_full, nlp_transformer, max_features_limit
         return train_full, test_full, best_nlp_vect, max_features_limit
 
 
+##############################################################################################
+def transform_nlp_column_using_transformer(data, nlp_column, nlp_transformer):
+    """
+    Transforms the NLP column of new data the same way that Auto_NLP transforms test data when
+    build_model=False. nlp_transformer is the dictionary returned by Auto_NLP with return_transformer=True.
+    It adds summary, TruncatedSVD, word cluster and sentiment columns and drops the NLP column.
+    """
+    data, _ = create_summary_of_nlp_cols(data, nlp_column, nlp_transformer['target'], is_train=False, verbose=0)
+    datam = nlp_transformer['vectorizer'].transform(data[nlp_column])
+    data_best, _ = reduce_dimensions_with_Truncated_SVD(data, datam, is_train=False,
+                                                        trained_svd=nlp_transformer['svd'])
+    data_best = data_best.fillna(0)
+    data_nlp = data.join(data_best, rsuffix='_SVD_Dim_' + nlp_column)
+    _, cluster_labels = return_cluster_labels(nlp_transformer['kmeans'], data_best.values,
+                                              nlp_transformer['n_clusters'], is_train=False)
+    data_nlp[nlp_transformer['cluster_col']] = cluster_labels
+    if nlp_transformer['sentiment'] == 'vader':
+        data_nlp, _ = add_sentiment(data_nlp, nlp_column)
+    else:
+        data_nlp, _ = add_textblob_sentiment(data_nlp, nlp_column)
+    return data_nlp.drop([nlp_column], axis=1)
+
+
 ##############################################################################################
 from sklearn.cluster import KMeans
 
@@ -1938,34 +1964,35 @@ def NLP_select_best_model_fit_predict(X, y, test, modeltype, score_type):
 from sklearn.metrics import mean_squared_error, mean_absolute_error
 
 
-def print_regression_model_stats(actuals, predicted, title='Model'):
+def print_regression_model_stats(actuals, predicted, title='Model', headless=False):
     """
     This program prints and returns MAE, RMSE, MAPE.
     If you like the MAE and RMSE to have a title or something, just give that
     in the input as "title" and it will print that title on the MAE and RMSE as a
     chart for that model. Returns MAE, MAE_as_percentage, and RMSE_as_percentage
+    If headless is True, the chart is not drawn but the metrics are the same.
     """
     figsize = (10, 10)
     colors = cycle('byrcmgkbyrcmgkbyrcmgkbyrcmgk')
     if len(actuals) != len(predicted):
         print('Error: Number of actuals and predicted dont match. Continuing...')
     else:
-        plt.figure(figsize=figsize)
-        dfplot = pd.DataFrame([actuals, predicted]).T
-        dfplot.columns = ['Actuals', 'Predictions']
-        x = actuals
-        y = predicted
-        lineStart = actuals.min()
-        lineEnd = actuals.max()
-        plt.scatter(x, y, color=next(colors), alpha=0.5, label='Predictions')
-        plt.plot([lineStart, lineEnd], [lineStart, lineEnd], 'k-', color=next(colors))
-        plt.xlim(lineStart, lineEnd)
-        plt.ylim(lineStart, lineEnd)
-        plt.xlabel('Actual')
-        plt.ylabel('Predicted')
-        plt.legend()
-        plt.title(title)
-        plt.show()
+        if not headless:
+            import matplotlib.pyplot as plt
+            plt.figure(figsize=figsize)
+            x = actuals
+            y = predicted
+            lineStart = actuals.min()
+            lineEnd = actuals.max()
+            plt.scatter(x, y, color=next(colors), alpha=0.5, label='Predictions')
+            plt.plot([lineStart, lineEnd], [lineStart, lineEnd], 'k-', color=next(colors))
+            plt.xlim(lineStart, lineEnd)
+            plt.ylim(lineStart, lineEnd)
+            plt.xlabel('Actual')
+            plt.ylabel('Predicted')
+            plt.legend()
+            plt.title(title)
+            plt.show()
         mae = mean_absolute_error(actuals, predicted)
         mae_asp = (mean_absolute_error(actuals, predicted) / actuals.std()) * 100
         rmse_asp = (np.sqrt(mean_squared_error(actuals, predicted)) / actuals.std()) * 100
@@ -2018,6 +2045,7 @@ def print_mape(y, y_hat):
 
 #########################################################################
 def calculate_line_sentiment(text, senti_type='polarity'):
+    from textblob import TextBlob
     review = TextBlob(text)
     review_totals = []
     for each_sentence in review.sentences:
@@ -2031,6 +2059,7 @@ def calculate_line_sentiment(text, senti_type='polarity'):
 ########################################################################
 #### Do a sentiment analysis of whole review text rather than line by line ##
 def calculate_paragraph_sentiment(text):
+    from textblob import TextBlob
     try:
         return TextBlob(text.decode('utf-8')).sentiment.polarity
     except:
@@ -2040,6 +2069,7 @@ def calculate_paragraph_sentiment(text):
 ########################################################################
 ########## define a function that accepts text and returns the polarity
 def detect_sentiment(text):
+    from textblob import TextBlob
     try:
         return TextBlob(text.decode('utf-8')).sentiment.polarity
     except:
@@ -2047,9 +2077,6 @@ def detect_sentiment(text):
 
 
 ##############################################################################################
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-
-
 def add_sentiment(data, nlp_column):
     """
     ############ Parts of SPeech Tagging using Spacy   ################################
@@ -2062,6 +2089,7 @@ def add_sentiment(data, nlp_column):
     """
     start_time = time.time()
     print('Using Vader to calculate objectivity and pos-neg-neutral scores')
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
     analyzer = SentimentIntensityAnalyzer()
     data[nlp_column + '_vader_neg'] = 0
     data[nlp_column + '_vader_pos'] = 0
@@ -2082,13 +2110,32 @@ def add_sentiment(data, nlp_column):
     return data, cols
 
 
+def add_textblob_sentiment(data, nlp_column):
+    """
+    TextBlob is faster than Vader but somewhat less accurate. So we use it for Large data sets.
+    It adds 4 sentiment columns for the NLP column and returns the data along with those columns.
+    """
+    senti_cols = [nlp_column + '_text_sentiment', nlp_column + '_senti_polarity',
+                  nlp_column + '_senti_subjectivity', nlp_column + '_overall_sentiment']
+    start_time2 = time.time()
+    data[senti_cols[0]] = data[nlp_column].map(detect_sentiment).fillna(0)
+    data[senti_cols[1]] = data[nlp_column].apply(calculate_line_sentiment, 'polarity').fillna(0).values
+    data[senti_cols[2]] = data[nlp_column].apply(calculate_line_sentiment, 'subjectivity').fillna(
+        0).values
+    data[senti_cols[3]] = data[nlp_column].apply(calculate_paragraph_sentiment).fillna(0).values
+    print('    Added %d columns using TextBlob Sentiment Analyzer. Time Taken = %d seconds' % (
+        len(senti_cols), time.time() - start_time2))
+    return data, senti_cols
+
+
 ######### Create new columns that provide summary stats of NLP string columns
-def create_summary_of_nlp_cols(data, col, target, is_train=False, verbose=0):
+def create_summary_of_nlp_cols(data, col, target, is_train=False, verbose=0, headless=False):
     """
     Create new columns that provide summary stats of NLP string columns
     This gives us insights into the number of characters we want in our NLP column
     in order for the column to be relevant to the target.
     This can also be a Business question. It may help us in building a better predictive model.
+    If headless is True, the summary columns are created but no charts are drawn.
     """
     data = copy.deepcopy(data)
     cols = []
@@ -2128,8 +2175,11 @@ def create_summary_of_nlp_cols(data, col, target, is_train=False, verbose=0):
     # mention_count
     data[col + '_mention_count'] = data[col].apply(lambda x: len([c for c in str(x) if c == '@']))
     cols.append(col + '_mention_count')
+    if headless:
+        return data, cols
     if verbose >= 1:
         if is_train:
+            import matplotlib.pyplot as plt
             fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 4))
             plot_nlp_column(data[col + '_unique_word_count'], "Word Count", ax1, 'r')
             plot_nlp_column(data[col + '_char_count'], "Character Count", ax2, 'b')
@@ -2150,12 +2200,12 @@ def plot_nlp_column(df_col, label_title, ax, color='r'):
 
 
 #############################################################################
-import matplotlib.pyplot as plt
-import seaborn as sns
 from itertools import cycle
 
 
 def draw_dist_plots_summary_cols(df_train, target, summary_cols):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
     colors = cycle('byrcmgkbyrcmgkbyrcmgkbyrcmgkbyr')
     target_names = np.unique(df_train[target])
     ncols = 2
@@ -2180,6 +2230,7 @@ def draw_dist_plots_summary_cols(df_train, target, summary_cols):
 
 #############################################################################
 def plot_histogram_probability(dist_train, dist_test, label_title):
+    import matplotlib.pyplot as plt
     pal = 'bryclg'
     plt.figure(figsize=(15, 10))
     plt.hist(dist_train, bins=200, range=[0, 200], color=pal[2], normed=True, label='train')
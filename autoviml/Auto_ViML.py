@@ -27,7 +27,6 @@ with warnings.catch_warnings():
     warnings.simplefilter("ignore")
 ################################################################################
 import os
-import shap
 os.environ["KMP_WARNINGS"] = "FALSE"
 ######## Import some multi-output models #######################################
 from sklearn.svm import LinearSVR
@@ -43,11 +42,10 @@ from inspect import signature
 from sklearn.preprocessing import label_binarize
 from sklearn.metrics import average_precision_score
 
-import matplotlib.pylab as plt
+#### Heavy libraries used only by some code paths (matplotlib, seaborn, shap, xgboost, catboost,
+####   imblearn and imbalanced_ensemble) are imported inside the functions that need them.
+####   This keeps "import autoviml" fast and free of display side effects.
 # get_ipython().magic(u'matplotlib inline')
-from matplotlib.pylab import rcParams
-
-rcParams['figure.figsize'] = (10, 6)
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.metrics import make_scorer
 from sklearn.metrics import accuracy_score
@@ -61,10 +59,21 @@ from autoviml.QuickML_Stacking import QuickML_Stacking
 from autoviml.Transform_KM_Features import Transform_KM_Features
 from autoviml.QuickML_Ensembling import QuickML_Ensembling
 from autoviml.Auto_NLP import Auto_NLP
+from autoviml.feature_engineering import EntropyBinningTransformer
+from autoviml.scoring_pipeline import AutoViMLPipeline
+from autoviml.profiler import StageProfiler, get_peak_memory_usage
 from autoviml.sulov_method import FE_remove_variables_using_SULOV_method, remove_highly_correlated_vars_fast
-
-from autoviml.classify_method import classify_columns
-from imbalanced_ensemble.ensemble import SelfPacedEnsembleClassifier
+from autoviml.sulov_method import prune_correlated_vars
+from autoviml.correlation import iter_matrix_pairs
+from autoviml.xgb_selection import XGBFeatureSelector, check_selection_mode
+from autoviml.hyper_search import TPESearchCV, make_halving_search
+from autoviml.cpu_budget import CPUBudget, use_cpu_budget, set_estimator_threads
+from autoviml.fit_reuse import find_oof_probabilities, can_continue_training, continue_training
+from autoviml.row_sampling import RowSampler, use_row_sampling, find_stable_selection, find_stratify_labels
+
+from autoviml.classify_method import classify_columns, profile_columns
+from autoviml.profile_cache import ProfileCache
+from autoviml.prediction_store import PredictionStore
 
 from sklearn.metrics import mean_absolute_error, mean_squared_error
 
@@ -72,8 +81,6 @@ from sklearn.metrics import mean_absolute_error, mean_squared_error
 from itertools import cycle
 from collections import defaultdict
 
-from imblearn.over_sampling import SMOTE, SVMSMOTE
-from imblearn.over_sampling import ADASYN, SMOTENC
 from sklearn.cluster import KMeans
 from sklearn.utils.class_weight import compute_class_weight
 
@@ -81,9 +88,6 @@ from pandas.api.types import is_datetime64_any_dtype as is_datetime
 from sklearn.base import TransformerMixin
 from sklearn.model_selection import StratifiedShuffleSplit
 from sklearn.preprocessing import MultiLabelBinarizer
-from xgboost import XGBClassifier, XGBRegressor
-from sklearn.feature_selection import mutual_info_regression, mutual_info_classif
-from sklearn.feature_selection import SelectKBest
 ################################################################################
 from collections import OrderedDict
 from sklearn.linear_model import LogisticRegression
@@ -106,8 +110,6 @@ from datetime import date
 ####################################################################################
 from collections import Counter
 
-import seaborn as sns
-
 from sklearn.metrics import roc_curve, precision_recall_curve
 from sklearn.metrics import classification_report, confusion_matrix
 from sklearn.metrics import balanced_accuracy_score
@@ -321,105 +323,132 @@ class My_LabelEncoder(TransformerMixin):
             outs = testx[:]
         return outs
 #################################################################################
-def fill_missing_values_object_or_number(start_train: pd.DataFrame, start_test: pd.DataFrame, fill_num, col):
-    """
-    ####  This is the easiest way to fill missing values using an object in both train and test
-    #### This takes care of some categories that are present in train and not in test
-    ###     and vice versa
-    """
-    start_train = copy.deepcopy(start_train)
-    start_test = copy.deepcopy(start_test)
-    missing_flag = False
-    new_missing_col = ''
-    if start_train[col].isnull().sum() > 0:
-        missing_flag = True
-        new_missing_col = col + '_Missing_Flag'
-        start_train[new_missing_col] = 0
-        start_train.loc[start_train[col].isnull(), new_missing_col] = 1
-        ### Remember that fillna only works at dataframe level! ###
-        start_train[[col]] = start_train[[col]].fillna(fill_num)
-    if type(start_test) != str:
-        if missing_flag:
-            start_test[new_missing_col] = 0
-        if start_test[col].isnull().sum() > 0:
-            start_test.loc[start_test[col].isnull(), new_missing_col] = 1
-            ### Remember that fillna only works at dataframe level! ###
-            start_test[[col]] = start_test[[col]].fillna(fill_num)
-    return start_train, start_test, missing_flag, new_missing_col
-#####################################################################################
-def convert_train_test_cat_col_to_numeric(start_train, start_test, col, str_flag=True):
+class BulkEncoderImputer(TransformerMixin):
     """
-    ####  This is the easiest way to label encode object variables in both train and test
-    #### This takes care of some categories that are present in train and not in test
-    ###     and vice versa
+    ################################################################################################
+    ######  This encodes and fills missing values in all columns of a data frame in one pass.  #####
+    #####  It does the same job as calling My_LabelEncoder and fillna on each column one at a time
+    but it finds missing values once for all columns, fills numeric columns in bulk and adds all
+    the missing flag columns in one concat so that the data frame is not fragmented. It is fitted
+    on train data only and can then transform test data and any future batches without refitting.
+        object columns: label encoded in sorted order (NaN => -1). Unseen values share one new code.
+        nlp columns: missing values are filled with "missing"
+        integer and float columns: missing values are filled with one less than the train minimum
+        factor (category) columns: label encoded in sorted order with NaN as a separate "nan" category
+        date time columns: missing values are forward filled
+    A column named col+'_Missing_Flag' is added for each column that had missing values in train.
+    ################################################################################################
+    Usage:
+          BEI = BulkEncoderImputer(nlp_columns=nlp_columns, factor_cols=factor_cols)
+          train = BEI.fit_transform(train[preds])
+          test = BEI.transform(test[preds])
     """
-    start_train = copy.deepcopy(start_train)
-    start_test = copy.deepcopy(start_test)
-    missing_flag = False
-    new_missing_col = ''
-    if start_train[col].isnull().sum() > 0:
-        missing_flag = True
-        if str_flag:
-            new_missing_col = col + '_Missing_Flag'
-            start_train[new_missing_col] = 0
-            start_train.loc[start_train[col].isnull(), new_missing_col] = 1
-            ### Remember that fillna only works at dataframe level! ###
-            start_train[[col]] = start_train[[col]].fillna("nan")
+
+    def __init__(self, cols=None, nlp_columns=None, factor_cols=None):
+        self.cols = cols
+        self.nlp_columns = nlp_columns
+        self.factor_cols = factor_cols
+
+    def fit(self, X, y=None):
+        if self.cols is None:
+            cols = list(X)
         else:
-            new_missing_col = col + '_Missing_Flag'
-            start_train[new_missing_col] = 0
-            start_train.loc[start_train[col].isnull(), new_missing_col] = 1
-            ls = start_train[col].unique().astype(str)
-            start_train[col] = start_train[col].astype(pd.CategoricalDtype(ls))
-            ### Remember that fillna only works at dataframe level! ###
-            start_train[[col]] = start_train[[col]].fillna("nan").astype('category')
-    if len(start_train[col].apply(type).value_counts()) > 1:
-        print('    Alert! Mixed Data Types in Train data set %s column with %d data types. Fixing it...' % (
-            col, len(start_train[col].apply(type).value_counts())))
-        train_categs = start_train[col].value_counts().index.tolist()
-    else:
-        train_categs = np.unique(start_train[col]).tolist()
-    if not isinstance(start_test, str):
-        if start_test[col].isnull().sum() > 0:
-            #### IN some rare cases, Test data has missing values while Train data doesn.t
-            #### This section is to take care of such rare cases. We need to create a missing col
-            ####  We need to create that missing flag column in both train and test in that case
-            if not missing_flag:
-                missing_flag = True
-                new_missing_col = col + '_Missing_Flag'
-                start_train[new_missing_col] = 0
-            #####  THis is to take care of Missing_Flag in start_test data set!!
-            start_test[new_missing_col] = 0
-            start_test.loc[start_test[col].isnull(), new_missing_col] = 1
-            if str_flag:
-                ### Remember that fillna only works at dataframe level! ###
-                start_test[[col]] = start_test[[col]].fillna("nan").astype(str)
+            cols = copy.deepcopy(self.cols)
+        nlp_columns = [] if self.nlp_columns is None else self.nlp_columns
+        factor_cols = [] if self.factor_cols is None else self.factor_cols
+        self.kinds_ = OrderedDict()
+        self.fill_values_ = dict()
+        self.encoders_ = dict()
+        int_types = [np.int64, np.int32, np.int16, np.int8]
+        #### Find missing values in all columns in one pass instead of once for each column
+        null_counts = X[cols].isnull().sum()
+        self.missing_flag_cols = []
+        self.flag_source_cols_ = []
+        for col in cols:
+            if col in nlp_columns:
+                self.kinds_[col] = 'nlp'
+                self.fill_values_[col] = 'missing'
+            elif X[col].dtype == object:
+                self.kinds_[col] = 'object'
+            elif X[col].dtype in int_types:
+                self.kinds_[col] = 'int'
+            elif is_datetime(X[col]):
+                ### Missing flags of date time columns are not used as features
+                self.kinds_[col] = 'datetime'
+                continue
+            elif col in factor_cols:
+                self.kinds_[col] = 'factor'
             else:
-                ls = start_test[col].unique().astype(str)
-                start_test[col] = start_test[col].astype(pd.CategoricalDtype(ls))
-                ### Remember that fillna only works at dataframe level! ###
-                start_test[[col]] = start_test[[col]].fillna("nan").astype('category')
-        else:
-            #### In some rare cases, there is missing values in train but not in test data!
-            #### In those cases, we need to create a new_missing_col in test data in addition to train
-            start_test[new_missing_col] = 0
-        if len(start_test[col].apply(type).value_counts()) > 1:
-            print('    Alert! Mixed Data Types in Test data set %s column with %d data types. Fixing it...' % (
-                col, len(start_test[col].apply(type).value_counts())))
-            test_categs = start_test[col].value_counts().index.tolist()
-            test_categs = [x if isinstance(x, str) else str(x) for x in test_categs]
-            start_test[col] = start_test[col].astype(str).values
-        else:
-            test_categs = np.unique(start_test[col]).tolist()
-    if not isinstance(start_test, str):
-        categs_all = np.unique(train_categs + test_categs).tolist()
-        dict_all = return_factorized_dict(categs_all)
-    else:
-        dict_all = return_factorized_dict(train_categs)
-    start_train[col] = start_train[col].map(dict_all)
-    if not isinstance(start_test, str):
-        start_test[col] = start_test[col].map(dict_all)
-    return start_train, start_test, missing_flag, new_missing_col
+                self.kinds_[col] = 'numeric'
+            if null_counts[col] > 0:
+                self.flag_source_cols_.append(col)
+                self.missing_flag_cols.append(col + '_Missing_Flag')
+        #### Fill values of numeric columns are one less than their minimums: found in bulk here
+        int_cols = [x for x in cols if self.kinds_[x] == 'int']
+        num_cols = [x for x in cols if self.kinds_[x] == 'numeric']
+        if len(int_cols) > 0:
+            self.fill_values_.update(dict([(x, int(y - 1)) for (x, y) in X[int_cols].min().items()]))
+        if len(num_cols) > 0:
+            self.fill_values_.update((X[num_cols].min() - 1).to_dict())
+        ### Label encoders are dictionaries mapping each train value to its code in sorted order
+        for col in cols:
+            if self.kinds_[col] in ['object', 'factor']:
+                _, uniques = pd.factorize(self._fill_factor(col, X[col]), sort=True)
+                self.encoders_[col] = dict(zip(uniques.tolist(), range(len(uniques))))
+        return self
+
+    def _fill_factor(self, col, values):
+        if self.kinds_[col] == 'factor':
+            return values.astype(object).where(values.notnull(), 'nan')
+        return values
+
+    def _encode(self, col, values):
+        """
+        Label encodes values with the train codes. All values not seen in train get the same code,
+        one more than the largest train code, so the encoder is never changed after fit.
+        """
+        values = self._fill_factor(col, values)
+        transformer = self.encoders_[col]
+        unseen_code = len(transformer)
+        outs = values.map(transformer)
+        outs = outs.where(outs.notnull() | values.isnull(), unseen_code)
+        if self.kinds_[col] == 'object' and col in self.flag_source_cols_:
+            ### NaN's in train were encoded as -1. So they are encoded the same way here.
+            outs = outs.where(values.notnull(), -1)
+        if outs.isnull().sum() == 0:
+            outs = outs.astype(np.int64)
+        return outs.values
+
+    def transform(self, X, y=None):
+        cols = list(self.kinds_)
+        absent_cols = left_subtract(cols, list(X))
+        if len(absent_cols) > 0:
+            X = X.join(pd.DataFrame(np.nan, index=X.index, columns=absent_cols))
+        #### Missing flags are found once for all columns and added in one concat below
+        flags = X[self.flag_source_cols_].isnull().astype(int)
+        flags.columns = self.missing_flag_cols
+        new_cols = dict()
+        fill_cols = [x for x in cols if self.kinds_[x] in ['nlp', 'int', 'numeric']]
+        if len(fill_cols) > 0:
+            ### Remember that fillna only works at dataframe level! ###
+            filled = X[fill_cols].fillna(dict([(x, self.fill_values_[x]) for x in fill_cols]))
+            for col in fill_cols:
+                if self.kinds_[col] == 'int':
+                    new_cols[col] = filled[col].astype(int).values
+                else:
+                    new_cols[col] = filled[col].values
+        for col in cols:
+            if self.kinds_[col] in ['object', 'factor']:
+                new_cols[col] = self._encode(col, X[col])
+            elif self.kinds_[col] == 'datetime':
+                new_cols[col] = X[[col]].fillna(method='ffill')[col].values
+        encoded = pd.DataFrame(new_cols, index=X.index)
+        other_cols = left_subtract(list(X), list(encoded))
+        #### Put the columns back in their original order with all the missing flags at the end
+        return pd.concat([X[other_cols], encoded, flags], axis=1)[list(X) + self.missing_flag_cols]
+
+    def fit_transform(self, X, y=None):
+        return self.fit(X, y).transform(X)
 
 
 #############################################################################################################
@@ -433,10 +462,14 @@ def flatten_list(list_of_lists):
     return final_ls
 
 #############################################################################################################
+@use_cpu_budget
 def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', feature_reduction=True,
               scoring_parameter='logloss', Boosting_Flag=None, KMeans_Featurizer=False,
               Add_Poly=0, Stacking_Flag=False, Binning_Flag=False,
-              Imbalanced_Flag=False, GPU_flag=False, verbose=0):
+              Imbalanced_Flag=False, GPU_flag=False, verbose=0, return_pipeline=False, low_memory=False,
+              profiler=None, headless=False, row_sampling=False, sketch_profiling=False, profile_cache=None,
+              mi_scorer=None, corr_method='pearson', xgb_selection='windows', n_cpus=None,
+              reuse_fits=False, prediction_cache=None):
     """
     #########################################################################################################
     #############       This is not an Officially Supported Google Product!         #########################
@@ -478,8 +511,13 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
     ####   sep: if you have a spearator in the file such as "," or "\t" mention it here. Default is ",". ####
     ####   scoring_parameter: if you want your own scoring parameter such as "f1" give it here. If not, #####
     ####       it will assume the appropriate scoring param for the problem and it will build the model.#####
-    ####   hyper_param: Tuning options are GridSearch ('GS'), RandomizedSearch ('RS')                   #####
-    ####        Default setting is 'GS'. Auto_ViML with HyperOpt is approximately 3X Faster than Auto_ViML###
+    ####   hyper_param: Tuning options are GridSearch ('GS'), RandomizedSearch ('RS'),                  #####
+    ####        Bayesian search ('HO') and successive halving ('SH'). 'HO' runs a TPE search            #####
+    ####        (autoviml.hyper_search) that picks each candidate from the scores of earlier ones       #####
+    ####        and stops weak ones early. 'SH' trains all candidates with few trees (or rows for       #####
+    ####        Linear) and only the best with the full budget. For CatBoost, 'SH' picks the            #####
+    ####        learning rate. 'HO' and 'SH' are kept on 10,000+ rows where 'GS' is switched to         #####
+    ####        'RS'. Default is 'RS'.                                                                  #####
     ####   feature_reduction: Default = 'True' but it can be set to False if you don't want automatic    ####
     ####         feature_reduction since in Image data sets like digits and MNIST, you get better       #####
     ####         results when you don't reduce features automatically. You can always try both and see. #####
@@ -506,6 +544,59 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
     ####    0 = limited output. Great for running this silently and getting fast results.               #####
     ####    1 = more charts. Great for knowing how results were and making changes to flags in input.   #####
     ####    2 = lots of charts and output. Great for reproducing what Auto_ViML does on your own.       #####
+    ####   return_pipeline: Default is False. If set to True, it returns a fifth output which is a fitted #####
+    ####         AutoViMLPipeline with every transformer and the final model. Use it to score new data  #####
+    ####         with pipeline.predict(df) or save it to disk with pipeline.save(filename).             #####
+    ####   low_memory: Default is False. If set to True, it does not make safety copies of train and test#####
+    ####         but only reads them and makes one working copy of each. Use it for very large data     #####
+    ####         sets. Peak memory used is printed at the end.                                          #####
+    ####   profiler: Default is None. Pass a StageProfiler to get the wall time, CPU time, peak memory #####
+    ####         and row/column counts of each stage. Read it after the run with profiler.report()  #####
+    ####         (dict) or profiler.to_json(filename). You can also pass a function which is called #####
+    ####         with the record of each stage as it finishes. The report is also stored in         #####
+    ####         pipeline.profile if return_pipeline=True and printed at the end if verbose >= 1.    #####
+    ####   headless: Default is False. If set to True, no charts are built at any verbose level. It    #####
+    ####         skips every matplotlib, seaborn and networkx figure as well as the SHAP values that  #####
+    ####         are computed only for charts. Use it on servers. Metrics, feature importances and  #####
+    ####         all printed results are the same as before.                                         #####
+    ####   row_sampling: Default is False. If True, on data sets with 250,000 rows or more, feature    #####
+    ####         selection (SULOV, XGB feature selection and entropy binning selection) runs on     #####
+    ####         stratified samples of rows that keep growing until the selected features stop      #####
+    ####         changing. The final model is still trained on all rows. The selected features may  #####
+    ####         differ slightly from a run on all rows.                                             #####
+    ####   sketch_profiling: Default is False. If True, columns are profiled before classification    #####
+    ####         using sketches: exact distinct counts stop early above 1000 values, larger counts  #####
+    ####         are estimated with HyperLogLog and string lengths come from samples. Counts close  #####
+    ####         to the ID and NLP thresholds are still exact, so columns are classified the same. #####
+    ####         Use it on very long tables to save time and memory in classifying columns.        #####
+    ####   profile_cache: Default is None. Give a folder name (or a ProfileCache) to keep the column   #####
+    ####         profiles and column classification of train on disk. Repeat runs on the same data #####
+    ####         (with other flags such as Boosting_Flag or Add_Poly) then skip profiling and       #####
+    ####         classifying columns. Entries are keyed by a fingerprint of the data and the least  #####
+    ####         recently used ones are removed once the cache grows beyond 500MB.                   #####
+    ####   mi_scorer: Default is None which uses sklearn's nearest neighbor mutual information in     #####
+    ####         SULOV. Set it to 'histogram' (or a HistogramMI) to score features from histograms #####
+    ####         which is much faster on millions of rows. See autoviml.mutual_info for details.   #####
+    ####   corr_method: Default is 'pearson'. Set it to 'spearman' to find highly correlated       #####
+    ####         features in SULOV by their rank correlation. That also catches pairs that move    #####
+    ####         together without a straight line relation (such as x and log(x)).                 #####
+    ####   xgb_selection: Default is 'windows' which refits XGBoost on shrinking windows of        #####
+    ####         columns to find important features. 'quantized' runs the same rounds on columns   #####
+    ####         put in quantile bins once (much faster on 1000+ columns). 'single' uses one fit   #####
+    ####         and keeps top features by gain whose permutation hurts the validation loss.       #####
+    ####         'rfe' drops the lowest gain features step by step from one booster that keeps     #####
+    ####         training (warm start) until the validation loss gets worse.                       #####
+    ####   n_cpus: Default is None which uses all CPUs. Searches, the threads of each model, BLAS       #####
+    ####         and OpenMP all share this budget: a search runs up to n_cpus fits at a time and        #####
+    ####         each fit gets the CPUs left over. Set it lower to leave CPUs for other work.           #####
+    ####   reuse_fits: Default is False. If True, the final model reuses the models fitted so far       #####
+    ####         instead of training again on full train. Multi-class calibrated folds become the       #####
+    ####         final model (metrics use their out of fold predictions). Other models keep training    #####
+    ####         (warm start) from the best model of the search. About half the model fits in all.      #####
+    ####   prediction_cache: Default is None which keeps nothing. Give a folder name (or True) to keep  #####
+    ####         predictions of Stacking, Ensembling, calibration and the held out data in memory and   #####
+    ####         on disk, so the same model is never fitted twice on the same data, even across runs.   #####
+    ####         Or give a PredictionStore of your own (PredictionStore() keeps them in memory only).   #####
     #########################################################################################################
     ####   OUTPUTS:                                                                                     #####
     #########################################################################################################
@@ -513,6 +604,7 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
     ####   features: the fewest number of features in your model to make it perform well                #####
     ####   train_modified: this is the modified train dataframe after removing and adding features      #####
     ####   test_modified: this is the modified test dataframe with the same transformations as train    #####
+    ####   pipeline: (only if return_pipeline=True) fitted AutoViMLPipeline to score new data sets      #####
     #################               A D D I T I O N A L    N O T E S                              ###########
     ####   Finally, it writes your submission file to disk in the current directory called "mysubmission.csv"
     ####   This submission file is ready for you to show it clients or submit it to competitions.       #####
@@ -532,15 +624,36 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
     ######################### HELP OTHERS! PLEASE CONTRIBUTE! OPEN A PULL REQUEST! ##########################
     #########################################################################################################
     """
+    if verbose >= 1 and not headless:
+        #### Charts are drawn only when verbose >= 1. So matplotlib is set up only then.
+        from matplotlib.pylab import rcParams
+        rcParams['figure.figsize'] = (10, 6)
+    #####   This records time and memory used by each stage. See StageProfiler for details ####
+    if not isinstance(profiler, StageProfiler):
+        if callable(profiler):
+            profiler = StageProfiler(callback=profiler, verbose=verbose)
+        else:
+            profiler = StageProfiler(verbose=verbose)
     #####   These copies are to make sure that the originals are not destroyed ####
     CPU_count = os.cpu_count()
-    test = copy.deepcopy(test)
-    orig_train = copy.deepcopy(train)
-    orig_test = copy.deepcopy(test)
+    if low_memory:
+        #### In low_memory mode, originals are only read and never modified. So no copies are needed.
+        ####  start_train and start_test are the only working copies. Encoding builds new frames from them.
+        print('Low memory mode: working on one copy of train and test data...')
+        orig_train = train
+        orig_test = test
+        if not isinstance(test, str):
+            start_test = test.copy()
+        else:
+            start_test = test
+    else:
+        test = copy.deepcopy(test)
+        orig_train = copy.deepcopy(train)
+        orig_test = copy.deepcopy(test)
+        start_test = copy.deepcopy(orig_test)
     train_index = train.index
     if not isinstance(test, str):
         test_index = test.index
-    start_test = copy.deepcopy(orig_test)
     #######    These are Global Settings. If you change them here, it will ripple across the whole code ###
     corr_limit = 0.70   #### This decides what the cut-off for defining highly correlated vars to remove is.
     scaling = 'MinMax' ### This decides whether to use MinMax scaling or Standard Scaling ("Std").
@@ -584,7 +697,9 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
     perform_scaling_flag = True #### For linear models, scaling is a must but for other models, its not necessary but okay.
     xgb_booster = 'dart'  ### you can set this to either of dart, gbtree or gblinear
     max_neighbors = 100 #### this is max number of neighbors used in k_neighbors for RandomizedSearchCV algo
-    n_jobs = -1 #### In case of KNN, having n_jobs=-1 gives an error on Windows environments. Hence avoid.
+    #### One CPU budget for the whole run: searches, models, BLAS and OpenMP threads all share n_cpus
+    cpu_budget = CPUBudget(n_cpus)
+    n_jobs = cpu_budget.n_cpus #### In case of KNN, having n_jobs=-1 gives an error on Windows environments. Hence avoid.
     chain_flag = False
     ensemble_max_rows = 100000 ### Want to limit the ensemble models running forever for large datasets
     ####################################################################################################
@@ -608,38 +723,26 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                 print('Not installed CatBoost on this machine. pip install catboost before trying Auto_ViML')
     #### Similarly for Random Forests Model, it takes too long with Grid Search, so MAKE IT RandomizedSearch!
     if not Boosting_Flag:  ### there is also a chance Boosting_Flag is None - This is to eliminate that chance!
-        if orig_train.shape[0] >= 10000:
+        if orig_train.shape[0] >= 10000 and hyper_param not in ['HO', 'SH']:
             hyper_param = 'RS'
             print(
                 'ALERT! Changing hyperparameter search to RS. Otherwise, Random Forests will take too long for 10,000+ rows')
     elif Boosting_Flag:  ### there is also a chance Boosting_Flag is None - This is to eliminate that chance!
         if not isinstance(Boosting_Flag, str):
-            if orig_train.shape[0] >= 10000:
+            if orig_train.shape[0] >= 10000 and hyper_param not in ['HO', 'SH']:
                 hyper_param = 'RS'
                 print(
                     'ALERT! Changing hyperparameter search to RS. Otherwise XGBoost will take too long for 10,000+ rows.')
-    ###########    T H I S   I S  W H E R E   H Y P E R O P T    P A R A M S  A R E   S E T #########
-    if hyper_param == 'HO':
-        ########### HyperOpt related objective functions are defined here #################
-        from autoviml.custom_scores_HO import gini_meae, gini_sklearn, rmse
-        from autoviml.custom_scores_HO import gini_mae, gini_mse, gini_rmse
-        from autoviml.custom_scores_HO import gini_accuracy, gini_bal_accuracy, gini_roc
-        from autoviml.custom_scores_HO import gini_precision, gini_average_precision, gini_weighted_precision
-        from autoviml.custom_scores_HO import gini_macro_precision, gini_micro_precision
-        from autoviml.custom_scores_HO import gini_samples_precision, gini_f1, gini_weighted_f1
-        from autoviml.custom_scores_HO import gini_macro_f1, gini_micro_f1, gini_samples_f1, f2_measure
-        from autoviml.custom_scores_HO import gini_log_loss, gini_recall, gini_weighted_recall
-        from autoviml.custom_scores_HO import gini_samples_recall, gini_macro_recall, gini_micro_recall
-    else:
-        from autoviml.custom_scores import gini_meae, gini_sklearn, rmse
-        from autoviml.custom_scores import gini_mae, gini_mse, gini_rmse
-        from autoviml.custom_scores import gini_accuracy, gini_bal_accuracy, gini_roc
-        from autoviml.custom_scores import gini_precision, gini_average_precision, gini_weighted_precision
-        from autoviml.custom_scores import gini_macro_precision, gini_micro_precision
-        from autoviml.custom_scores import gini_samples_precision, gini_f1, gini_weighted_f1
-        from autoviml.custom_scores import gini_macro_f1, gini_micro_f1, gini_samples_f1, f2_measure
-        from autoviml.custom_scores import gini_log_loss, gini_recall, gini_weighted_recall
-        from autoviml.custom_scores import gini_samples_recall, gini_macro_recall, gini_micro_recall
+    ####  The same higher-is-better scorers are used by every search, including the TPE search for 'HO'.
+    from autoviml.custom_scores import gini_meae, gini_sklearn, rmse
+    from autoviml.custom_scores import gini_mae, gini_mse, gini_rmse
+    from autoviml.custom_scores import gini_accuracy, gini_bal_accuracy, gini_roc
+    from autoviml.custom_scores import gini_precision, gini_average_precision, gini_weighted_precision
+    from autoviml.custom_scores import gini_macro_precision, gini_micro_precision
+    from autoviml.custom_scores import gini_samples_precision, gini_f1, gini_weighted_f1
+    from autoviml.custom_scores import gini_macro_f1, gini_micro_f1, gini_samples_f1, f2_measure
+    from autoviml.custom_scores import gini_log_loss, gini_recall, gini_weighted_recall
+    from autoviml.custom_scores import gini_samples_recall, gini_macro_recall, gini_micro_recall
     ###### If hyper_param = 'GS', it takes a LOOOONG TIME with "SAGA" solver for LogisticRegression.
     ####   Hence to speed it up you need to change the tolerance threshold to something bigger
     if hyper_param == 'GS':
@@ -754,11 +857,36 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
     elif hyper_param == 'RS':
         print('    Using RandomizedSearchCV for Hyper Parameter Tuning. This is 3X faster than GridSearchCV...')
     elif hyper_param == 'HO':
-        print('    Using HyperOpt which is approximately 3X Faster than GridSearchCV but results vary...')
+        print('    Using a Bayesian (TPE) search that stops weak trials early. This needs fewer fits than RS...')
+    elif hyper_param == 'SH':
+        print('    Using successive halving: candidates get a small budget first and only the best get the full one...')
     elif hyper_param == 'Chain':
         print('    Using MultiOutput Chain Regressor model - make sure your target columns are in correct order...')
     elif hyper_param is None:
         print('    Using CatBoost which is very fast and hence not using GridSearchCV or RandomizedSearchCV...')
+    #### One store of predictions and fitted models of Stacking, Ensembling and calibration for this run
+    if prediction_cache is None or prediction_cache is False:
+        #### This store keeps nothing: every model is fitted and predicted as usual and nothing is copied
+        prediction_store = PredictionStore(max_memory_bytes=0)
+    elif isinstance(prediction_cache, PredictionStore):
+        prediction_store = prediction_cache
+    else:
+        prediction_store = PredictionStore(cache_dir=prediction_cache)
+    ####  Profile every column once here. Null counts, uniques, types and lengths found here are reused
+    ####    by the target checks, classify_columns, marthas_columns and the missing values report below.
+    profiler.start('profile_columns', orig_train)
+    cached_columns = None
+    if profile_cache is not None:
+        if not isinstance(profile_cache, ProfileCache):
+            profile_cache = ProfileCache(None if profile_cache is True else profile_cache)
+        cache_key = profile_cache.make_key(orig_train, target=target, sketch=sketch_profiling)
+        cached_columns = profile_cache.get(cache_key)
+    if cached_columns is None:
+        column_profiles = profile_columns(orig_train, n_jobs=n_jobs, sketch=sketch_profiling)
+    else:
+        print('Using column profiles and classification cached from an earlier run on the same data...')
+        column_profiles = cached_columns['profiles']
+    profiler.stop('profile_columns', cached=cached_columns is not None)
     ##################   L A B E L    TARGET    T R A N S F O R M A T I O N     #################################
     for each_target in target:
         #### Make sure you don't move these 2 lines: they need to be reset for every target!
@@ -768,7 +896,7 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
         ############    THIS IS WHERE OTHER DEFAULT PARAMS ARE SET ###############
         c_params = dict()
         r_params = dict()
-        if orig_train[each_target].isnull().sum() > 0:
+        if column_profiles[each_target].n_nulls > 0:
             ### If there are Null values in target columns, drop those rows that contain nulls ##
             start_train = start_train.dropna(subset=[each_target], axis=0)
             print('Dropping rows in target column: %s that contain null values...' % each_target)
@@ -862,9 +990,16 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
     orig_preds = [x for x in list(orig_train) if x not in target]
     multilabel_count = 0  #### This counts the number of times multi-labels  have jaccard metrics
     #################    CLASSIFY  COLUMNS   HERE    ######################
-    var_df = classify_columns(orig_train[orig_preds], verbose)
+    profiler.start('classify_columns', orig_train)
+    if cached_columns is None:
+        var_df = classify_columns(orig_train[orig_preds], verbose, profiles=column_profiles)
+        if profile_cache is not None:
+            profile_cache.put(cache_key, {'profiles': column_profiles, 'classification': var_df})
+    else:
+        var_df = cached_columns['classification']
+    profiler.stop('classify_columns', cols_out=len(orig_preds))
     if verbose == 2:
-        marthas_columns(orig_train[orig_preds], verbose=1)
+        marthas_columns(orig_train[orig_preds], verbose=1, profiles=column_profiles)
         #####       Classify Columns   ################
     id_cols = var_df['id_vars']
     nlp_columns = var_df['nlp_vars']
@@ -895,10 +1030,13 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
         GPU_exists = False
     ###### This is where we set the CPU and GPU parameters for XGBoost
     param = {}
+    catboost_halving = False
     if Boosting_Flag:
         if isinstance(Boosting_Flag, str):
             if Boosting_Flag.lower() == 'catboost':
                 model_name = 'CatBoost'
+                #### CatBoost is not searched. With 'SH' only its learning rate is picked by successive halving
+                catboost_halving = hyper_param == 'SH'
                 hyper_param = None
             else:
                 model_name = 'XGBoost'
@@ -976,111 +1114,24 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
     ### This is where you fill missing values with either "missing" or a unique value not in that column such as -1
     copy_preds = copy.deepcopy(preds)
     missing_flag_cols = []
+    ######  This pipeline records every fitted transformer so that new data can be scored later ######
+    pipeline = AutoViMLPipeline(target, modeltype, model_label)
+    pipeline.id_cols = copy.deepcopy(id_cols)
+    pipeline.float_fill_cols = copy.deepcopy(copy_preds)
+    profiler.start('imputation', start_train)
     if len(copy_preds) > 0:
-        for col in copy_preds:
-            if col in missing_cols:
-                continue
-            missing_flag = False
-            if col in nlp_columns:
-                #### YOu have to do missing values for NLP columns. Otherwise leave them as is for Auto_NLP later ##############
-                fill_num = 'missing'
-                start_train, start_test, missing_flag, new_missing_col = fill_missing_values_object_or_number(
-                    start_train, start_test, fill_num, col)
-                if missing_flag:
-                    cat_vars.append(new_missing_col)
-                    num_bool_vars.append(new_missing_col)
-                    preds.append(new_missing_col)
-                    missing_flag_cols.append(new_missing_col)
-            elif start_train[col].dtype == object:
-                ####  This is the easiest way to label encode object variables in both train and test
-                #### This takes care of some categories that are present in train and not in test
-                ###     and vice versa
-                MLB = My_LabelEncoder()
-                new_missing_col = ''
-                if start_train[col].isnull().sum() > 0:
-                    missing_flag = True
-                    new_missing_col = col + '_Missing_Flag'
-                    start_train[new_missing_col] = 0
-                    start_train.loc[start_train[col].isnull(), new_missing_col] = 1
-                #### This is where you use My_LabelEncoder to transform
-                start_train[col] = MLB.fit_transform(start_train[col])
-                if not isinstance(start_test, str):
-                    if missing_flag:
-                        start_test[new_missing_col] = 0
-                    if start_test[col].isnull().sum() > 0:
-                        new_missing_col = col + '_Missing_Flag'
-                        start_test[new_missing_col] = 0
-                        start_test.loc[start_test[col].isnull(), new_missing_col] = 1
-                    #### This is where you use My_LabelEncoder to transform
-                    start_test[col] = MLB.transform(start_test[col])
-                if missing_flag:
-                    cat_vars.append(new_missing_col)
-                    num_bool_vars.append(new_missing_col)
-                    preds.append(new_missing_col)
-                    missing_flag_cols.append(new_missing_col)
-            elif start_train[col].dtype in [np.int64, np.int32, np.int16, np.int8]:
-                ### if there are integer variables, don't scale them. Leave them as is.
-                fill_num = int(start_train[col].min() - 1)
-                start_train, start_test, missing_flag, new_missing_col = fill_missing_values_object_or_number(
-                    start_train, start_test, fill_num, col)
-                start_train[col] = start_train[col].astype(int)
-                if type(orig_test) != str:
-                    start_test[col] = start_test[col].astype(int)
-                if missing_flag:
-                    cat_vars.append(new_missing_col)
-                    num_bool_vars.append(new_missing_col)
-                    preds.append(new_missing_col)
-                    missing_flag_cols.append(new_missing_col)
-            elif is_datetime(start_train[col]):
-                ### if it is a date time variable then you need to fill any missing values with ffill method
-                if start_train[col].isnull().sum() > 0:
-                    missing_flag = True
-                    new_missing_col = col + '_Missing_Flag'
-                    start_train[new_missing_col] = 0
-                    start_train.loc[start_train[col].isnull(), new_missing_col] = 1
-                    ### Remember that fillna only works at dataframe level! ###
-                    start_train[[col]] = start_train[[col]].fillna(method='ffill')
-                if type(orig_test) != str:
-                    if missing_flag:
-                        start_test[new_missing_col] = 0
-                    if start_test[col].isnull().sum() > 0:
-                        new_missing_col = col + '_Missing_Flag'
-                        start_test[new_missing_col] = 0
-                        start_test.loc[start_test[col].isnull(), new_missing_col] = 1
-                        ### Remember that fillna only works at dataframe level! ###
-                        start_test[[col]] = start_test[[col]].fillna(method='ffill')
-            elif col in factor_cols:
-                start_train, start_test, missing_flag, new_missing_col = convert_train_test_cat_col_to_numeric(
-                    start_train, start_test, col, False)
-                if missing_flag:
-                    cat_vars.append(new_missing_col)
-                    num_bool_vars.append(new_missing_col)
-                    preds.append(new_missing_col)
-                    missing_flag_cols.append(new_missing_col)
-            else:
-                ### for all numeric variables, fill missing values with 1 less than min.
-                fill_num = start_train[col].min() - 1
-                if start_train[col].isnull().sum() > 0:
-                    missing_flag = True
-                    new_missing_col = col + '_Missing_Flag'
-                    start_train[new_missing_col] = 0
-                    start_train.loc[start_train[col].isnull(), new_missing_col] = 1
-                    ### Remember that fillna only works at dataframe level! ###
-                    start_train[[col]] = start_train[[col]].fillna(fill_num)
-                if type(orig_test) != str:
-                    if missing_flag:
-                        start_test[new_missing_col] = 0
-                    if start_test[col].isnull().sum() > 0:
-                        new_missing_col = col + '_Missing_Flag'
-                        start_test[new_missing_col] = 0
-                        start_test.loc[start_test[col].isnull(), new_missing_col] = 1
-                        ### Remember that fillna only works at dataframe level! ###
-                        start_test[[col]] = start_test[[col]].fillna(fill_num)
-                if missing_flag:
-                    cat_vars.append(new_missing_col)
-                    num_bool_vars.append(new_missing_col)
-                    preds.append(new_missing_col)
-                    missing_flag_cols.append(new_missing_col)
+        #### All columns are label encoded and filled in bulk. Columns missing in test use Iterative Imputer.
+        bulk_encoder = BulkEncoderImputer(cols=left_subtract(copy_preds, missing_cols),
+                                          nlp_columns=nlp_columns, factor_cols=factor_cols)
+        start_train = bulk_encoder.fit_transform(start_train)
+        if not isinstance(start_test, str):
+            start_test = bulk_encoder.transform(start_test)
+        pipeline.encoder = bulk_encoder
+        missing_flag_cols = copy.deepcopy(bulk_encoder.missing_flag_cols)
+        #### num_bool_vars is the same list as in var_df. So it must be extended in place here.
+        cat_vars += missing_flag_cols
+        num_bool_vars += missing_flag_cols
+        preds += missing_flag_cols
         ###########################################################################################
         #### We use Iterative Imputer only when an Entire Column is missing in Test while it's in Train!
         if len(missing_cols) >= 1:
@@ -1094,6 +1145,9 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                         start_test[eachcol] = np.nan
                 imp = IterativeImputer(max_iter=10, random_state=0)
                 imp.fit(start_train[preds])
+                pipeline.missing_cols = copy.deepcopy(missing_cols)
+                pipeline.imputer = imp
+                pipeline.imputer_cols = copy.deepcopy(preds)
                 if not isinstance(orig_test, str):
                     print('    Total rows in Test with missing values before Iterative Imputation =',
                           start_test[preds].isnull().sum().sum())
@@ -1103,13 +1157,14 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
             except:
                 print('    Error. Sklearn Iterative Imputer is not installed on this machine. Continuing...')
         ###########################################################################################
-        if orig_train.isnull().sum().sum() > 0:
+        null_counts = pd.Series([column_profiles[x].n_nulls for x in list(orig_train)], index=list(orig_train))
+        if null_counts.sum() > 0:
             ### If there are missing values in remaining features print it here ####
-            top5 = orig_train.isnull().sum().sort_values(ascending=False).index.tolist()[:5]
+            top5 = null_counts.sort_values(ascending=False).index.tolist()[:5]
             print('    Columns with most missing values: %s' % (
-                [x for x in top5 if orig_train[x].isnull().sum() > 0]))
-            print('    and their missing value totals: %s' % ([orig_train[x].isnull().sum() for x in
-                                                               top5 if orig_train[x].isnull().sum() > 0]))
+                [x for x in top5 if null_counts[x] > 0]))
+            print('    and their missing value totals: %s' % ([null_counts[x] for x in
+                                                               top5 if null_counts[x] > 0]))
             if start_train[copy_preds].isnull().sum().sum() == 0:
                 print('Completed missing value Imputation. No more missing values in train.')
                 if verbose >= 1:
@@ -1135,6 +1190,7 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
         return
     ###########################################################################################
     print('    Completed Label Encoding and Filling of Missing Values for Train and Test Data')
+    profiler.stop('imputation', start_train)
     ### This is a minor test to make sure that Boolean vars are Integers if they are Numeric!
     if len(num_bool_vars) > 0:
         ### Just make sure that numeric Boolean vars are set as Integer type -> otherwise CatBoost will blow up
@@ -1184,7 +1240,10 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
     train = start_train[target + red_preds]
     if type(orig_test) != str:
         test = start_test[red_preds]
+    pipeline.num_bool_vars = copy.deepcopy(var_df['num_bool_vars'])
+    pipeline.red_preds = copy.deepcopy(red_preds)
     if Add_Poly >= 1:
+        profiler.start('Add_Poly', train)
         print('##############################################################################')
         print('########   A D D I N G  P O L Y N O M I A L   &   I N T E R A C T I O N S  ###')
         print('##############################################################################')
@@ -1204,7 +1263,8 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                                                                                               md='',
                                                                                               scaling='None',
                                                                                               fit_flag=True,
-                                                                                              verbose=verbose)
+                                                                                              verbose=verbose,
+                                                                                              headless=headless)
             #### train_red contains reduced numeric variables with original and substituted poly/intxn variables
             if len(left_subtract(train_sel, numvars)) > 0:
                 #### This means that new intxn and poly vars were added. In that case, you can use them as is
@@ -1216,6 +1276,13 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                 if verbose >= 1:
                     print('    Intxn and Poly Vars are: %s' % addl_vars)
                 train = train_red[train_sel].join(train[rem_vars + target])
+                pipeline.add_poly = Add_Poly
+                pipeline.poly_degree = poly_degree
+                pipeline.poly_md = md
+                pipeline.poly_numvars = copy.deepcopy(numvars)
+                pipeline.poly_vars = copy.deepcopy(addl_vars)
+                pipeline.poly_x_vars = [dict([(v, k) for (k, v) in feature_xvar_dict.items()])[x] for x in addl_vars]
+                pipeline.poly_int_vars = [x for x in numvars if orig_train[x].dtype == int]
                 if type(test) != str:
                     ######### Add Polynomial and Interaction variables to Test ################
                     ## Since the data is already scaled, we set scaling to None here ##
@@ -1223,7 +1290,7 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                     _, _, test_x_df, _, _, _ = add_poly_vars_select(test, numvars, each_target,
                                                                     modeltype, poly_degree, Add_Poly, md,
                                                                     scaling='None', fit_flag=False,
-                                                                    verbose=verbose)
+                                                                    verbose=verbose, headless=headless)
                     ### we need to convert x_vars into text_vars in test_x_df using feature_xvar_dict
                     rev_feat_x_vars_dict = dict([(v, k) for (k, v) in feature_xvar_dict.items()])
                     if len(addl_vars) > 0:
@@ -1247,34 +1314,42 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                 print('    No new variable was added by polynomial features...')
         else:
             print('Adding Polynomial vars ignored since no numeric vars in data')
+        profiler.stop('Add_Poly', train)
     else:
         ### if there are no Polynomial vars, then all numeric variables are selected
         pass
     ################  A U T O   N L P  P R O C E S S I N G   B E G I N S    H E R E !!! ####
     if len(nlp_columns) > 0:
         for nlp_column in nlp_columns:
+            profiler.start('Auto_NLP', train)
             try:
                 train1, test1, best_nlp_transformer, max_features_limit = Auto_NLP(nlp_column,
                                                                                    train, test, each_target,
                                                                                    refit_metric,
                                                                                    modeltype, top_nlp_features, verbose,
-                                                                                   build_model=False)
+                                                                                   build_model=False,
+                                                                                   return_transformer=True,
+                                                                                   headless=headless)
                 ####### Make sure you include the above new columns created in the predictor variables!
                 red_preds = [x for x in list(train1) if x not in target]
                 train = train1[red_preds + target]
                 if not isinstance(orig_test, str):
                     test = test1[red_preds]
+                pipeline.nlp_transformers.append((nlp_column, best_nlp_transformer, copy.deepcopy(red_preds)))
                 print('##############################################################################')
                 print('##########  A U T O   N L P  P R O C E S S I N G   E N D S    H E R E !!! ####')
                 print('##############################################################################')
             except:
                 print('Auto_NLP error. Continuing without NLP processing')
+                pipeline.nlp_transformers.append((nlp_column, None, []))
                 train.drop(nlp_column, axis=1, inplace=True)
                 if not isinstance(orig_test, str):
                     test.drop(nlp_column, axis=1, inplace=True)
+            profiler.stop('Auto_NLP', train, column=nlp_column)
     #########   A D D   D A T E  T I M E    F E A T U R E S     H E R E ####################
     if len(date_cols) > 0:
         #### Do this only if date time columns exist in your data set!
+        profiler.start('date_features', train)
         for date_col in date_cols:
             print('Processing %s column for date time features....' % date_col)
             date_df_train = create_time_series_features(orig_train, date_col)
@@ -1291,6 +1366,7 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                 date_col_adds = copy.deepcopy(date_col_adds_train)
                 if date_col_adds:
                     train = train.join(date_df_train)
+                    pipeline.date_features[date_col] = date_df_train.columns.tolist()
                     ### Now time to remove the date time column from all further processing ##
                     # train.drop(date_col,axis=1,inplace=True)
                     if not isinstance(orig_test, str):
@@ -1311,6 +1387,7 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                     date_col_adds = copy.deepcopy(date_col_adds_train)
                     if date_col_adds:
                         train = train.join(date_df_train)
+                        pipeline.date_features[date_col] = date_df_train.columns.tolist()
                         ### Now time to remove the date time column from all further processing ##
                         # train.drop(date_col,axis=1,inplace=True)
                         if not isinstance(orig_test, str):
@@ -1318,6 +1395,7 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                                 test = test.join(date_df_test)
                                 ### Now time to remove the date time column from all further processing ##
                                 # test.drop(date_col,axis=1,inplace=True)
+        profiler.stop('date_features', train)
         #########     CREATING TIME FEATURES IS COMPLETED   #############################
     ######  We have to detect float variables again since we have created new variables using Auto_NLP!!
     red_preds = [x for x in list(train) if x not in target]
@@ -1329,21 +1407,31 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
     #########     SELECT IMPORTANT FEATURES HERE   #############################
     if feature_reduction:
         ### Make sure you remove variables that are highly correlated within data set first
+        profiler.start('SULOV', train)
         try:
             train_sel = FE_remove_variables_using_SULOV_method(train, red_preds,
                                                                modeltype, each_target,
-                                                               corr_limit, verbose)
+                                                               corr_limit, verbose,
+                                                               headless=headless,
+                                                               row_sampling=row_sampling,
+                                                               mi_scorer=mi_scorer,
+                                                               corr_method=corr_method,
+                                                               n_jobs=n_jobs)
         except:
             #### if for some reason, the above blows up due to memory error, then try this
             #### Dropping highly correlated Features fast using simple linear correlation ###
-            remove_list = remove_highly_correlated_vars_fast(train[num_vars], corr_limit)
+            remove_list = remove_highly_correlated_vars_fast(train[num_vars], corr_limit, corr_method)
             train_sel = left_subtract(num_vars, remove_list)
+        profiler.stop('SULOV', cols_out=len(train_sel))
         num_vars = train[train_sel].select_dtypes(include=[np.float64, np.float32, np.float16]).columns.tolist()
         print('Splitting selected features into float and categorical (integer) variables:')
         print('    (%d) float variables ...' % len(num_vars))
+        profiler.start('find_top_features_xgb', train[train_sel])
         important_features, num_vars, imp_cats = find_top_features_xgb(train, train_sel, num_vars,
                                                                        each_target,
-                                                                       modeltype)
+                                                                       modeltype, row_sampling,
+                                                                       selection_mode=xgb_selection)
+        profiler.stop('find_top_features_xgb', cols_out=len(important_features))
     else:
         important_features = copy.deepcopy(red_preds)
         num_vars = copy.deepcopy(numvars)
@@ -1369,6 +1457,8 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
     ######################################################################
     if type(orig_test) != str:
         test = test[important_features]
+    pipeline.integer_cats = copy.deepcopy(non_integer_cats)
+    pipeline.selected_features = copy.deepcopy(important_features)
     ##############          F E A T U R E   E N G I N E E R I N G  S T A R T S  N O W    ##############
     ######    From here on we do some Feature Engg using Target Variable with Data Leakage ############
     ###   To avoid Model Leakage, we will now split the Data into Train and CV so that Held Out Data
@@ -1401,7 +1491,8 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
             ####    no numeric variables are removed. But next time, we will remove them later!
             # Optionally, select top n variables based on their predictive power
             # This step is useful if you want to bin only the most informative variables
-            entropy_binner = EntropyBinningTransformer(replace_vars=False, modeltype=modeltype, top_n_vars=None)
+            entropy_binner = EntropyBinningTransformer(replace_vars=False, modeltype=modeltype, top_n_vars=None,
+                                                       row_sampling=row_sampling)
 
             # Fit the transformer to the training data
             entropy_binner.fit_transform(X_train, y_train)
@@ -1452,6 +1543,7 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
         #######################   STACKING   FIRST   TIME     ############################
         ######### This is where you do Stacking of Multi Model Results into One Column ###
         if Stacking_Flag:
+            profiler.start('stacking', part_train)
             try:
                 #### In order to join, you need X_train to be a Pandas Series here ##
                 print('Alert! Stacking can produce Highly Overfit models on Training Data...')
@@ -1459,10 +1551,12 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                 ### That is why we are using X_train to train on and using it to predict on X_cv!
                 addcol, stacks1 = QuickML_Stacking(part_train[important_features], part_train[
                     each_target], part_train[important_features],
-                                                   modeltype, Boosting_Flag, scoring_parameter, verbose)
+                                                   modeltype, Boosting_Flag, scoring_parameter, verbose,
+                                                   n_jobs=n_jobs, prediction_store=prediction_store)
                 addcol, stacks2 = QuickML_Stacking(part_train[important_features], part_train[
                     each_target], part_cv[important_features],
-                                                   modeltype, Boosting_Flag, scoring_parameter, verbose)
+                                                   modeltype, Boosting_Flag, scoring_parameter, verbose,
+                                                   n_jobs=n_jobs, prediction_store=prediction_store)
                 part_train = part_train.join(pd.DataFrame(stacks1, index=part_train.index,
                                                           columns=addcol))
                 ##### Adding multiple columns for Stacking is best! Do not do the average of predictions!
@@ -1475,6 +1569,7 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
             except:
                 print('    Error in Stacking first time. Continuing without Stacking for this data set...')
                 Stacking_Flag = False
+            profiler.stop('stacking', part_train)
     ###############################################################################
     #### part train contains the unscaled original train. It also contains binned and orig_num_vars!
     #### DO NOT DO TOUCH part_train and part_cv -> we need it to recrate train later!
@@ -1516,6 +1611,7 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
     print('#################################################################################')
     print('######## %s    M O D E L   T R A I N I N G   ##########' % model_name)
     print('#################################################################################')
+    from xgboost import XGBClassifier, XGBRegressor
     print('Rows in Train data set = %d' % X_train.shape[0])
     print('  Features in Train data set = %d' % X_train.shape[1])
     print('    Rows in held-out data set = %d' % X_cv.shape[0])
@@ -2052,6 +2148,27 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                                         cv=scv,
                                         n_jobs=n_jobs,
                                         verbose=0)
+            elif hyper_param == 'HO':
+                gs = TPESearchCV(xgbm,
+                                 param_distributions=r_params[model_name],
+                                 n_iter=no_iter,
+                                 scoring=scorer,
+                                 refit=refit_metric,
+                                 return_train_score=True,
+                                 random_state=seed,
+                                 cv=scv,
+                                 n_jobs=n_jobs,
+                                 verbose=verbose)
+            elif hyper_param == 'SH':
+                gs = make_halving_search(xgbm,
+                                         param_distributions=r_params[model_name],
+                                         n_candidates=no_iter,
+                                         scoring=scorer,
+                                         refit=refit_metric,
+                                         random_state=seed,
+                                         cv=scv,
+                                         n_jobs=n_jobs,
+                                         verbose=verbose)
             else:
                 #### CatBoost does not need Hyper Parameter tuning => it's great out of the box!
                 gs = copy.deepcopy(xgbm)
@@ -2080,6 +2197,27 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                                         cv=scv,
                                         n_jobs=n_jobs,
                                         verbose=0)
+            elif hyper_param == 'HO':
+                gs = TPESearchCV(xgbm,
+                                 param_distributions=r_params[model_label][model_name],
+                                 n_iter=no_iter,
+                                 scoring=scorer,
+                                 refit=refit_metric,
+                                 return_train_score=True,
+                                 random_state=seed,
+                                 cv=scv,
+                                 n_jobs=n_jobs,
+                                 verbose=verbose)
+            elif hyper_param == 'SH':
+                gs = make_halving_search(xgbm,
+                                         param_distributions=r_params[model_label][model_name],
+                                         n_candidates=no_iter,
+                                         scoring=scorer,
+                                         refit=refit_metric,
+                                         random_state=seed,
+                                         cv=scv,
+                                         n_jobs=n_jobs,
+                                         verbose=verbose)
             else:
                 #### CatBoost does not need Hyper Parameter tuning => it's great out of the box!
                 gs = copy.deepcopy(xgbm)
@@ -2107,12 +2245,44 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                                         n_jobs=n_jobs,
                                         cv=scv,
                                         verbose=0)
+            elif hyper_param == 'HO':
+                gs = TPESearchCV(xgbm,
+                                 param_distributions=c_params[model_name],
+                                 n_iter=no_iter,
+                                 scoring=scorer,
+                                 refit=refit_metric,
+                                 return_train_score=True,
+                                 random_state=seed,
+                                 cv=scv,
+                                 n_jobs=n_jobs,
+                                 verbose=verbose)
+            elif hyper_param == 'SH':
+                gs = make_halving_search(xgbm,
+                                         param_distributions=c_params[model_name],
+                                         n_candidates=no_iter,
+                                         scoring=scorer,
+                                         refit=refit_metric,
+                                         random_state=seed,
+                                         cv=scv,
+                                         n_jobs=n_jobs,
+                                         verbose=verbose)
             else:
                 #### CatBoost does not need Hyper Parameter tuning => it's great out of the box!
                 gs = copy.deepcopy(xgbm)
         else:
             ## For multi-label problems, you can't do GridSearch or RandomizedSearch since it will take too long
             gs = copy.deepcopy(xgbm)
+    #### A search runs search_jobs fits at a time and each model it fits gets the CPUs left over.
+    ####  The TPE search runs one trial (all its folds) in each worker, the others one fold fit.
+    if type(gs) is not type(xgbm):
+        if isinstance(gs, TPESearchCV):
+            search_jobs, model_threads = cpu_budget.split(no_iter)
+        else:
+            search_jobs, model_threads = cpu_budget.split(no_iter * n_splits)
+        gs.n_jobs = search_jobs
+        cpu_budget.set_threads(gs.estimator, model_threads)
+    else:
+        cpu_budget.set_threads(gs)
     # trains and optimizes the model #########
     eval_set = [(X_train, y_train), (X_cv, y_cv)]
     print('Finding Best Model and Hyper Parameters for %s model...' % model_name)
@@ -2121,7 +2291,7 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
         ### Do this only for Binary Classes and Multi-Classes, both are okay
         baseline_accu = 1 - (train[each_target].value_counts(1).sort_values())[rare_class]
         print('    Baseline Accuracy Needed for Model = %0.2f%%' % (baseline_accu * 100))
-    print('    CPU Count = %s in this device' % CPU_count)
+    print('    CPU Count = %s in this device. Using %d of them' % (CPU_count, cpu_budget.n_cpus))
     if modeltype == 'Regression':
         if Boosting_Flag:
             if model_name.lower() == 'catboost':
@@ -2175,6 +2345,7 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
     ##### Since we are using Multiple Models each with its own quirks, we have to make sure it is done this way
     ##### ############      TRAINING MODEL FIRST TIME WITH X_TRAIN AND TESTING ON X_CV ############
     model_start_time = time.time()
+    profiler.start('hyperparameter_search', X_train)
     ############################################################################
     #####   BE VERY CAREFUL ABOUT MODIFYING THIS SECTION JUST BECAUSE ##########
     ####    IT APPEARS LIKE DUPLICATED CODE!!  IT IS NOT !!        #############
@@ -2195,7 +2366,8 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                                             Boosting_Flag, eval_metric,
                                             modeltype, model_name, training=True,
                                             calibrator_flag=calibrator_flag,
-                                            GPU_exists=GPU_exists, model_label=model_label, verbose=verbose)
+                                            GPU_exists=GPU_exists, model_label=model_label, verbose=verbose,
+                                            headless=headless, n_jobs=n_jobs)
             except:
                 print('Training model first time with SMOTE erroring. Continuing...')
                 Imbalanced_Flag = False
@@ -2237,9 +2409,21 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                                 model.fit(X_train, y_train)
                     else:
                         ##### This is for Catboost ###############
+                        if catboost_halving:
+                            try:
+                                cat_params = r_params if modeltype == 'Regression' else c_params
+                                sh = make_halving_search(model, cat_params['CatBoost'], n_candidates=no_iter,
+                                                         scoring=scorer, refit=False, random_state=seed,
+                                                         cv=scv, n_jobs=n_jobs, verbose=verbose)
+                                sh.fit(X_train, y_train, cat_features=imp_cats)
+                                model.set_params(learning_rate=sh.best_params_['learning_rate'])
+                                print('    Successive halving picked learning_rate = %0.4f for CatBoost' % (
+                                    sh.best_params_['learning_rate']))
+                            except Exception as e:
+                                print('    Could not pick CatBoost learning rate by successive halving due to %s' % e)
                         try:
                             model.fit(X_train, y_train, cat_features=imp_cats,
-                                      eval_set=(X_cv, y_cv), use_best_model=True, plot=True)
+                                      eval_set=(X_cv, y_cv), use_best_model=True, plot=not headless)
                         except:
                             model.fit(X_train, y_train, cat_features=imp_cats, use_best_model=False, plot=False)
                 else:
@@ -2259,14 +2443,16 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                                         Boosting_Flag, eval_metric,
                                         modeltype, model_name, training=True,
                                         calibrator_flag=calibrator_flag,
-                                        GPU_exists=GPU_exists, model_label=model_label, verbose=verbose)
+                                        GPU_exists=GPU_exists, model_label=model_label, verbose=verbose,
+                                        headless=headless, n_jobs=n_jobs)
     ###########   FIRST TIME MODEL TRAINING COMPLETED ##########################
     ##   TRAINING OF MODELS COMPLETED. NOW GET METRICS on CV DATA ###############
     print('    Actual training time (in seconds): %0.0f' % (time.time() - model_start_time))
+    profiler.stop('hyperparameter_search', X_train)
     print('###########  %s  M O D E L   R E S U L T S #################' % model_label)
     try:
         if model_label == 'Single_Label':
-            if hyper_param == 'RS' or hyper_param == 'GS':
+            if hyper_param in ['RS', 'GS', 'HO', 'SH']:
                 if modeltype == 'Regression' and Imbalanced_Flag:
                     ### If you use SMOTE, then no GridSearchCV is done. Hence no best_score_
                     best_score = 0
@@ -2292,6 +2478,11 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
     except Exception as e:
         print('Warning: Not able to print validation metrics due to %s' %e)
         best_score = 0
+    #### cv_proba holds out of fold probabilities of X_cv when the calibrated folds are reused (reuse_fits)
+    cv_proba = None
+    #### The data the model was fitted on. Predictions on X_cv are kept in the prediction store under it.
+    X_fit, y_fit = X_train, y_train
+    calibrated_on_full = False
     if model_label == 'Single_Label':
         if modeltype != 'Regression':
             ############## This is for Classification Only !! ########################
@@ -2313,7 +2504,7 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                 print('%d-fold Cross Validation %s Score = %0.4f' % (n_splits, validation_metric, best_score))
         #### We now need to set the Best Parameters, Fit the Model on Full X_train and Predict on X_cv
         ### Find what the order of best params are and set the same as the original model ###
-        if hyper_param == 'RS' or hyper_param == 'GS':
+        if hyper_param in ['RS', 'GS', 'HO', 'SH']:
             if not Imbalanced_Flag:
                 best_params = model.best_params_
                 print('    Best Parameters for Model = %s' % model.best_params_)
@@ -2343,11 +2534,13 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                     model_name, model.get_best_iteration(), model.get_all_params()['learning_rate']))
             else:
                 best_params = {}
-        if hyper_param == 'RS' or hyper_param == 'GS':
+        if hyper_param in ['RS', 'GS', 'HO', 'SH']:
             #### In the case of CatBoost, we don't do any Hyper Parameter tuning #########
             if not Imbalanced_Flag:
                 gs = copy.deepcopy(model)
                 model = gs.best_estimator_
+                #### From here on the best model is fitted alone. So it gets the whole CPU budget.
+                cpu_budget.set_threads(model)
             else:
                 print('No cross validation done when Imbalanced_Flag set to True...')
             if model_label == 'Single_Label' and modeltype == 'Multi_Classification':
@@ -2366,8 +2559,14 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                     else:
                         X_ful = np.r_[X_train, X_cv]
                         y_ful = np.r_[y_train, y_cv]
-                    model.fit(X_ful, y_ful)
+                    model = prediction_store.fit(model, X_ful, y_ful)
+                    X_fit, y_fit = X_ful, y_ful
                     print('Using a Calibrated Classifier in this Multi_Classification dataset to improve results...')
+                    if reuse_fits:
+                        #### The folds were fitted on all train rows. Each X_cv row (the last rows of X_ful)
+                        ####   is predicted by the fold model that did not see it, so the metrics stay honest.
+                        calibrated_on_full = True
+                        cv_proba = find_oof_probabilities(model, X_ful, y_ful)[-X_cv.shape[0]:]
                     if model_name.lower() == "forests":
                         ### Extra Calibration works well only for random forests. The rest are already decent.
                         calibrator_flag = True
@@ -2385,6 +2584,7 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
         try:
             gs = copy.deepcopy(model)
             model = gs.best_estimator_
+            cpu_budget.set_threads(model)
         except:
             gs = copy.deepcopy(model)
         print('    Using %s' % str(model).split("(")[0])
@@ -2395,8 +2595,13 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
     if model_label == 'Single_Label' and modeltype != 'Regression':
         ############   This is for Single Label Classification Problems only ######
         m_thresh = 0.5
-        y_proba = model.predict_proba(X_cv)
-        y_pred = model.predict(X_cv)
+        if cv_proba is None:
+            y_proba = prediction_store.predict(model, X_fit, y_fit, X_cv, method='predict_proba')
+            y_pred = prediction_store.predict(model, X_fit, y_fit, X_cv)
+        else:
+            print('    Using out of fold predictions of the calibrated folds for held out results...')
+            y_proba = cv_proba
+            y_pred = model.classes_[np.argmax(cv_proba, axis=1)]
         if len(classes) <= 2:
             print('Finding Best Threshold for Highest F1 Score...')
             precision, recall, thresholds = precision_recall_curve(y_cv, y_proba[:, rare_class])
@@ -2412,8 +2617,9 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                 m_thresh = 0.5
             # retrieve just the probabilities for the positive class
             pos_probs = y_proba[:, rare_class]
-            if verbose >= 1:
+            if verbose >= 1 and not headless:
                 # create a histogram of the predicted probabilities for the Rare Class since it will help decide threshold
+                import matplotlib.pylab as plt
                 plt.figure(figsize=(6, 6))
                 plt.hist(pos_probs, bins=Bins, color='g')
                 plt.title(
@@ -2428,7 +2634,7 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
             predicted[:, 1] = (predicted[:, 1] > m_thresh).astype('int')
             if m_thresh != 0.5:
                 y_pred = predicted[:, rare_class]
-        else:
+        elif cv_proba is None:
             #### This is where you predict for Multi-class classification models #####
             y_pred = model.predict(X_cv)
     else:
@@ -2452,7 +2658,7 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
     if model_label == 'Single_Label':
         if modeltype == 'Regression':
             rmsle_calculated_m = rmse(y_cv, y_pred)
-            print_regression_model_stats(y_cv, y_pred, target, plot_name=model_name)
+            print_regression_model_stats(y_cv, y_pred, target, plot_name=model_name, headless=headless)
         else:
             if model_name == 'Forests':
                 if calibrator_flag:
@@ -2469,18 +2675,18 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
             rmsle_calculated_m = balanced_accuracy_score(y_cv, y_pred)
             if len(classes) == 2:
                 print('    Regular Accuracy Score = %0.1f%%' % (accuracy_score(y_cv, y_pred) * 100))
-                y_probas = model.predict_proba(X_cv)
+                y_probas = y_proba
                 rmsle_calculated_m = print_classification_model_stats(y_cv, y_probas, m_thresh)
             else:
                 ###### Use a nice classification matrix printing module here #########
-                y_probas = model.predict_proba(X_cv)
+                y_probas = y_proba
                 print_classification_metrics(y_cv, y_probas)
                 print(classification_report(y_cv, y_pred))
                 print(confusion_matrix(y_cv, y_pred))
     else:
         if modeltype == 'Regression':
             #### This is for Multi-Label Regression ################################
-            print_regression_model_stats(y_cv, y_pred, target, plot_name=model_name)
+            print_regression_model_stats(y_cv, y_pred, target, plot_name=model_name, headless=headless)
         else:
             #### This is for Multi-Label Classification ################################
             print_classification_metrics(y_cv, y_pred, False)
@@ -2493,13 +2699,15 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
         if modeltype == 'Regression':
             if not Stacking_Flag and X_train.shape[0] <= ensemble_max_rows:
                 print('################# E N S E M B L E  M O D E L  ##################')
+                profiler.start('ensembling', X_train)
                 try:
                     cols = []
                     subm = pd.DataFrame()
                     #### This is for Ensembling  Only #####
                     models_list, cv_ensembles = QuickML_Ensembling(X_train, y_train, X_cv, y_cv,
                                                                    modeltype=modeltype, Boosting_Flag=Boosting_Flag,
-                                                                   scoring='', verbose=verbose)
+                                                                   scoring='', verbose=verbose, headless=headless,
+                                                                   prediction_store=prediction_store)
                     models_list.append(model_name)
                     for models, each in zip(models_list, range(len(models_list))):
                         new_col = each_target + '_' + models + '_predictions'
@@ -2519,17 +2727,21 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                     performed_ensembling = True
                     #### Since we have a new ensembled y_pred, make sure it is an array before printing it!
                     if isinstance(ensem_pred, pd.Series) or isinstance(ensem_pred, pd.DataFrame):
-                        print_regression_model_stats(y_cv, ensem_pred.values, target, plot_name='Ensemble')
+                        print_regression_model_stats(y_cv, ensem_pred.values, target, plot_name='Ensemble',
+                                                     headless=headless)
                     else:
-                        print_regression_model_stats(y_cv, ensem_pred, target, plot_name='Ensemble')
+                        print_regression_model_stats(y_cv, ensem_pred, target, plot_name='Ensemble',
+                                                     headless=headless)
                 except:
                     print('Could not complete Ensembling predictions on held out data due to Error')
+                profiler.stop('ensembling', X_train)
         else:
             ##  This is for Classification Problems Only #
             ### Find what the order of best params are and set the same as the original model ###
             ## This is where we set the best parameters from training to the model ####
             if not Stacking_Flag and X_train.shape[0] <= ensemble_max_rows:
                 print('################# E N S E M B L E  M O D E L  ##################')
+                profiler.start('ensembling', X_train)
                 #### We do Ensembling only if the Stacking_Flag is False. Otherwise, we don't!
                 try:
                     classes = label_dict[each_target]['classes']
@@ -2540,12 +2752,14 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                         models_list, cv_ensembles = QuickML_Ensembling(X_train, y_train, X_cv, y_cv,
                                                                        modeltype='Binary_Classification',
                                                                        Boosting_Flag=Boosting_Flag,
-                                                                       scoring='', verbose=verbose)
+                                                                       scoring='', verbose=verbose, headless=headless,
+                                                                       prediction_store=prediction_store)
                     else:
                         models_list, cv_ensembles = QuickML_Ensembling(X_train, y_train, X_cv, y_cv,
                                                                        modeltype='Multi_Classification',
                                                                        Boosting_Flag=Boosting_Flag,
-                                                                       scoring='', verbose=verbose)
+                                                                       scoring='', verbose=verbose, headless=headless,
+                                                                       prediction_store=prediction_store)
                     models_list.append(model_name)
                     for models, each in zip(models_list, range(len(models_list))):
                         new_col = each_target + '_' + models + '_predictions'
@@ -2568,9 +2782,10 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                         ensem_pred = ensem_pred.values
                 except:
                     print('Could not complete Ensembling predictions on held out data due to Error')
+                profiler.stop('ensembling', X_train)
             else:
                 print('No Ensembling of models done since Stacking_Flag = True ')
-            if verbose >= 1:
+            if verbose >= 1 and not headless:
                 if len(classes) == 2:
                     plot_classification_results(model, X_cv, y_cv, each_target)
                 else:
@@ -2612,7 +2827,7 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                 else:
                     print('Single Model is better than Ensembling Models for this data set.')
                     error_rate.append(rmsle_calculated_m)
-        if verbose >= 1:
+        if verbose >= 1 and not headless:
             if Boosting_Flag:
                 try:
                     if model_name.lower() == 'catboost':
@@ -2679,7 +2894,8 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
             train, num_vars, important_features, test = add_entropy_binning(train, each_target,
                                                                             saved_num_vars, important_features, test,
                                                                             modeltype, entropy_binning=True,
-                                                                            verbose=verbose)
+                                                                            verbose=verbose,
+                                                                            binning_thresholds=pipeline.binning_thresholds)
             #### In saved_num_vars we send in all the continuous_vars but we bin only the top few vars.
             ###  Those that are binned are removed from saved_num_vars and the remaining become num_vars
             ### Our job is to find the names of those original numeric variables which were binned.
@@ -2694,14 +2910,16 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
             #### Perform KMeans Featurizer only if there are numeric variables in data set! #########
             print('Adding one feature named %s using KMeans_Featurizer...' % km_label)
             #### Make the number of clusters as the same as log10 of number of rows in Train
+            pipeline.km_features = copy.deepcopy(important_features)
             if isinstance(test, str):
                 #### In some cases, test data may not be available. In that case, just send in train as test
-                train_cluster, _ = Transform_KM_Features(train[important_features], train[
-                    each_target], train[important_features], num_clusters)
+                train_cluster, _, pipeline.km_featurizer = Transform_KM_Features(train[important_features], train[
+                    each_target], train[important_features], num_clusters, return_featurizer=True)
             else:
                 #### If test data is available, send in test data to get KM clusters for test ###
-                train_cluster, test_cluster = Transform_KM_Features(train[important_features], train[
-                    each_target], test[important_features], num_clusters)
+                train_cluster, test_cluster, pipeline.km_featurizer = Transform_KM_Features(
+                    train[important_features], train[each_target], test[important_features], num_clusters,
+                    return_featurizer=True)
             #### Now make sure that the cat features are either string or integers ######
             print('    Used KMeans to naturally cluster Train predictor variables into %d clusters' % num_clusters)
             train[km_label] = train_cluster
@@ -2714,16 +2932,20 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                     test[imp_cat] = test[imp_cat].astype(int)
             saved_num_vars.append(km_label)  ### You need to add it to this variable list for Scaling later!
             important_features.append(km_label)
+            pipeline.km_label = km_label
+            pipeline.int_cats = copy.deepcopy(imp_cats)
         ########################## STACKING SECOND TIME  ###############################
         ######### This is where you do Stacking of Multi Model Results into One Column ###
         if Stacking_Flag:
+            profiler.start('stacking', train)
             try:
                 #### In order to join, you need X_train to be a Pandas Series here ##
                 print('CAUTION: Stacking can produce Highly Overfit models on Training Data...')
                 ### In order to avoid overfitting, we are going to learn from a small sample of data
                 ### That is why we are using X_cv to train on and using it to predict on X_train!
                 addcol, stacks1 = QuickML_Stacking(train[important_features], train[each_target], '',
-                                                   modeltype, Boosting_Flag, scoring_parameter, verbose)
+                                                   modeltype, Boosting_Flag, scoring_parameter, verbose,
+                                                   n_jobs=n_jobs, prediction_store=prediction_store)
                 ##### Adding multiple columns for Stacking is best! Do not do the average of predictions!
                 #### The reason we add the word "Partial_Train" is to show that these Stacking results are from Partial Train data!
                 addcols = copy.deepcopy(addcol)
@@ -2735,12 +2957,25 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                 if not isinstance(orig_test, str):
                     ### In order to avoid overfitting, we are going to learn from a small sample of data
                     ### That is why we are using X_train to train on and using it to predict on X_test
-                    _, stacks2 = QuickML_Stacking(train[important_features], train[each_target],
-                                                  test[important_features],
-                                                  modeltype, Boosting_Flag, scoring_parameter, verbose)
+                    _, stacks2, stack_estimators = QuickML_Stacking(train[important_features], train[each_target],
+                                                                    test[important_features],
+                                                                    modeltype, Boosting_Flag, scoring_parameter,
+                                                                    verbose, return_estimators=True, n_jobs=n_jobs,
+                                                                    prediction_store=prediction_store)
                     ##### Adding multiple columns for Stacking is best! Do not do the average of predictions!
                     test = test.join(pd.DataFrame(stacks2, index=test.index,
                                                   columns=addcols))
+                elif return_pipeline:
+                    #### Without test data, the stacking model is fitted on train only to score new data later
+                    _, _, stack_estimators = QuickML_Stacking(train[important_features], train[each_target],
+                                                              train[important_features],
+                                                              modeltype, Boosting_Flag, scoring_parameter,
+                                                              verbose, return_estimators=True, n_jobs=n_jobs,
+                                                              prediction_store=prediction_store)
+                if not isinstance(orig_test, str) or return_pipeline:
+                    pipeline.stacking_model = stack_estimators[0][1]
+                    pipeline.stacking_features = copy.deepcopy(important_features)
+                    pipeline.stacking_cols = copy.deepcopy(addcols)
                     ##### Adding multiple columns for Stacking is best! Do not do the average of predictions!
                     # test = test.join(pd.DataFrame(stacks2.mean(axis=1).round().astype(int),
                     #                             columns=[addcol],index=test.index))
@@ -2750,6 +2985,7 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                 saved_num_vars.append(addcol)  ### You need to add it for binning later!
             except:
                 print('Error in Stacking second time. Continuing...')
+            profiler.stop('stacking', train)
     ############################################################################################
     if len(important_features) == 0:
         print('No important features found. Using all input features...')
@@ -2765,6 +3001,14 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
             if model_label != 'Multi_Label':
                 model = xgbm.set_params(**best_params)
         print('    Number of Categorical and Integer variables used in CatBoost training = %d' % len(imp_cats))
+    #### With reuse_fits, the model fitted so far is reused instead of training a new one on full train.
+    ####   It needs the same features with the same values it was fitted on, so the scaler is kept too.
+    reuse_model = False
+    if reuse_fits and model_label == 'Single_Label' and not Imbalanced_Flag:
+        if Stacking_Flag or KMeans_Featurizer or Binning_Flag or list(X_train.columns) != important_features:
+            print('    Features are rebuilt on full train. So the final model is trained again despite reuse_fits')
+        elif calibrated_on_full or (model_name.lower() != 'catboost' and can_continue_training(model)):
+            reuse_model = True
     #### Perform Scaling of Train data a second time using FULL TRAIN data set this time !
     #### important_features keeps track of all variables that we need to ensure they are scaled!
     if not perform_scaling_flag:
@@ -2775,7 +3019,10 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
     else:
         print('Performing %s scaling of train and test data...' % scaling)
         X = train[important_features]
-        SS.fit(X)
+        if reuse_model:
+            print('    Keeping the scaler fitted on partial train since the model fitted with it is reused')
+        else:
+            SS.fit(X)
         X = pd.DataFrame(SS.transform(X), index=orig_train.index,
                          columns=important_features)
         if not isinstance(orig_test, str):
@@ -2795,6 +3042,7 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
     eval_set = [()]
     ##### ############      TRAINING MODEL SECOND TIME WITH FULL_TRAIN AND PREDICTING ON TEST ############
     model_start_time = time.time()
+    profiler.start('final_training', X)
     if model_label == 'Single_Label':
         if Imbalanced_Flag:
             try:
@@ -2804,7 +3052,8 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                 model = training_with_SMOTE(X, y, each_target, eval_set, model,
                                             Boosting_Flag, eval_metric, modeltype, model_name,
                                             training=False, calibrator_flag=calibrator_flag,
-                                            GPU_exists=GPU_exists, model_label=model_label, verbose=verbose)
+                                            GPU_exists=GPU_exists, model_label=model_label, verbose=verbose,
+                                            headless=headless, n_jobs=n_jobs)
             except:
                 print('Error in training Imbalanced model second time. Trying regular model..')
                 Imbalanced_Flag = False
@@ -2816,7 +3065,16 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
         ## This is where we test if the previous training with SMOTE went smoothly. If not, we  try with a different method here.
         #### If downsampling model failed, it will just be an empty string, so you can try regular model ###
         if model_label == 'Single_Label':
-            if calibrator_flag:
+            if reuse_model and calibrated_on_full:
+                print('    Using the calibrated folds (already fitted on all train rows) as the final model')
+            elif reuse_model:
+                try:
+                    model = continue_training(copy.deepcopy(model), X, y, X_cv.shape[0] / X.shape[0])
+                    print('    Continued training the best model on full train instead of fitting a new one')
+                except Exception as e:
+                    print('    Could not continue training the model due to %s. Training a new one...' % e)
+                    model.fit(X, y)
+            elif calibrator_flag:
                 model.fit(X, y)
             else:
                 if Boosting_Flag:
@@ -2832,7 +3090,23 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
         ### This is for Multi-Label Training #########
         model.fit(X, y)
     print('     Actual Training time taken in seconds = %0.0f' % (time.time() - model_start_time))
+    profiler.stop('final_training', X)
     print('Training of models completed. Now starting predictions on test data...')
+    if verbose >= 1 and prediction_store.hits > 0:
+        print('    %d predictions or fitted models were reused from the prediction store' % prediction_store.hits)
+    pipeline.features = copy.deepcopy(important_features)
+    if perform_scaling_flag:
+        pipeline.scaler = SS
+    pipeline.model = model
+    pipeline.model_name = model_name
+    pipeline.set_label_dict(label_dict)
+    pipeline.modify_targets_flag = modify_targets_flag
+    pipeline.targets_negative_flag = targets_negative_flag
+    if modeltype != 'Regression':
+        pipeline.rare_class = rare_class
+    if model_label == 'Single_Label' and modeltype != 'Regression':
+        pipeline.m_thresh = m_thresh
+    pipeline.fitted = True
     #### new_cols is to keep track of new prediction columns we are creating #####
     new_cols = []
     if not isinstance(orig_test, str):
@@ -2866,6 +3140,8 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
             erroring_column = X_train.columns[~(X_train.dtypes == X_test.dtypes).values][0]
             print(
                 'Model erroring since %s has a different dtype in test compared to train. Fix it and re-run.' % erroring_column)
+            if return_pipeline:
+                return model, important_features, trainm, testm, pipeline
             return model, important_features, trainm, testm
     ##### This next step is very important since some models give series, others give arrays. Very painful!
     if isinstance(y_pred, pd.Series) or isinstance(y_pred, pd.DataFrame):
@@ -2882,9 +3158,12 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                 subm = pd.DataFrame()
                 #### This is for Ensembling  Only #####
                 #### In Test data verbose is set to zero since no results can be obtained!
+                profiler.start('ensembling', X)
                 models_list, ensembles = QuickML_Ensembling(X, y, X_test, '',
                                                             modeltype=modeltype, Boosting_Flag=Boosting_Flag,
-                                                            scoring='', verbose=0)
+                                                            scoring='', verbose=0, headless=headless,
+                                                            prediction_store=prediction_store)
+                profiler.stop('ensembling', X)
                 models_list.append(model_name)
                 for models, each in zip(models_list, range(len(models_list))):
                     new_col = each_target + '_' + models + '_predictions'
@@ -2913,9 +3192,12 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
             except:
                 print('Could not complete Ensembling predictions on held out data due to Error')
         elif Stacking_Flag and not model_label == 'Multi_Label':
+            profiler.start('stacking', X)
             stack_cols, stacksfinal = QuickML_Stacking(X, y, X_test,
                                                        modeltype, Boosting_Flag,
-                                                       scoring_parameter, verbose=verbose)
+                                                       scoring_parameter, verbose=verbose, n_jobs=n_jobs,
+                                                       prediction_store=prediction_store)
+            profiler.stop('stacking', X)
             new_col = each_target + '_Stacked_' + stack_cols[0].split("_")[0] + '_predictions'
             if len(stack_cols) == 1:
                 testm[new_col] = stacksfinal
@@ -2991,16 +3273,20 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                     subm = pd.DataFrame()
                     #### This is for Ensembling  Only #####
                     #### In Test data verbose is set to zero since no results can be obtained!
+                    profiler.start('ensembling', X)
                     if len(classes) == 2:
                         models_list, ensembles = QuickML_Ensembling(X, y, X_test, '',
                                                                     modeltype='Binary_Classification',
                                                                     Boosting_Flag=Boosting_Flag,
-                                                                    scoring='', verbose=0)
+                                                                    scoring='', verbose=0, headless=headless,
+                                                                    prediction_store=prediction_store)
                     else:
                         models_list, ensembles = QuickML_Ensembling(X, y, X_test, '',
                                                                     modeltype='Multi_Classification',
                                                                     Boosting_Flag=Boosting_Flag,
-                                                                    scoring='', verbose=0)
+                                                                    scoring='', verbose=0, headless=headless,
+                                                                    prediction_store=prediction_store)
+                    profiler.stop('ensembling', X)
                     models_list.append(model_name)
                     for models, each in zip(models_list, range(len(models_list))):
                         new_col = each_target + '_' + models + '_predictions'
@@ -3021,8 +3307,11 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                         print('    Calculating average ensemble of %d classifiers' % len(new_cols))
                         ensem_pred = (subm[new_cols].mean(axis=1)).astype(int)
                 elif Stacking_Flag and model_label == 'Single_Label':
+                    profiler.start('stacking', X)
                     stack_cols, stacksfinal = QuickML_Stacking(X, y, X_test,
-                                                               modeltype, Boosting_Flag, scoring_parameter, verbose)
+                                                               modeltype, Boosting_Flag, scoring_parameter, verbose,
+                                                               n_jobs=n_jobs, prediction_store=prediction_store)
+                    profiler.stop('stacking', X)
                     new_col = each_target + '_Stacked_' + stack_cols[0].split("_")[0] + '_predictions'
                     ensem_pred = np.argmax(stacksfinal, axis=1)
                 if model_label == 'Single_Label':
@@ -3065,16 +3354,20 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                 if not Stacking_Flag:
                     subm = pd.DataFrame()
                     #### This is for Ensembling  Only #####
+                    profiler.start('ensembling', X)
                     if len(classes) == 2:
                         models_list, ensembles = QuickML_Ensembling(X, y, X_test, '',
                                                                     modeltype='Binary_Classification',
                                                                     Boosting_Flag=Boosting_Flag,
-                                                                    scoring='', verbose=verbose)
+                                                                    scoring='', verbose=verbose, headless=headless,
+                                                                    prediction_store=prediction_store)
                     else:
                         models_list, ensembles = QuickML_Ensembling(X, y, X_test, '',
                                                                     modeltype='Multi_Classification',
                                                                     Boosting_Flag=Boosting_Flag,
-                                                                    scoring='', verbose=verbose)
+                                                                    scoring='', verbose=verbose, headless=headless,
+                                                                    prediction_store=prediction_store)
+                    profiler.stop('ensembling', X)
                     models_list.append(model_name)
                     for models, each in zip(models_list, range(len(models_list))):
                         new_col = each_target + '_' + models + '_predictions'
@@ -3100,8 +3393,11 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                     print('Completed Ensemble predictions on held out data')
                     new_col = each_target + '_Ensembled_predictions'
                 else:
+                    profiler.start('stacking', X)
                     stack_cols, stacksfinal = QuickML_Stacking(X, y, X_test,
-                                                               modeltype, Boosting_Flag, scoring_parameter, verbose)
+                                                               modeltype, Boosting_Flag, scoring_parameter, verbose,
+                                                               n_jobs=n_jobs, prediction_store=prediction_store)
+                    profiler.stop('stacking', X)
                     new_col = each_target + '_Stacked_' + stack_cols[0].split("_")[0] + '_predictions'
                     ensem_pred = np.argmax(stacksfinal, axis=1)
                     print('########################################################')
@@ -3124,6 +3420,9 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                 # Perform action for scikit-learn version 0.24.2 and above
                 # Add your code here for scikit-learn version 0.24.2 and above
                 plot_model = model.estimator
+        elif headless:
+            #### The model is only read below to find feature importances. So no copy is needed.
+            plot_model = model
         else:
             plot_model = copy.deepcopy(model)
         try:
@@ -3144,7 +3443,8 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
             else:
                 if model_name.lower() == 'xgboost':
                     #####  SHAP requires this step: XGBoost models must have been "predicted"
-                    _ = plot_model.predict(X_test)
+                    if not headless:
+                        _ = plot_model.predict(X_test)
                     ### It is possible that in some cases, XGBoost has fewer features than what was sent in.
                     ### In those cases, we need to identify and know which features in XGBoost are in and which are out
                     #### In that case, we need to find those features and then do a feature importance
@@ -3186,17 +3486,22 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
             height_size = 5
             width_size = 10
             color_string = list('byrcmgkbyrcmgkbyrcmgkbyrcmgk')[:15]
-            print('    Plotting Feature Importances to explain the output of model')
+            if not headless:
+                print('    Plotting Feature Importances to explain the output of model')
         except:
             print('Could not draw feature importance plot due to an error')
         ###########   D R A W  SHAP  VALUES USING TREE BASED MODELS. THE REST WILL NOT GET SHAP ############
-        if verbose >= 2:
+        #### SHAP values are computed only to draw them. So headless mode skips them altogether.
+        if verbose >= 2 and not headless:
             print('Trying to plot SHAP values if SHAP is installed in this machine...')
+            profiler.start('SHAP', X_cv[:1000])
             X_plot = X_cv[:1000]
             y_plot = y_cv[:1000]
             try:
+                import matplotlib.pylab as plt
                 if model_name.lower() == 'catboost':
                     if verbose > 0:
+                        import shap
                         shap.initjs()
                         try:
                             shap_values = plot_model.get_feature_importance(Pool(X_plot, label=y_plot,
@@ -3259,6 +3564,7 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
                 print('Could not plot SHAP values since SHAP is not installed or could not import SHAP in this machine')
                 imp_features_df[:15].plot(kind='barh', title='Feature Importances for predicting %s' % each_target,
                                           figsize=(width_size, height_size), color=color_string)
+            profiler.stop('SHAP')
     else:
         ############ No Plotting feature importances for Multi-Label problems ##############
         print('    No feature importance plots available for Multi-Label problems')
@@ -3266,13 +3572,15 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
     print('    Time taken thus far (in seconds) = %0.0f' % (time.time() - start_time))
     ##  Write the test and submission files to disk ###
     print('Writing Output files to disk...')
+    profiler.start('file_writes', testm)
     #############################################################################################
     if not isinstance(testm, str):
         try:
             write_file_to_folder(testm, each_target, each_target + '_' + modeltype + '_' + 'test_modified.csv')
             #####   D R A W   K D E  P L O T S   FOR PROBABILITY OF PREDICTIONS - very useful! #########
             if modeltype != 'Regression':
-                if verbose >= 2:
+                if verbose >= 2 and not headless:
+                    import matplotlib.pylab as plt
                     testm[proba_cols].plot(kind='kde', figsize=(10, 6),
                                            title='Predictive Probability Density Chart with suggested threshold in red')
                     plt.axvline(x=m_thresh, color='r', linestyle='--')
@@ -3305,6 +3613,7 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
         write_file_to_folder(trainm, each_target, each_target + '_' + modeltype + '_' + 'train_modified.csv')
     except:
         print('    Error: Not able to save train modified file. Skipping...')
+    profiler.stop('file_writes')
     ### In case of multi-label models, we will reset the start train and test dataframes to contain new features created
     if not isinstance(orig_test, str):
         pass
@@ -3331,7 +3640,19 @@ def Auto_ViML(train, target, test='', sample_submission='', hyper_param='RS', fe
         ##   END OF SHOWING METRICS LABEL IN A MULTI LABEL DATA SET ! WHEW ! ###################
     print('###############  C O M P L E T E D  ################')
     print('Time Taken in mins = %0.1f for the Entire Process' % ((time.time() - start_time) / 60))
+    peak_memory = get_peak_memory_usage()
+    if peak_memory > 0:
+        print('Peak Memory (RSS) used by this process = %s' % get_size(peak_memory))
+    profiler.stop_all()
+    if verbose >= 1:
+        profiler.print_report()
+    pipeline.profile = profiler.report()
     # return model, imp_features_df.index.tolist(), trainm, testm
+    if return_pipeline:
+        if model_label == 'Single_Label' and modeltype != 'Regression':
+            ### The threshold may have been reset to 0.5 while predicting on test data
+            pipeline.m_thresh = m_thresh
+        return model, important_features, trainm, testm, pipeline
     return model, important_features, trainm, testm
 
 
@@ -3359,13 +3680,21 @@ def plot_SHAP_values(m, X, modeltype, Boosting_Flag=False, matplotlib_flag=False
 ################      Find top features using XGB     ###################
 ################################################################################
 
-def find_top_features_xgb(train, preds, numvars, target, modeltype):
+def find_top_features_xgb(train, preds, numvars, target, modeltype, row_sampling=False, selection_mode='windows'):
     """
     This is a fast utility that uses XGB to find top features. You
     It returns a list of important features.
     Since it is XGB, you dont have to restrict the input to just numeric vars.
     You can send in all kinds of vars and it will take care of transforming it. Sweet!
+    If row_sampling is True and the data is large, features are found on growing samples of rows
+    until the important features stop changing. See autoviml.row_sampling for details.
+    selection_mode: 'windows' (default) refits XGB on shrinking windows of columns. 'quantized' runs
+    the same rounds on data put in quantile bins once. 'single' uses one fit with gain and permutation
+    ranking. 'rfe' drops the weakest features step by step from one warm started booster.
+    See autoviml.xgb_selection for details.
     """
+    check_selection_mode(selection_mode)
+    from xgboost import XGBClassifier, XGBRegressor
     ######################   I M P O R T A N T ##############################################
     ###### This top_num decides how many top_n features XGB selects in each iteration.
     ####  There a total of 5 iterations. Hence 5x10 means maximum 50 featues will be selected.
@@ -3380,12 +3709,12 @@ def find_top_features_xgb(train, preds, numvars, target, modeltype):
     n_splits = 5
     max_depth = 8
     ######################   I M P O R T A N T ##############################################
-    train = copy.deepcopy(train)
     preds = copy.deepcopy(preds)
     numvars = copy.deepcopy(numvars)
     subsample = 0.7
     col_sub_sample = 0.7
-    train = copy.deepcopy(train)
+    #### Only the predictors and target are used (and modified) here. So copy only those columns.
+    train = train[preds + [target]].copy()
     test_size = 0.2
     seed = 1
     early_stopping = 5
@@ -3453,7 +3782,6 @@ def find_top_features_xgb(train, preds, numvars, target, modeltype):
                                       seed=1)
             eval_metric = 'mlogloss'
     ####   This is where you start to Iterate on Finding Important Features ################
-    save_xgb = copy.deepcopy(model_xgb)
     train_p = train[preds]
     if train_p.shape[1] < 10:
         iter_limit = 2
@@ -3462,57 +3790,25 @@ def find_top_features_xgb(train, preds, numvars, target, modeltype):
     print('Current number of predictors = %d ' % (train_p.shape[1],))
     print('    Finding Important Features using Boosted Trees algorithm...')
     try:
-        for i in range(0, train_p.shape[1], iter_limit):
-            new_xgb = copy.deepcopy(save_xgb)
-            if train_p.shape[1] - i < 2:
-                ### If there is just one variable left, then just skip it #####
-                continue
-            else:
-                print('        using %d variables...' % (train_p.shape[1] - i))
-
-            if train_p.shape[1] - i < iter_limit:
-                X = train_p.iloc[:, i:]
-                if modeltype == 'Regression':
-                    train_part = int((1 - test_size) * X.shape[0])
-                    X_train, X_cv, y_train, y_cv = X[:train_part], X[train_part:], y[:train_part], y[train_part:]
-                else:
-                    X_train, X_cv, y_train, y_cv = train_test_split(X, y,
-                                                                    test_size=test_size, random_state=seed, stratify=y)
-                try:
-                    eval_set = [(X_train, y_train), (X_cv, y_cv)]
-                    model_xgb.fit(X_train, y_train, early_stopping_rounds=early_stopping, eval_set=eval_set,
-                                  eval_metric=eval_metric, verbose=False)
-                    important_features += pd.Series(model_xgb.get_booster().get_score(
-                        importance_type='gain')).sort_values(ascending=False)[:top_num].index.tolist()
-                except:
-                    new_xgb.fit(X_train, y_train, early_stopping_rounds=early_stopping, eval_set=eval_set,
-                                eval_metric=eval_metric, verbose=False)
-                    print(
-                        'XGB has a bug in version xgboost 1.02 for feature importances. Try to install version 0.90 or 1.10 - continuing...')
-                    important_features += pd.Series(new_xgb.get_booster().get_score(
-                        importance_type='gain')).sort_values(ascending=False)[:top_num].index.tolist()
-                important_features = list(OrderedDict.fromkeys(important_features))
-            else:
-                X = train_p[list(train_p.columns.values)[i:train_p.shape[1]]]
-                #### Split here into train and test #####
-                if modeltype == 'Regression':
-                    train_part = int((1 - test_size) * X.shape[0])
-                    X_train, X_cv, y_train, y_cv = X[:train_part], X[train_part:], y[:train_part], y[train_part:]
-                else:
-                    X_train, X_cv, y_train, y_cv = train_test_split(X, y,
-                                                                    test_size=test_size, random_state=seed, stratify=y)
-                eval_set = [(X_train, y_train), (X_cv, y_cv)]
-                try:
-                    model_xgb.fit(X_train, y_train, early_stopping_rounds=early_stopping,
-                                  eval_set=eval_set, eval_metric=eval_metric, verbose=False)
-                    important_features += pd.Series(model_xgb.get_booster().get_score(
-                        importance_type='gain')).sort_values(ascending=False)[:top_num].index.tolist()
-                except:
-                    new_xgb.fit(X_train, y_train, early_stopping_rounds=early_stopping,
-                                eval_set=eval_set, eval_metric=eval_metric, verbose=False)
-                    important_features += pd.Series(model_xgb.get_booster().get_score(
-                        importance_type='gain')).sort_values(ascending=False)[:top_num].index.tolist()
-                important_features = list(OrderedDict.fromkeys(important_features))
+        if selection_mode != 'windows':
+            #### Columns are put in quantile bins once. Every round and sample of rows reuses them.
+            selector = XGBFeatureSelector(model_xgb, modeltype, selection_mode, top_num, iter_limit, eval_metric,
+                                          test_size, seed, early_stopping).fit(train_p)
+        if use_row_sampling(train_p.shape[0], row_sampling):
+            #### Feature rankings settle on a part of the rows. So grow a sample until selection is stable
+            def select_on_rows(rows):
+                if selection_mode != 'windows':
+                    return selector.select(y.iloc[rows], rows)
+                return select_features_using_xgb(train_p.iloc[rows], y.iloc[rows], model_xgb, modeltype,
+                                                 iter_limit, top_num, eval_metric, test_size, seed, early_stopping)
+            sampler = RowSampler(y, modeltype)
+            important_features, _ = find_stable_selection(select_on_rows, sampler, train_p.shape[1], verbose=1)
+        elif selection_mode != 'windows':
+            important_features = list(selector.select(y))
+        else:
+            important_features = list(select_features_using_xgb(train_p, y, model_xgb, modeltype, iter_limit,
+                                                                top_num, eval_metric, test_size, seed,
+                                                                early_stopping))
     except:
         print('Finding top features using XGB is crashing. Continuing with all predictors...')
         important_features = copy.deepcopy(preds)
@@ -3525,6 +3821,77 @@ def find_top_features_xgb(train, preds, numvars, target, modeltype):
     return important_features, numvars, important_cats
 
 
+################################################################################
+def select_features_using_xgb(train_p, y, model_xgb, modeltype, iter_limit, top_num, eval_metric,
+                              test_size=0.2, seed=1, early_stopping=5):
+    """
+    Fits XGB on a shrinking window of the predictors in train_p (iter_limit fewer each time) and
+    collects the top_num features by gain in each fit. Returns an OrderedDict of important features
+    (in the order found) to their largest gain in any fit.
+    """
+    save_xgb = copy.deepcopy(model_xgb)
+    model_xgb = copy.deepcopy(model_xgb)
+    important_features = OrderedDict()
+    for i in range(0, train_p.shape[1], iter_limit):
+        new_xgb = copy.deepcopy(save_xgb)
+        if train_p.shape[1] - i < 2:
+            ### If there is just one variable left, then just skip it #####
+            continue
+        else:
+            print('        using %d variables...' % (train_p.shape[1] - i))
+
+        if train_p.shape[1] - i < iter_limit:
+            X = train_p.iloc[:, i:]
+            if modeltype == 'Regression':
+                train_part = int((1 - test_size) * X.shape[0])
+                X_train, X_cv, y_train, y_cv = X[:train_part], X[train_part:], y[:train_part], y[train_part:]
+            else:
+                X_train, X_cv, y_train, y_cv = train_test_split(X, y, test_size=test_size, random_state=seed,
+                                                                stratify=find_stratify_labels(y))
+            try:
+                eval_set = [(X_train, y_train), (X_cv, y_cv)]
+                model_xgb.fit(X_train, y_train, early_stopping_rounds=early_stopping, eval_set=eval_set,
+                              eval_metric=eval_metric, verbose=False)
+                merge_top_gains(important_features, model_xgb.get_booster(), top_num)
+            except:
+                new_xgb.fit(X_train, y_train, early_stopping_rounds=early_stopping, eval_set=eval_set,
+                            eval_metric=eval_metric, verbose=False)
+                print(
+                    'XGB has a bug in version xgboost 1.02 for feature importances. Try to install version 0.90 or 1.10 - continuing...')
+                merge_top_gains(important_features, new_xgb.get_booster(), top_num)
+        else:
+            X = train_p[list(train_p.columns.values)[i:train_p.shape[1]]]
+            #### Split here into train and test #####
+            if modeltype == 'Regression':
+                train_part = int((1 - test_size) * X.shape[0])
+                X_train, X_cv, y_train, y_cv = X[:train_part], X[train_part:], y[:train_part], y[train_part:]
+            else:
+                X_train, X_cv, y_train, y_cv = train_test_split(X, y, test_size=test_size, random_state=seed,
+                                                                stratify=find_stratify_labels(y))
+            eval_set = [(X_train, y_train), (X_cv, y_cv)]
+            try:
+                model_xgb.fit(X_train, y_train, early_stopping_rounds=early_stopping,
+                              eval_set=eval_set, eval_metric=eval_metric, verbose=False)
+                merge_top_gains(important_features, model_xgb.get_booster(), top_num)
+            except:
+                new_xgb.fit(X_train, y_train, early_stopping_rounds=early_stopping,
+                            eval_set=eval_set, eval_metric=eval_metric, verbose=False)
+                merge_top_gains(important_features, new_xgb.get_booster(), top_num)
+    return important_features
+
+
+################################################################################
+def merge_top_gains(gains, booster, top_num):
+    """
+    Adds the top_num features of a fitted XGB booster by gain to gains (an OrderedDict).
+    A feature found in many fits keeps its largest gain.
+    """
+    top_features = pd.Series(booster.get_score(importance_type='gain')).sort_values(ascending=False)[:top_num]
+    for feature, gain in top_features.items():
+        gains[feature] = max(gains.get(feature, 0), gain)
+    return gains
+
+
 ################################################################################
 def basket_recall(label, pred):
     """
@@ -3620,6 +3987,7 @@ def plot_RS_params(cv_results, score, mname):
     """
     ####### This plots the GridSearchCV Results sent in ############
     """
+    import matplotlib.pylab as plt
     df = pd.DataFrame(cv_results)
     params = [x for x in list(df) if x.startswith('param_')]
     traincols = ['mean_train_score']
@@ -3674,6 +4042,7 @@ def plot_RS_params(cv_results, score, mname):
 
 ################################################################################
 def plot_xgb_metrics(model, model_label='', model_name=""):
+    import matplotlib.pylab as plt
     height_size = 5
     width_size = 10
     if model_name.lower() == 'catboost':
@@ -3832,7 +4201,7 @@ def return_dictionary_list(lst_of_tuples):
 
 ##################################################################################
 def remove_variables_using_fast_correlation(df, numvars, modeltype, target,
-                                            corr_limit=0.70):
+                                            corr_limit=0.70, mi_scorer=None, corr_method='pearson', n_jobs=1):
     """
     ##################################################################################
     #### THIS METHOD IS KNOWN AS THE SULOV METHOD in HONOR OF my mother ##############
@@ -3853,108 +4222,57 @@ def remove_variables_using_fast_correlation(df, numvars, modeltype, target,
      keep, we knock out all others that were highly correlated to it. This way we knock
      out correlated variables in each round. In the end, SULOV gives us a list of least
      correlated variables that have the best mutual information score in your data set!
+     mi_scorer: None uses sklearn's mutual info functions. Use 'histogram' for a much faster
+     scorer on large data. See autoviml.mutual_info for details.
+     corr_method: 'pearson' (default) or 'spearman'.
+     n_jobs: number of processes that score blocks of features when mi_scorer is 'histogram'.
+     This uses the same engine as FE_remove_variables_using_SULOV_method: see prune_correlated_vars.
     ##################################################################################
     """
-    df = copy.deepcopy(df)
     print('Removing highly correlated variables using SULOV method among (%d) numeric variables' % len(numvars))
-    correlation_dataframe = df[numvars].corr().astype(np.float16)
-    a = correlation_dataframe.values
-    col_index = correlation_dataframe.columns.tolist()
-    index_triupper = list(zip(np.triu_indices_from(a, k=1)[0], np.triu_indices_from(a, k=1)[1]))
-    high_corr_index_list = [x for x in np.argwhere(abs(a[np.triu_indices(len(a), k=1)]) >= corr_limit)]
-    tuple_list = [y for y in [index_triupper[x[0]] for x in high_corr_index_list]]
-    correlated_pair = [(col_index[tup[0]], col_index[tup[1]]) for tup in tuple_list]
-    corr_pair_dict = dict(return_dictionary_list(correlated_pair))
-    keys_in_dict = list(corr_pair_dict.keys())
-    reverse_correlated_pair = [(y, x) for (x, y) in correlated_pair]
-    reverse_corr_pair_dict = dict(return_dictionary_list(reverse_correlated_pair))
-    for key, val in reverse_corr_pair_dict.items():
-        if key in keys_in_dict:
-            if len(key) > 1:
-                corr_pair_dict[key] += val
-        else:
-            corr_pair_dict[key] = val
-    flat_corr_pair_list = [item for sublist in correlated_pair for item in sublist]
-    #### You can make it a dictionary or a tuple of lists. We have chosen the latter here to keep order intact.
-    corr_pair_count_dict = count_freq_in_list(flat_corr_pair_list)
-    corr_list = [k for (k, v) in corr_pair_count_dict]
+    result = prune_correlated_vars(df, numvars, modeltype, target, corr_limit, mi_scorer=mi_scorer,
+                                   corr_method=corr_method, n_jobs=n_jobs)
+    final_list, removed_cols = result['selected'], result['removed']
     ###### This is for ordering the variables in the highest to lowest importance to target ###
-    if len(corr_list) == 0:
-        final_list = list(correlation_dataframe)
+    if len(result['graph']) == 0:
         print('    No numeric vars removed since none have high correlation with each other in this data...')
-    else:
-        max_feats = len(corr_list)
-        if modeltype == 'Regression':
-            sel_function = mutual_info_regression
-            fs = SelectKBest(score_func=sel_function, k=max_feats)
-        else:
-            sel_function = mutual_info_classif
-            fs = SelectKBest(score_func=sel_function, k=max_feats)
-        fs.fit(df[corr_list].astype(np.float16), df[target])
-        mutual_info = dict(zip(corr_list, fs.scores_))
-        #### The first variable in list has the highest correlation to the target variable ###
-        sorted_by_mutual_info = [key for (key, val) in sorted(mutual_info.items(), key=lambda kv: kv[1], reverse=True)]
-        #####   Now we select the final list of correlated variables ###########
-        selected_corr_list = []
-        #### select each variable by the highest mutual info and see what vars are correlated to it
-        for each_corr_name in sorted_by_mutual_info:
-            ### add the selected var to the selected_corr_list
-            selected_corr_list.append(each_corr_name)
-            for each_remove in corr_pair_dict[each_corr_name]:
-                #### Now remove each variable that is highly correlated to the selected variable
-                if each_remove in sorted_by_mutual_info:
-                    sorted_by_mutual_info.remove(each_remove)
-        ##### Now we combine the uncorrelated list to the selected correlated list above
-        rem_col_list = left_subtract(list(correlation_dataframe), corr_list)
-        final_list = rem_col_list + selected_corr_list
-        removed_cols = left_subtract(numvars, final_list)
-        if len(removed_cols) > 0:
-            print('    Removing (%d) highly correlated variables:' % (len(removed_cols)))
-            if len(removed_cols) <= 30:
-                print('    %s' % removed_cols)
-            if len(final_list) <= 30:
-                print('    Following (%d) vars selected: %s' % (len(final_list), final_list))
+    elif len(removed_cols) > 0:
+        print('    Removing (%d) highly correlated variables:' % (len(removed_cols)))
+        if len(removed_cols) <= 30:
+            print('    %s' % removed_cols)
+        if len(final_list) <= 30:
+            print('    Following (%d) vars selected: %s' % (len(final_list), final_list))
     return final_list
 
 
 ###############################################################################################
 def count_freq_in_list(lst):
     """
-    This counts the frequency of items in a list but MAINTAINS the order of appearance of items.
-    This order is very important when you are doing certain functions. Hence this function!
+    This counts the frequency of items in a list and returns (item, count) tuples in sorted order of items.
     """
-    temp = np.unique(lst)
-    result = []
-    for i in temp:
-        result.append((i, lst.count(i)))
-    return result
+    return sorted(Counter(lst).items())
 
 
 def find_corr_vars(correlation_dataframe, corr_limit=0.70):
     """
     This returns a dictionary of counts of each variable and how many vars it is correlated to in the dataframe
+    Pairs are found a block of rows at a time from the correlation matrix. See autoviml.correlation.
     """
-    flatten = lambda l: [item for sublist in l for item in sublist]
-    flatten_items = lambda dic: [x for x in dic.items()]
-    a = correlation_dataframe.values
-    col_index = correlation_dataframe.columns.tolist()
-    index_triupper = list(zip(np.triu_indices_from(a, k=1)[0], np.triu_indices_from(a, k=1)[1]))
-    high_corr_index_list = [x for x in np.argwhere(abs(a[np.triu_indices(len(a), k=1)]) >= corr_limit)]
-    tuple_list = [y for y in [index_triupper[x[0]] for x in high_corr_index_list]]
-    correlated_pair = [(col_index[tup[0]], col_index[tup[1]]) for tup in tuple_list]
+    correlated_pair = []
+    for var1, var2, coeff in iter_matrix_pairs(correlation_dataframe, corr_limit):
+        correlated_pair += list(zip(var1, var2))
     correlated_pair_dict = dict(correlated_pair)
     flat_corr_pair_list = [item for sublist in correlated_pair for item in sublist]
     #### You can make it a dictionary or a tuple of lists. We have chosen the latter here to keep order intact.
-    # corr_pair_count_dict = Counter(flat_corr_pair_list)
     corr_pair_count_dict = count_freq_in_list(flat_corr_pair_list)
-    corr_list = list(set(flatten(flatten_items(correlated_pair_dict))))
+    corr_list = list(set(correlated_pair_dict) | set(correlated_pair_dict.values()))
     rem_col_list = left_subtract(list(correlation_dataframe), list(OrderedDict.fromkeys(flat_corr_pair_list)))
     return corr_pair_count_dict, rem_col_list, corr_list, correlated_pair_dict
 
 
 ################################################################################
 def add_poly_vars_select(data, numvars, targetvar, modeltype, poly_degree=2, Add_Poly=2, md='',
-                         scaling=True, fit_flag=False, verbose=0):
+                         scaling=True, fit_flag=False, verbose=0, headless=False):
     """
     #### This adds Polynomial and Interaction Variables of any Size to a data set and returns the best vars
     among those poly and interaction variables. Notice you will get a list of variables as well as the modified
@@ -3964,7 +4282,7 @@ def add_poly_vars_select(data, numvars, targetvar, modeltype, poly_degree=2, Add
     If Fit_Flag=True, then it is assumed that it is Training data and hence variables are selected
     If Fit_Flag=False, then it is assumed it is Test data and no variables are chosen but we keep training ones.
     """
-    data = copy.deepcopy(data)
+    #### data is only read here and never modified. So there is no need to copy it.
     numvars = copy.deepcopy(numvars)
     tolerance = 0.01
     orig_data_index = data.index
@@ -4140,7 +4458,10 @@ def add_poly_vars_select(data, numvars, targetvar, modeltype, poly_degree=2, Add
             print('Zero Interaction and Polynomial variable(s) selected...')
         else:
             #### there is some coefficients at least that are non-zero and hence can be trusted!
-            if verbose >= 1:
+            if headless:
+                #### No charts are drawn in headless mode
+                pass
+            elif verbose >= 1:
                 df90.sort_values('Coefficient Values', ascending=False)[:10].plot(
                     kind='bar', x='Interaction Variable Names', y='Coefficient Values',
                     title='Top 10% Variable Interactions and their Coefficients ')
@@ -4247,6 +4568,7 @@ def select_best_variables(df, names, verbose=0):
 
 ##############################################################################################
 def Draw_ROC_MC_ML(model, X_test, y_true, target, model_name):
+    import matplotlib.pylab as plt
     figsize = (10, 6)
     y_proba = model.predict_proba(X_test)
     predicted = copy.deepcopy(y_proba)
@@ -4590,7 +4912,8 @@ def create_ts_features(df, tscol):
     It then creates time series features using the pandas .dt.weekday kind of syntax.
     It also returns the data frame of added features with each variable as an integer variable.
     """
-    df = copy.deepcopy(df)
+    #### Only the date column is needed to create new features. So copy only that column.
+    df = df[[tscol]].copy()
     dt_adds = []
     try:
         df[tscol + '_hour'] = df[tscol].dt.hour.fillna(0).astype(int)
@@ -4691,9 +5014,10 @@ def create_time_series_features(dtf, ts_column):
     This creates between 8 and 10 date time features for each date variable. The number of features
     depends on whether it is just a year variable or a year+month+day and whether it has hours and mins+secs.
     So this can create all these features using just the date time column that you send in.
-    It returns the entire dataframe with added variables as output.
+    It returns a dataframe with the added variables as output.
     """
-    dtf = copy.deepcopy(dtf)
+    #### Only the date column is needed to create new features. So copy only that column.
+    dtf = dtf[[ts_column]].copy()
     #### If for some reason ts_column is just a number, make sure it is a string so it does not blow up and concatenated
     if not isinstance(ts_column, str):
         ts_column = str(ts_column)
@@ -4737,7 +5061,7 @@ def training_with_SMOTE(X_df, y_df, target, eval_set, model_input, Boosting_Flag
                         params: dict, modeltype, model_name, training=True,
                         calibrator_flag=False,
                         GPU_exists=False,
-                        model_label='Single_Label', verbose=0):
+                        model_label='Single_Label', verbose=0, headless=False, n_jobs=-1):
     """
     #########    OVERSAMPLING OF MINORITY CLASS AND TRAINING  SIZES  ###############
     ####  SMOTE (Synthetic Minority Oversampling Technique) works well with imbalanced classes.
@@ -4747,6 +5071,8 @@ def training_with_SMOTE(X_df, y_df, target, eval_set, model_input, Boosting_Flag
     ####  to cluster labels using KMeans. You can then use the cluster labels to add more samples.
     #########    MAKE SURE YOU TUNE THE DEFAULTS GIVEN HERE!  ###############
     """
+    from imblearn.over_sampling import SMOTE, SMOTENC
+    from imbalanced_ensemble.ensemble import SelfPacedEnsembleClassifier
     X_df = copy.deepcopy(X_df)
     y_df = copy.deepcopy(y_df)
     model_copy = copy.deepcopy(model_input)
@@ -4805,10 +5131,10 @@ def training_with_SMOTE(X_df, y_df, target, eval_set, model_input, Boosting_Flag
             # Your favourite oversampler = SMOTENC is better than SMOTE in most cases!
             smote = SMOTENC(categorical_features=cat_vars_index,
                             sampling_strategy=class_weighted_rows,
-                            random_state=42, k_neighbors=smallest_kn, n_jobs=-1)
+                            random_state=42, k_neighbors=smallest_kn, n_jobs=n_jobs)
         else:
             # Your favourite oversampler = SMOTE is better than SMOTEENN in most cases!
-            smote = SMOTE(random_state=27, sampling_strategy=class_weighted_rows, n_jobs=-1)
+            smote = SMOTE(random_state=27, sampling_strategy=class_weighted_rows, n_jobs=n_jobs)
     ########################    Regression Resampler    #########################
     try:
         if modeltype == 'Regression':
@@ -4820,12 +5146,14 @@ def training_with_SMOTE(X_df, y_df, target, eval_set, model_input, Boosting_Flag
             #### For classification problems simply using the original data will do
             # X_df_res, y_df_res = smote.fit_resample(X_df, y_df)
             ### For classification problems we are going to use SPE from now on
+            #### SPE fits its models in n_jobs processes. So each model gets one thread.
+            set_estimator_threads(model_copy, 1)
             if modeltype == 'Binary_Classification':
                 ### For Binary class, SPE model is better ############
-                spe = SelfPacedEnsembleClassifier(estimator=model_copy, n_jobs=-1, soft_resample_flag=False)
+                spe = SelfPacedEnsembleClassifier(estimator=model_copy, n_jobs=n_jobs, soft_resample_flag=False)
             else:
                 ## For multi-class OnevsRest model is better  ###########
-                spe = SelfPacedEnsembleClassifier(estimator=model_copy, n_jobs=-1, soft_resample_flag=False)
+                spe = SelfPacedEnsembleClassifier(estimator=model_copy, n_jobs=n_jobs, soft_resample_flag=False)
                 spe = OneVsRestClassifier(estimator=spe)
             print('Training Imbalanced model. This will take time...')
             spe.fit(X_df, y_df)
@@ -4855,7 +5183,8 @@ def training_with_SMOTE(X_df, y_df, target, eval_set, model_input, Boosting_Flag
             print(classification_report(y_test, model.predict(x_test)))
         print('##################  Completed Imbalanced Training using %s ################' % model_str)
     else:
-        if verbose >= 1:
+        if verbose >= 1 and not headless:
+            import matplotlib.pylab as plt
             fig, (ax1, ax2) = plt.subplots(1, 2, sharey=True, figsize=(12, 5))
             if modeltype == 'Regression':
                 y_df.plot(kind='hist', title='Dist. of target before Regression Resampler', ax=ax1, color='r')
@@ -4940,6 +5269,7 @@ def Draw_MC_ML_PR_ROC_Curves(classifier, X_test, y_test):
     https://scikit-learn.org/stable/auto_examples/model_selection/plot_precision_recall.html
     ========================================================================================
     """
+    import matplotlib.pylab as plt
     figsize = (10, 6)
     ###############################################################################
     # In binary classification settings
@@ -5151,6 +5481,8 @@ def plot_roc_curve(m, x_testc, y_test, ax=None):
 
 def plot_classification_results(m, X_true, y_true, each_target):
     #### These plots are only for binary classes #############
+    import matplotlib.pylab as plt
+    import seaborn as sns
     try:
         fig, axes = plt.subplots(2, 2, figsize=(15, 15))
         plot_roc_curve(m, X_true, y_true, ax=axes[0, 1])
@@ -5218,6 +5550,7 @@ def plot_regression_scatters(df, df2, num_vars, plot_name=''):
     """
     Great way to plot continuous variables fast. Just sent them in and it will take care of the rest!
     """
+    import matplotlib.pylab as plt
     colors = cycle('byrcmgkbyrcmgkbyrcmgkbyrcmgk')
     col = 2
     start_time = time.time()
@@ -5285,12 +5618,13 @@ def plot_regression_scatters(df, df2, num_vars, plot_name=''):
 
 
 ################################################################################
-def print_regression_model_stats(actuals, predicted, targets='', plot_name=''):
+def print_regression_model_stats(actuals, predicted, targets='', plot_name='', headless=False):
     """
     This program prints and returns MAE, RMSE, MAPE.
     If you like the MAE and RMSE to have a title or something, just give that
     in the input as "title" and it will print that title on the MAE and RMSE as a
     chart for that model. Returns MAE, MAE_as_percentage, and RMSE_as_percentage
+    If headless is True, the scatter chart is not drawn but the metrics are the same.
     """
     if isinstance(actuals, pd.Series) or isinstance(actuals, pd.DataFrame):
         actuals = actuals.values
@@ -5326,10 +5660,11 @@ def print_regression_model_stats(actuals, predicted, targets='', plot_name=''):
             multi_label = False
         else:
             multi_label = True
-    try:
-        plot_regression_scatters(actuals, predicted, cols, plot_name=plot_name)
-    except:
-        print('Could not draw regression plot but continuing...')
+    if not headless:
+        try:
+            plot_regression_scatters(actuals, predicted, cols, plot_name=plot_name)
+        except:
+            print('Could not draw regression plot but continuing...')
     if multi_label:
         for i in range(actuals.shape[1]):
             actuals_x = actuals[:, i]
@@ -5399,6 +5734,7 @@ def print_mape(y, y_hat):
 
 ################################################################################
 def plot_dfplot(dfplot, plot_title=""):
+    import matplotlib.pylab as plt
     figsize = (10, 10)
     colors = cycle('byrcmgkbyrcmgkbyrcmgkbyrcmgk')
     plt.figure(figsize=figsize)
@@ -5419,12 +5755,14 @@ def plot_dfplot(dfplot, plot_title=""):
 
 ###############################################################################
 def add_entropy_binning(temp_train, targ, num_vars, important_features, temp_test,
-                       modeltype, entropy_binning,verbose=0):
+                       modeltype, entropy_binning,verbose=0, binning_thresholds=None):
     """
         ######   This is where we do ENTROPY BINNING OF CONTINUOUS VARS ###########
         #### It is best to do Binning on ONLY on the top most variables from Important_Features!
         #### Make sure that the Top 2-10 vars are all CONTINUOUS VARS! Otherwise Binning is Waste!
         #### This method ensures you get the Best Results by generalizing on the top numeric vars!
+        #### If you send in a dictionary as binning_thresholds, the thresholds of each binned var are
+        ####   stored in it so that new data can be binned the same way later (AutoViMLPipeline).
     """
     temp_train = copy.deepcopy(temp_train)
     temp_test = copy.deepcopy(temp_test)
@@ -5499,6 +5837,8 @@ def add_entropy_binning(temp_train, targ, num_vars, important_features, temp_tes
             #### Drop these original continuous variable from further consideration that's all! ###
             num_vars.remove(each_num)
             new_bincols.append(bincol)
+            if binning_thresholds is not None:
+                binning_thresholds[each_num] = entropy_threshold
         except:
             print('Error in %s during Entropy Binning' %each_num)
     print('    Selected and binned only top %s continuous variables.' %(len(new_bincols)))
@@ -5585,6 +5925,7 @@ def oversample_SMOTE(X, y):
     # X →Independent Variable in DataFrame\
     # y →dependent Variable in Pandas DataFrame format
     # Get the class distriubtion for perfoming relative sampling in the next line
+    from imblearn.over_sampling import SVMSMOTE
     class_weighted_rows = get_class_distribution(y)
     smote = SVMSMOTE(random_state=27,
                      sampling_strategy=class_weighted_rows)
@@ -5597,6 +5938,7 @@ def oversample_ADASYN(X, y):
     # X →Independent Variable in DataFrame\
     # y →dependent Variable in Pandas DataFrame format
     # Get the class distriubtion for perfoming relative sampling in the next line
+    from imblearn.over_sampling import ADASYN
     class_weighted_rows = get_class_distribution(y)
     # Your favourite oversampler
     smote = ADASYN(random_state=27,
@@ -5606,10 +5948,11 @@ def oversample_ADASYN(X, y):
 
 
 ###########################################################################################
-def marthas_columns(data, verbose=0):
+def marthas_columns(data, verbose=0, profiles=None):
     """
     This program is named  in honor of my one of students, Martha, who came up with the idea for it.
     It's a neat way of printing data types and information compared to the boring describe() function in Pandas.
+    If profiles (from profile_columns) are given, missing value counts are read from them.
     """
     data = data[:]
     print('Data Set Shape: %d rows, %d cols' % data.shape)
@@ -5621,7 +5964,7 @@ def marthas_columns(data, verbose=0):
             for col in data.columns:
                 print('\t* %s:\t%d missing, %d uniques, most common: %s' % (
                     col,
-                    data[col].isnull().sum(),
+                    data[col].isnull().sum() if profiles is None else profiles[col].n_nulls,
                     data[col].nunique(),
                     data[col].value_counts().head(2).to_dict()
                 ))
@@ -1,9 +1,5 @@
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import seaborn as sns
-
-sns.set(style="white", color_codes=True)
 import warnings
 
 warnings.filterwarnings("ignore")
@@ -22,14 +18,18 @@ from sklearn.multiclass import OneVsRestClassifier
 from sklearn.neighbors import KNeighborsRegressor
 import time
 import operator
+from autoviml.prediction_store import PredictionStore
 
 
 #########################################################
 def QuickML_Ensembling(X_train, y_train, X_test, y_test='', modeltype='Regression',
                        Boosting_Flag=False,
-                       scoring='', verbose=0):
+                       scoring='', verbose=0, headless=False, prediction_store=None):
     """
     Quickly builds and runs multiple models for a clean data set(only numerics).
+    If headless is True, the results heatmap is not drawn but the scores are printed as before.
+    prediction_store is a PredictionStore: models already fitted and predicted on the same data are
+    taken from it instead of being fitted again.
     """
     start_time = time.time()
     seed = 99
@@ -160,7 +160,7 @@ def QuickML_Ensembling(X_train, y_train, X_test, y_test='', modeltype='Regressio
             model_tuples.append(('Bagging_Classifier', model8))
     model_dict = dict(model_tuples)
     models, results = run_ensemble_models(model_dict, X_train, y_train, X_test, y_test,
-                                          scoring, modeltype)
+                                          scoring, modeltype, headless, prediction_store)
     return models, results
 
 
@@ -172,8 +172,11 @@ from sklearn.linear_model import LinearRegression
 from sklearn.linear_model import LogisticRegression
 
 
-def run_ensemble_models(model_dict, X_train, y_train, X_test, y_test, scoring, modeltype):
+def run_ensemble_models(model_dict, X_train, y_train, X_test, y_test, scoring, modeltype, headless=False,
+                        prediction_store=None):
     start_time = time.time()
+    if prediction_store is None:
+        prediction_store = PredictionStore(max_memory_bytes=0)
     model_name, bac_score_list, ac_score_list, p_score_list, r_score_list, f1_score_list = [], [], [], [], [], []
     iteration = 0
     estimators = []
@@ -183,12 +186,10 @@ def run_ensemble_models(model_dict, X_train, y_train, X_test, y_test, scoring, m
         model_name.append(key)
         if str(val).split("(")[0] == 'MultinomialNB':
             #### Multinomial models need only positive values!!
-            val.fit(abs(X_train), y_train)
-            y_pred = val.predict(abs(X_test))
+            val, y_pred = prediction_store.fit_predict(val, abs(X_train), y_train, abs(X_test))
         else:
             try:
-                val.fit(X_train, y_train)
-                y_pred = val.predict(X_test)
+                val, y_pred = prediction_store.fit_predict(val, X_train, y_train, X_test)
             except:
                 if modeltype != 'Regression':
                     key = 'Logistic_Regression'
@@ -196,13 +197,12 @@ def run_ensemble_models(model_dict, X_train, y_train, X_test, y_test, scoring, m
                 else:
                     key = 'Linear_Regression'
                     val = LinearRegression()
-                val.fit(X_train, y_train)
-        try:
-            y_pred = val.predict(X_test)
-        except:
-            print('Error in ensemble models. Returning...')
-            stacks = np.array([])
-            return model_name, stacks
+                try:
+                    val, y_pred = prediction_store.fit_predict(val, X_train, y_train, X_test)
+                except:
+                    print('Error in ensemble models. Returning...')
+                    stacks = np.array([])
+                    return model_name, stacks
         if iteration == 0:
             stacks = copy.deepcopy(y_pred)
             iteration += 1
@@ -235,12 +235,17 @@ def run_ensemble_models(model_dict, X_train, y_train, X_test, y_test, scoring, m
                 model_comparison_df = model_comparison_df.sort_values(by='bal_accuracy_score', ascending=False)
     if not isinstance(y_test, str):
         data_frame = model_comparison_df.set_index('model_name').astype(float)
-        plt.figure(figsize=(10, 10))
-        g = sns.heatmap(data_frame, annot=True, fmt='0.2f', cbar=False)
-        g.set_xticklabels(g.get_xticklabels(), rotation=45, fontsize=12)
-        g.set_yticklabels(g.get_yticklabels(), rotation=0, fontsize=12)
+        if not headless:
+            #### Plotting libraries are slow to import. So they are imported only when a chart is drawn.
+            import matplotlib.pyplot as plt
+            import seaborn as sns
+            sns.set(style="white", color_codes=True)
+            plt.figure(figsize=(10, 10))
+            g = sns.heatmap(data_frame, annot=True, fmt='0.2f', cbar=False)
+            g.set_xticklabels(g.get_xticklabels(), rotation=45, fontsize=12)
+            g.set_yticklabels(g.get_yticklabels(), rotation=0, fontsize=12)
+            g.set_title('QuickML Ensembling Models Results', fontsize=18)
         print('Time taken = %0.0f seconds' % (time.time() - start_time))
-        g.set_title('QuickML Ensembling Models Results', fontsize=18)
         f1_stats = dict(estim_tuples)
         try:
             if scoring in ['logloss', 'rmse', 'mae', 'mape', 'RMSE', 'neg_mean_squared_error']:
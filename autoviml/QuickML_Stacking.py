@@ -9,13 +9,13 @@ from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
 from sklearn.svm import LinearSVR
 from sklearn.tree import DecisionTreeRegressor
 from sklearn.linear_model import LassoCV
-from sklearn.model_selection import cross_val_predict
 from sklearn.naive_bayes import GaussianNB, MultinomialNB
 from sklearn.tree import DecisionTreeClassifier
 import time
 import copy
 from collections import Counter
 from collections import OrderedDict
+from autoviml.prediction_store import PredictionStore
 
 
 #############################################################################
@@ -40,11 +40,18 @@ def find_rare_class(classes, verbose=0):
 
 ################################################################################
 def QuickML_Stacking(X_train, y_train, X_test='', modeltype='Regression', Boosting_Flag=False,
-                     scoring='', verbose=0):
+                     scoring='', verbose=0, return_estimators=False, n_jobs=-1, prediction_store=None):
     """
     Quickly build Stacks of multiple model results
     Input must be a clean data set (only numeric variables, no categorical or string variables).
+    If return_estimators is True, it also returns the list of (name, estimator) tuples. These
+    estimators are fitted only when X_test is given (cross_val_predict does not fit them).
+    n_jobs is the number of processes cross_val_predict runs folds in (Auto_ViML passes its CPU budget).
+    prediction_store is a PredictionStore: models already fitted (or predicted) on the same data are
+    taken from it instead of being fitted again. Without it, every model is fitted.
     """
+    if prediction_store is None:
+        prediction_store = PredictionStore(max_memory_bytes=0)
     X_train = copy.deepcopy(X_train)
     X_test = copy.deepcopy(X_test)
     y_train = copy.deepcopy(y_train)
@@ -75,19 +82,19 @@ def QuickML_Stacking(X_train, y_train, X_test='', modeltype='Regression', Boosti
                 # model4 = BaggingRegressor(DecisionTreeRegressor(random_state=seed),
                 #                            n_estimators=NUMS,random_state=seed)
                 model4 = LinearSVR()
-                results = cross_val_predict(model4, X_train, y_train, cv=scv, n_jobs=-1)
+                results = prediction_store.cross_val_predict(model4, X_train, y_train, scv, n_jobs=n_jobs)
                 estimators.append(('Linear_SVR', model4))
                 estimator_length.append(1)
             elif Boosting_Flag is None:
                 ####   Tree models if Linear chosen #####
                 model5 = DecisionTreeRegressor(random_state=seed, min_samples_leaf=2)
-                results = cross_val_predict(model5, X_train, y_train, cv=scv, n_jobs=-1)
+                results = prediction_store.cross_val_predict(model5, X_train, y_train, scv, n_jobs=n_jobs)
                 estimators.append(('Decision Trees', model5))
                 estimator_length.append(1)
             else:
                 ####   Linear Models if Boosting is chosen #####
                 model6 = LassoCV(alphas=np.logspace(-5, -1, 20), cv=scv, random_state=seed)
-                results = cross_val_predict(model6, X_train, y_train, cv=scv, n_jobs=-1)
+                results = prediction_store.cross_val_predict(model6, X_train, y_train, scv, n_jobs=n_jobs)
                 estimators.append(('LassoCV Regularization', model6))
                 estimator_length.append(1)
         else:
@@ -107,15 +114,15 @@ def QuickML_Stacking(X_train, y_train, X_test='', modeltype='Regression', Boosti
             if Boosting_Flag:
                 ####   Linear Models if Boosting is chosen #####
                 model4 = LinearDiscriminantAnalysis()
-                results = cross_val_predict(model4, X_train, y_train, cv=scv, n_jobs=-1,
-                                            method='predict_proba')
+                results = prediction_store.cross_val_predict(model4, X_train, y_train, scv, method='predict_proba',
+                                                             n_jobs=n_jobs)
                 estimators.append(('Linear Discriminant', model4))
                 estimator_length.append(results.shape[1])
             elif Boosting_Flag is None:
                 ####   Tree models if Linear chosen #####
                 model6 = DecisionTreeClassifier(min_samples_leaf=2)
-                results = cross_val_predict(model6, X_train, y_train, cv=scv, n_jobs=-1,
-                                            method='predict_proba')
+                results = prediction_store.cross_val_predict(model6, X_train, y_train, scv, method='predict_proba',
+                                                             n_jobs=n_jobs)
                 estimators.append(('Decision Tree', model6))
                 estimator_length.append(results.shape[1])
             else:
@@ -130,8 +137,8 @@ def QuickML_Stacking(X_train, y_train, X_test='', modeltype='Regression', Boosti
                         model7 = MultinomialNB()
                     except:
                         model7 = DecisionTreeClassifier(min_samples_leaf=2)
-                results = cross_val_predict(model7, X_train, y_train, cv=scv, n_jobs=-1,
-                                            method='predict_proba')
+                results = prediction_store.cross_val_predict(model7, X_train, y_train, scv, method='predict_proba',
+                                                             n_jobs=n_jobs)
                 estimators.append(('Naive Bayes', model7))
                 estimator_length.append(results.shape[1])
     else:
@@ -145,19 +152,22 @@ def QuickML_Stacking(X_train, y_train, X_test='', modeltype='Regression', Boosti
                 # model4 = BaggingRegressor(DecisionTreeRegressor(random_state=seed),
                 #                            n_estimators=NUMS,random_state=seed)
                 model4 = LinearSVR()
-                results = model4.fit(X_train, y_train).predict(X_test)
+                model4, results = prediction_store.fit_predict(model4, X_train, y_train, X_test,
+                                                               need_model=return_estimators)
                 estimators.append(('Linear_SVR', model4))
                 estimator_length.append(1)
             elif Boosting_Flag is None:
                 ####   Tree models if Linear chosen #####
                 model5 = DecisionTreeRegressor(random_state=seed, min_samples_leaf=2)
-                results = model5.fit(X_train, y_train).predict(X_test)
+                model5, results = prediction_store.fit_predict(model5, X_train, y_train, X_test,
+                                                               need_model=return_estimators)
                 estimators.append(('Decision Trees', model5))
                 estimator_length.append(1)
             else:
                 ####   Linear Models if Boosting is chosen #####
                 model6 = LassoCV(alphas=np.logspace(-5, -1, 20), cv=scv, random_state=seed)
-                results = model6.fit(X_train, y_train).predict(X_test)
+                model6, results = prediction_store.fit_predict(model6, X_train, y_train, X_test,
+                                                               need_model=return_estimators)
                 estimators.append(('LassoCV Regularization', model6))
                 estimator_length.append(1)
         else:
@@ -177,13 +187,15 @@ def QuickML_Stacking(X_train, y_train, X_test='', modeltype='Regression', Boosti
             if Boosting_Flag:
                 ####   Linear Models if Boosting is chosen #####
                 model4 = LinearDiscriminantAnalysis()
-                results = model4.fit(X_train, y_train).predict_proba(X_test)
+                model4, results = prediction_store.fit_predict(model4, X_train, y_train, X_test, 'predict_proba',
+                                                               need_model=return_estimators)
                 estimators.append(('Linear Discriminant', model4))
                 estimator_length.append(results.shape[1])
             elif Boosting_Flag is None:
                 ####   Tree models if Linear chosen #####
                 model6 = DecisionTreeClassifier(min_samples_leaf=2)
-                results = model6.fit(X_train, y_train).predict_proba(X_test)
+                model6, results = prediction_store.fit_predict(model6, X_train, y_train, X_test, 'predict_proba',
+                                                               need_model=return_estimators)
                 estimators.append(('Decision Tree', model6))
                 estimator_length.append(results.shape[1])
             else:
@@ -198,7 +210,8 @@ def QuickML_Stacking(X_train, y_train, X_test='', modeltype='Regression', Boosti
                         model7 = MultinomialNB()
                     except:
                         model7 = DecisionTreeClassifier(min_samples_leaf=2)
-                results = model7.fit(X_train, y_train).predict_proba(X_test)
+                model7, results = prediction_store.fit_predict(model7, X_train, y_train, X_test, 'predict_proba',
+                                                               need_model=return_estimators)
                 estimators.append(('Naive Bayes', model7))
                 estimator_length.append(results.shape[1])
     # stacks = np.c_[results1,results2,results3]
@@ -211,5 +224,7 @@ def QuickML_Stacking(X_train, y_train, X_test='', modeltype='Regression', Boosti
         ls += els
     if verbose == 1:
         print('    Time taken for Stacking: %0.1f seconds' % (time.time() - start_time))
+    if return_estimators:
+        return ls, results, estimators_list
     return ls, results
 #########################################################
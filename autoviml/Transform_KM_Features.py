@@ -113,7 +113,11 @@ class KMeansFeaturizer:
 import copy
 
 
-def Transform_KM_Features(training_data, training_labels, test_data, km_max=0):
+def Transform_KM_Features(training_data, training_labels, test_data, km_max=0, return_featurizer=False):
+    """
+    Adds a KMeans cluster label built using predictors and target to train and test data.
+    If return_featurizer is True, it also returns the fitted KMeansFeaturizer for scoring new data.
+    """
     seed = 99
     preds = list(training_data)
     target = training_labels.name
@@ -148,4 +152,6 @@ def Transform_KM_Features(training_data, training_labels, test_data, km_max=0):
     #                                  columns=preds+[target,'cluster'])
     # test_with_cluster_df = pd.DataFrame(test_with_cluster,index=test_index,
     #                                  columns=preds+['cluster'])
+    if return_featurizer:
+        return train_with_cluster_df, test_with_cluster_df, kmf_hint
     return train_with_cluster_df, test_with_cluster_df
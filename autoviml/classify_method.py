@@ -22,6 +22,10 @@ def warn(*args, **kwargs):
 warnings.warn = warn
 ####################################################################################
 from functools import reduce
+from collections import OrderedDict
+
+from autoviml.cpu_budget import find_n_cpus
+from autoviml.sketches import value_counts_upto, estimate_distinct, sample_values
 
 
 def left_subtract(l1, l2):
@@ -35,17 +39,242 @@ def left_subtract(l1, l2):
 #################################################################################
 import copy
 
+#### dtype names that classify_columns treats as integer, float and numeric columns
+INT_DTYPES = ['uint8', 'uint16', 'uint32', 'uint64', 'int8', 'int16', 'int32', 'int64']
+FLOAT_DTYPES = ['float16', 'float32', 'float64']
+NUMERIC_DTYPES = INT_DTYPES + FLOAT_DTYPES
+DATETIME_DTYPES = ['<M8[ns]', 'datetime64[ns]']
+#### Tables with at least this many columns are profiled in parallel in shards of at least this many columns.
+####   A numeric column takes well under a millisecond, so smaller shards do not pay for starting a worker.
+PARALLEL_MIN_COLS = 5000
+PARALLEL_MIN_SHARD_COLS = 1000
+#### String columns whose mean length is at least MAX_NLP_CHAR_SIZE chars or whose longest value is at least
+####   LONG_STRING_SIZE chars may be discrete strings or NLP columns
+MAX_NLP_CHAR_SIZE = 30
+LONG_STRING_SIZE = 50
+#### In sketch mode, distinct counts up to SKETCH_EXACT_DISTINCT are exact and higher ones are estimated.
+####   Estimates within SKETCH_MARGIN (fraction of rows) of 90% of rows are counted exactly since that is
+####   where ID and NLP columns are told apart. String lengths are found from SKETCH_SAMPLE_SIZE values.
+SKETCH_EXACT_DISTINCT = 1000
+SKETCH_MARGIN = 0.05
+SKETCH_SAMPLE_SIZE = 10000
+
+
+class ColumnProfile(object):
+    """
+    ###########################################################################################
+    ####  ColumnProfile holds the statistics of one column that classify_columns needs.    ####
+    ####  All of them are computed in one pass over the data by profile_columns:           ####
+    ####     n_rows, n_nulls, nunique (same as len(value_counts()): NaN is not counted and ####
+    ####         all categories of a category column are counted),                         ####
+    ####     n_types (number of python types among non-null values),                       ####
+    ####     n_inf, min and max (numeric columns only),                                    ####
+    ####     str_len_max and str_len_sum (lengths of string values in object columns),     ####
+    ####     parses_as_date (whether pd.to_datetime works on it. It is tested only for date####
+    ####         time columns and integer columns whose values lie within 1900 and 2050.   ####
+    ####         It is None for all other columns).                                        ####
+    ###########################################################################################
+    """
+    __slots__ = ('name', 'dtype', 'n_rows', 'n_nulls', 'nunique', 'n_types', 'n_inf',
+                 'min', 'max', 'str_len_max', 'str_len_sum', 'parses_as_date', 'sketched')
+
+    def __init__(self, name, dtype, n_rows):
+        self.name = name
+        self.dtype = dtype
+        self.n_rows = n_rows
+        self.n_nulls = 0
+        self.nunique = 0
+        self.n_types = 1
+        self.n_inf = 0
+        self.min = None
+        self.max = None
+        self.str_len_max = 0
+        self.str_len_sum = 0
+        self.parses_as_date = None
+        self.sketched = False
+
+    @property
+    def null_fraction(self):
+        return self.n_nulls / self.n_rows if self.n_rows > 0 else 0.0
+
+    @property
+    def mixed_type(self):
+        return self.n_types > 1
+
+    @property
+    def str_len_mean(self):
+        return self.str_len_sum / self.n_rows if self.n_rows > 0 else 0.0
+
+    def to_dict(self):
+        profile = dict([(x, getattr(self, x)) for x in self.__slots__])
+        profile['dtype'] = str(self.dtype)
+        return profile
+
+    def __repr__(self):
+        return 'ColumnProfile(%s: dtype=%s, nulls=%d, nunique=%d)' % (self.name, self.dtype, self.n_nulls,
+                                                                     self.nunique)
+
+
+def profile_columns(df, n_jobs=1, sketch=False):
+    """
+    Computes a ColumnProfile for every column in df in one pass and returns them in an OrderedDict
+    keyed by column name. Null counts, infinity counts, minimums and maximums are found in bulk.
+    Distinct counts, python types, string lengths and date checks are found once per column.
+    n_jobs: number of processes to profile column shards in (-1 means all cores). It is never more than
+    the CPUs this process may use (see cpu_budget.find_n_cpus). Tables with fewer than PARALLEL_MIN_COLS
+    columns are always profiled in this process since starting workers and sending them the data costs
+    more than it saves.
+    sketch: if True, distinct counts, python types and string lengths are found from sketches (see
+    sketches.py) instead of reading every value. They are exact or close enough to be on the same side
+    of every threshold used by classify_columns. So classify_columns gives the same results faster on
+    very long tables. Such profiles have sketched=True.
+    """
+    n_cols = df.shape[1]
+    if n_jobs is None or n_jobs == 1 or n_cols < PARALLEL_MIN_COLS:
+        return _profile_shard(df, sketch)
+    from joblib import Parallel, delayed
+    n_workers = min(find_n_cpus(n_jobs), n_cols // PARALLEL_MIN_SHARD_COLS)
+    if n_workers <= 1:
+        return _profile_shard(df, sketch)
+    #### A few shards per worker so that a shard of slow (text) columns does not hold up the rest
+    shards = [x for x in np.array_split(np.arange(n_cols), n_workers * 4) if len(x) > 0]
+    results = Parallel(n_jobs=n_workers)(delayed(_profile_shard)(df.iloc[:, shard], sketch) for shard in shards)
+    profiles = OrderedDict()
+    for result in results:
+        profiles.update(result)
+    return profiles
+
+
+def _profile_shard(df, sketch=False):
+    #### Profiles all columns of df in this process. This is the work done by each worker.
+    n_rows = len(df)
+    null_counts = df.isnull().sum()
+    nums = df.select_dtypes(include='number').columns.tolist()
+    if len(nums) > 0:
+        inf_counts = np.isinf(df[nums]).sum()
+        mins = df[nums].min()
+        maxs = df[nums].max()
+    nums = set(nums)
+    profiles = OrderedDict()
+    for col in df.columns:
+        series = df[col]
+        profile = ColumnProfile(col, series.dtype, n_rows)
+        profile.n_nulls = int(null_counts[col])
+        if col in nums:
+            profile.n_inf = int(inf_counts[col])
+            profile.min = mins[col]
+            profile.max = maxs[col]
+        if str(series.dtype) == 'category':
+            profile.nunique = len(series.cat.categories)
+        elif sketch:
+            _sketch_column(profile, series)
+        else:
+            profile.nunique = int(series.nunique())
+        if profile.sketched:
+            #### types and string lengths of object columns were found by _sketch_column
+            if series.dtype != object and profile.n_nulls == n_rows:
+                profile.n_types = 0
+        elif series.dtype == object or str(series.dtype) == 'category':
+            #### Only object and category columns can hold values of more than one python type
+            values = series.dropna().values
+            profile.n_types = len(set(map(type, values)))
+            if series.dtype == object:
+                lengths = [len(x) if type(x) == str else 0 for x in values]
+                if len(lengths) > 0:
+                    profile.str_len_max = max(lengths)
+                    profile.str_len_sum = sum(lengths)
+        elif profile.n_nulls == n_rows:
+            profile.n_types = 0
+        if str(series.dtype) in DATETIME_DTYPES:
+            profile.parses_as_date = True
+        elif str(series.dtype) in INT_DTYPES and profile.nunique != 2 and 1900 <= profile.min and (
+                profile.max <= 2050):
+            #### Only integer columns with values in this range of years are tested as dates
+            profile.parses_as_date = parses_as_date(series)
+        profiles[col] = profile
+    return profiles
+
+
+def _sketch_column(profile, series):
+    #### Fills in distinct counts, types and string lengths of profile from sketches of series
+    n_rows = profile.n_rows
+    profile.sketched = True
+    #### Finding missing values in object columns is slow. So they are dropped once and only if there are any.
+    if profile.n_nulls > 0:
+        series = series.dropna()
+    counts = value_counts_upto(series, SKETCH_EXACT_DISTINCT)
+    if counts is not None:
+        nunique = len(counts)
+    else:
+        nunique = int(round(estimate_distinct(series)))
+        if str(series.dtype) in INT_DTYPES + ['object'] and nunique >= (0.9 - SKETCH_MARGIN) * n_rows:
+            #### ID and NLP columns have distinct counts close to the number of rows. Count them exactly.
+            nunique = int(series.nunique())
+        else:
+            nunique = int(min(max(nunique, SKETCH_EXACT_DISTINCT + 1), n_rows))
+    profile.nunique = nunique
+    if series.dtype != object:
+        return
+    values = series.values
+    if pd.api.types.infer_dtype(values, skipna=False) == 'string':
+        #### infer_dtype runs in C and stops at the first value that is not a string
+        profile.n_types = 1
+    else:
+        profile.n_types = len(set(map(type, values)))
+    n_values = len(values)
+    if n_values == 0:
+        return
+    if counts is not None:
+        #### With few distinct values, exact lengths come from the distinct values and their counts
+        lengths = np.array([len(x) if type(x) == str else 0 for x in counts.index])
+        profile.str_len_sum = int((lengths * counts.values).sum())
+        profile.str_len_max = int(lengths.max())
+        return
+    lengths = np.array([len(x) if type(x) == str else 0 for x in sample_values(values, SKETCH_SAMPLE_SIZE)])
+    exact = n_values <= SKETCH_SAMPLE_SIZE
+    if not exact:
+        #### Missing values count as 2 chars in classify_columns. Check which side of the thresholds
+        ####   the mean (and max if it matters) lie on. If it is not clear, find them from all values.
+        mean_len = (lengths.mean() * n_values + 2 * profile.n_nulls) / n_rows
+        error = 4 * lengths.std() / np.sqrt(len(lengths)) * n_values / n_rows + 1e-9
+        if abs(mean_len - MAX_NLP_CHAR_SIZE) <= error:
+            exact = True
+        elif lengths.max() < LONG_STRING_SIZE and (mean_len >= MAX_NLP_CHAR_SIZE or nunique + 1 >= int(0.9 * n_rows)):
+            exact = True
+    if exact:
+        lengths = np.array([len(x) if type(x) == str else 0 for x in values])
+        profile.str_len_sum = int(lengths.sum())
+    else:
+        profile.str_len_sum = lengths.mean() * n_values
+    profile.str_len_max = int(lengths.max())
+
 
-def EDA_find_remove_columns_with_infinity(df, remove=False):
+def parses_as_date(series):
+    """
+    Returns True if pandas can convert this column to date times.
+    """
+    try:
+        pd.to_datetime(series, infer_datetime_format=True)
+        return True
+    except:
+        return False
+
+
+def EDA_find_remove_columns_with_infinity(df, remove=False, profiles=None):
     """
     This function finds all columns in a dataframe that have inifinite values (np.inf or -np.inf)
     It returns a list of column names. If the list is empty, it means no columns were found.
     If remove flag is set, then it returns a smaller dataframe with inf columns removed.
+    If profiles (from profile_columns) are given, infinity counts are read from them instead of the data.
     """
-    nums = df.select_dtypes(include='number').columns.tolist()
-    dfx = df[nums]
-    sum_rows = np.isinf(dfx).values.sum()
-    add_cols = list(dfx.columns.to_series()[np.isinf(dfx).any()])
+    if profiles is None:
+        nums = df.select_dtypes(include='number').columns.tolist()
+        dfx = df[nums]
+        inf_counts = np.isinf(dfx).sum()
+    else:
+        inf_counts = pd.Series(dict([(x, profiles[x].n_inf) for x in df.columns]), dtype='int64')
+    sum_rows = inf_counts.sum()
+    add_cols = inf_counts[inf_counts > 0].index.tolist()
     if sum_rows > 0:
         print('    there are %d rows and %d columns with infinity in them...' % (sum_rows, len(add_cols)))
         if remove:
@@ -63,7 +292,7 @@ def EDA_find_remove_columns_with_infinity(df, remove=False):
 
 
 ####################################################################################
-def classify_columns(df_preds, verbose=0):
+def classify_columns(df_preds, verbose=0, profiles=None, n_jobs=1, sketch=False):
     """
     This actually does Exploratory data analysis - it means this function performs EDA
     ######################################################################################
@@ -73,10 +302,16 @@ def classify_columns(df_preds, verbose=0):
     categorical, date or id column, boolean, nlp, discrete_string and cols to delete...
     ####### Returns a dictionary with 10 kinds of vars like the following: # continuous_vars,int_vars
     # cat_vars,factor_vars, bool_vars,discrete_string_vars,nlp_vars,date_vars,id_vars,cols_delete
+    profiles: optional dict of ColumnProfile by column name from profile_columns. If it is not given,
+    it is computed here. All decisions below are made from these profiles, so the data is scanned once.
+    n_jobs: number of processes used to compute the profiles of very wide tables (see profile_columns).
+    sketch: if True, profiles are computed from sketches which is much faster on very long tables.
     """
-    train = copy.deepcopy(df_preds)
+    if profiles is None:
+        profiles = profile_columns(df_preds, n_jobs=n_jobs, sketch=sketch)
+    n_rows = len(df_preds)
     #### If there are 30 chars are more in a discrete_string_var, it is then considered an NLP variable
-    max_nlp_char_size = 30
+    max_nlp_char_size = MAX_NLP_CHAR_SIZE
     max_cols_to_print = 30
     print('#######################################################################################')
     print('######################## C L A S S I F Y I N G  V A R I A B L E S  ####################')
@@ -89,126 +324,113 @@ def classify_columns(df_preds, verbose=0):
     def add(a, b):
         return a + b
 
+    def dtype_name(col):
+        return str(profiles[col].dtype)
+
+    def is_date(col):
+        #### pd.to_datetime is slow. So its result is found once per column and kept in the profile.
+        if profiles[col].parses_as_date is None:
+            profiles[col].parses_as_date = parses_as_date(df_preds[col])
+        return profiles[col].parses_as_date
+
+    def flagged(flag):
+        #### returns the columns with this flag in the order of columns in the data set
+        return [x for x in train_cols if x in flags[flag]]
+
     sum_all_cols = dict()
-    orig_cols_total = train.shape[1]
+    orig_cols_total = df_preds.shape[1]
     # Types of columns
     cols_delete = []
-    cols_delete = [col for col in list(train) if (len(train[col].value_counts()) == 1) | (
-            train[col].isnull().sum() / len(train) >= 0.90)]
-    inf_cols = EDA_find_remove_columns_with_infinity(train)
-    mixed_cols = [x for x in list(train) if len(train[x].dropna().apply(type).value_counts()) > 1]
+    cols_delete = [col for col in list(df_preds) if (profiles[col].nunique == 1) | (
+            profiles[col].null_fraction >= 0.90)]
+    inf_cols = EDA_find_remove_columns_with_infinity(df_preds, profiles=profiles)
+    mixed_cols = [x for x in list(df_preds) if profiles[x].mixed_type]
     if len(mixed_cols) > 0:
         print('    Removing %s column(s) due to mixed data type detected...' % mixed_cols)
     cols_delete += mixed_cols
     cols_delete += inf_cols
-    train = train[left_subtract(list(train), cols_delete)]
-    var_df = pd.Series(dict(train.dtypes)).reset_index(drop=False).rename(
-        columns={0: 'type_of_column'})
+    train_cols = left_subtract(list(df_preds), cols_delete)
     sum_all_cols['cols_delete'] = cols_delete
-
-    var_df['bool'] = var_df.apply(
-        lambda x: 1 if x['type_of_column'] in ['bool', 'object'] and len(train[x['index']].value_counts()) == 2 else 0,
-        axis=1)
-    string_bool_vars = list(var_df[(var_df['bool'] == 1)]['index'])
+    #### Each flag holds the set of columns classified into that kind. The order of flags is the
+    #### order in which they are checked for columns that are classified into more than one kind.
+    flags = OrderedDict([(x, set()) for x in ['bool', 'num_bool', 'nlp_strings', 'discrete_strings',
+                                              'cat', 'id_col', 'dcat', 'int', 'date_time', 'numeric']])
+    flags['bool'] = set([x for x in train_cols if dtype_name(x) in ['bool', 'object'] and profiles[x].nunique == 2])
+    string_bool_vars = flagged('bool')
     sum_all_cols['string_bool_vars'] = string_bool_vars
-    var_df['num_bool'] = var_df.apply(lambda x: 1 if x['type_of_column'] in [np.uint8,
-                                                                             np.uint16, np.uint32, np.uint64,
-                                                                             'int8', 'int16', 'int32', 'int64',
-                                                                             'float16', 'float32', 'float64'] and len(
-        train[x['index']].value_counts()) == 2 else 0, axis=1)
-    num_bool_vars = list(var_df[(var_df['num_bool'] == 1)]['index'])
+    flags['num_bool'] = set([x for x in train_cols if dtype_name(x) in NUMERIC_DTYPES and profiles[x].nunique == 2])
+    num_bool_vars = flagged('num_bool')
     sum_all_cols['num_bool_vars'] = num_bool_vars
     ######   This is where we take all Object vars and split them into diff kinds ###
-    discrete_or_nlp = var_df.apply(lambda x: 1 if x['type_of_column'] in ['object'] and x[
-        'index'] not in string_bool_vars + cols_delete else 0, axis=1)
     ######### This is where we figure out whether a string var is nlp or discrete_string var ###
-    var_df['nlp_strings'] = 0
-    var_df['discrete_strings'] = 0
-    var_df['cat'] = 0
-    var_df['id_col'] = 0
-    discrete_or_nlp_vars = var_df.loc[discrete_or_nlp == 1]['index'].values.tolist()
-    copy_discrete_or_nlp_vars = copy.deepcopy(discrete_or_nlp_vars)
-    if len(discrete_or_nlp_vars) > 0:
-        for col in copy_discrete_or_nlp_vars:
-            #### first fill empty or missing vals since it will blowup ###
-            ### Remember that fillna only works at the dataframe level!
-            train[[col]] = train[[col]].fillna('  ')
-            if train[col].map(lambda x: len(x) if type(x) == str else 0).max(
-            ) >= 50 and len(train[col].value_counts()) >= int(0.9 * len(train)) and col not in string_bool_vars:
-                var_df.loc[var_df['index'] == col, 'nlp_strings'] = 1
-            elif train[col].map(lambda x: len(x) if type(x) == str else 0).mean(
-            ) >= max_nlp_char_size and train[col].map(lambda x: len(x) if type(x) == str else 0).max(
-            ) < 50 and len(train[col].value_counts()
-                           ) <= int(0.9 * len(train)) and col not in string_bool_vars:
-                var_df.loc[var_df['index'] == col, 'discrete_strings'] = 1
-            elif len(train[col].value_counts()) > cat_limit and len(
-                    train[col].value_counts()) <= int(0.9 * len(train)) and col not in string_bool_vars:
-                var_df.loc[var_df['index'] == col, 'discrete_strings'] = 1
-            elif len(train[col].value_counts()) > cat_limit and len(train[col].value_counts()
-                                                                    ) == len(train) and col not in string_bool_vars:
-                var_df.loc[var_df['index'] == col, 'id_col'] = 1
-            else:
-                var_df.loc[var_df['index'] == col, 'cat'] = 1
-    nlp_vars = list(var_df[(var_df['nlp_strings'] == 1)]['index'])
+    discrete_or_nlp_vars = [x for x in train_cols if dtype_name(x) == 'object' and x not in string_bool_vars]
+    filled_nunique = dict()
+    for col in discrete_or_nlp_vars:
+        #### Missing values are counted as the string '  ' (length 2) just as if they were filled with it
+        profile = profiles[col]
+        nunique = profile.nunique
+        max_len = profile.str_len_max
+        if profile.n_nulls > 0:
+            if not (df_preds[col] == '  ').any():
+                nunique += 1
+            max_len = max(max_len, 2)
+        mean_len = (profile.str_len_sum + 2 * profile.n_nulls) / n_rows
+        filled_nunique[col] = nunique
+        if max_len >= LONG_STRING_SIZE and nunique >= int(0.9 * n_rows):
+            flags['nlp_strings'].add(col)
+        elif mean_len >= max_nlp_char_size and max_len < LONG_STRING_SIZE and nunique <= int(0.9 * n_rows):
+            flags['discrete_strings'].add(col)
+        elif nunique > cat_limit and nunique <= int(0.9 * n_rows):
+            flags['discrete_strings'].add(col)
+        elif nunique > cat_limit and nunique == n_rows:
+            flags['id_col'].add(col)
+        else:
+            flags['cat'].add(col)
+    nlp_vars = flagged('nlp_strings')
     sum_all_cols['nlp_vars'] = nlp_vars
-    discrete_string_vars = list(var_df[(var_df['discrete_strings'] == 1)]['index'])
+    discrete_string_vars = flagged('discrete_strings')
     sum_all_cols['discrete_string_vars'] = discrete_string_vars
     ###### This happens only if a string column happens to be an ID column #######
     #### DO NOT Add this to ID_VARS yet. It will be done later. Don't change it easily...
     #### Category DTYPE vars are very special = they can be left as is and not disturbed in Python. ###
-    var_df['dcat'] = var_df.apply(lambda x: 1 if str(x['type_of_column']) == 'category' else 0,
-                                  axis=1)
-    factor_vars = list(var_df[(var_df['dcat'] == 1)]['index'])
+    flags['dcat'] = set([x for x in train_cols if dtype_name(x) == 'category'])
+    factor_vars = flagged('dcat')
     sum_all_cols['factor_vars'] = factor_vars
     ########################################################################
-    date_or_id = var_df.apply(lambda x: 1 if x['type_of_column'] in [np.uint8,
-                                                                     np.uint16, np.uint32, np.uint64,
-                                                                     'int8', 'int16',
-                                                                     'int32', 'int64'] and x[
-                                                 'index'] not in string_bool_vars + num_bool_vars + discrete_string_vars + nlp_vars else 0,
-                              axis=1)
+    already_classified = string_bool_vars + num_bool_vars + discrete_string_vars + nlp_vars
+    date_or_id = [x for x in train_cols if dtype_name(x) in INT_DTYPES and x not in already_classified]
     ######### This is where we figure out whether a numeric col is date or id variable ###
-    var_df['int'] = 0
-    var_df['date_time'] = 0
     ### if a particular column is date-time type, now set it as a date time variable ##
-    var_df['date_time'] = var_df.apply(lambda x: 1 if x['type_of_column'] in ['<M8[ns]', 'datetime64[ns]'] and x[
-        'index'] not in string_bool_vars + num_bool_vars + discrete_string_vars + nlp_vars else 0,
-                                       axis=1)
+    flags['date_time'] = set([x for x in train_cols if dtype_name(x) in DATETIME_DTYPES and x not in
+                              already_classified])
     ### this is where we save them as date time variables ###
-    if len(var_df.loc[date_or_id == 1]) != 0:
-        for col in var_df.loc[date_or_id == 1]['index'].values.tolist():
-            if len(train[col].value_counts()) == len(train):
-                if train[col].min() < 1900 or train[col].max() > 2050:
-                    var_df.loc[var_df['index'] == col, 'id_col'] = 1
-                else:
-                    try:
-                        pd.to_datetime(train[col], infer_datetime_format=True)
-                        var_df.loc[var_df['index'] == col, 'date_time'] = 1
-                    except:
-                        var_df.loc[var_df['index'] == col, 'id_col'] = 1
+    for col in date_or_id:
+        profile = profiles[col]
+        if profile.nunique == n_rows:
+            if profile.min < 1900 or profile.max > 2050:
+                flags['id_col'].add(col)
             else:
-                if train[col].min() < 1900 or train[col].max() > 2050:
-                    if col not in num_bool_vars:
-                        var_df.loc[var_df['index'] == col, 'int'] = 1
+                if is_date(col):
+                    flags['date_time'].add(col)
                 else:
-                    try:
-                        pd.to_datetime(train[col], infer_datetime_format=True)
-                        var_df.loc[var_df['index'] == col, 'date_time'] = 1
-                    except:
-                        if col not in num_bool_vars:
-                            var_df.loc[var_df['index'] == col, 'int'] = 1
-    else:
-        pass
-    int_vars = list(var_df[(var_df['int'] == 1)]['index'])
-    date_vars = list(var_df[(var_df['date_time'] == 1)]['index'])
-    id_vars = list(var_df[(var_df['id_col'] == 1)]['index'])
+                    flags['id_col'].add(col)
+        else:
+            if profile.min < 1900 or profile.max > 2050:
+                if col not in num_bool_vars:
+                    flags['int'].add(col)
+            else:
+                if is_date(col):
+                    flags['date_time'].add(col)
+                elif col not in num_bool_vars:
+                    flags['int'].add(col)
+    int_vars = flagged('int')
+    date_vars = flagged('date_time')
+    id_vars = flagged('id_col')
     sum_all_cols['int_vars'] = int_vars
     copy_date_vars = copy.deepcopy(date_vars)
     for date_var in copy_date_vars:
         #### This test is to make sure date vars are actually date vars
-        try:
-            pd.to_datetime(train[date_var], infer_datetime_format=True)
-        except:
+        if not is_date(date_var):
             ##### if not a date var, then just add it to delete it from processing
             cols_delete.append(date_var)
             date_vars.remove(date_var)
@@ -216,70 +438,64 @@ def classify_columns(df_preds, verbose=0):
     sum_all_cols['id_vars'] = id_vars
     sum_all_cols['cols_delete'] = cols_delete
     ## This is an EXTREMELY complicated logic for cat vars. Don't change it unless you test it many times!
-    var_df['numeric'] = 0
-    float_or_cat = var_df.apply(lambda x: 1 if x['type_of_column'] in ['float16',
-                                                                       'float32', 'float64'] else 0,
-                                axis=1)
+    float_or_cat = [x for x in train_cols if dtype_name(x) in FLOAT_DTYPES]
     #######  We need to make sure there are no categorical vars in float #######
-    if len(var_df.loc[float_or_cat == 1]) > 0:
-        for col in var_df.loc[float_or_cat == 1]['index'].values.tolist():
-            if 2 < len(train[col].value_counts()) <= len(
-                    train) and len(train[col].value_counts()
-                                   ) <= float_limit:
-                var_df.loc[var_df['index'] == col, 'cat'] = 1
-            else:
-                if col not in (num_bool_vars + factor_vars):
-                    var_df.loc[var_df['index'] == col, 'numeric'] = 1
-    cat_vars = list(var_df[(var_df['cat'] == 1)]['index'])
-    continuous_vars = list(var_df[(var_df['numeric'] == 1)]['index'])
+    for col in float_or_cat:
+        if 2 < profiles[col].nunique <= n_rows and profiles[col].nunique <= float_limit:
+            flags['cat'].add(col)
+        else:
+            if col not in (num_bool_vars + factor_vars):
+                flags['numeric'].add(col)
+    cat_vars = flagged('cat')
+    continuous_vars = flagged('numeric')
 
     ########  V E R Y    I M P O R T A N T   ###################################################
     cat_vars_copy = copy.deepcopy(factor_vars)
     for cat in cat_vars_copy:
-        if df_preds[cat].dtype == float:
+        if profiles[cat].dtype == float:
             continuous_vars.append(cat)
             factor_vars.remove(cat)
-            var_df.loc[var_df['index'] == cat, 'dcat'] = 0
-            var_df.loc[var_df['index'] == cat, 'numeric'] = 1
-        elif len(df_preds[cat].value_counts()) == df_preds.shape[0]:
+            flags['dcat'].discard(cat)
+            flags['numeric'].add(cat)
+        elif profiles[cat].nunique == n_rows:
             id_vars.append(cat)
             factor_vars.remove(cat)
-            var_df.loc[var_df['index'] == cat, 'dcat'] = 0
-            var_df.loc[var_df['index'] == cat, 'id_col'] = 1
+            flags['dcat'].discard(cat)
+            flags['id_col'].add(cat)
 
     sum_all_cols['factor_vars'] = factor_vars
     ##### There are a couple of extra tests you need to do to remove aberrations in cat_vars ###
     cat_vars_copy = copy.deepcopy(cat_vars)
     for cat in cat_vars_copy:
-        if df_preds[cat].dtype == float:
+        if profiles[cat].dtype == float:
             continuous_vars.append(cat)
             cat_vars.remove(cat)
-            var_df.loc[var_df['index'] == cat, 'cat'] = 0
-            var_df.loc[var_df['index'] == cat, 'numeric'] = 1
-        elif len(df_preds[cat].value_counts()) == df_preds.shape[0]:
+            flags['cat'].discard(cat)
+            flags['numeric'].add(cat)
+        elif profiles[cat].nunique == n_rows:
             id_vars.append(cat)
             cat_vars.remove(cat)
-            var_df.loc[var_df['index'] == cat, 'cat'] = 0
-            var_df.loc[var_df['index'] == cat, 'id_col'] = 1
+            flags['cat'].discard(cat)
+            flags['id_col'].add(cat)
     sum_all_cols['cat_vars'] = cat_vars
     sum_all_cols['continuous_vars'] = continuous_vars
     sum_all_cols['id_vars'] = id_vars
     ###### This is where you consolidate the numbers ###########
-    var_dict_sum = dict(zip(var_df.values[:, 0], var_df.values[:, 2:].sum(1)))
-    for col, sumval in var_dict_sum.items():
+    for col in train_cols:
+        sumval = sum([col in x for x in flags.values()])
         if sumval == 0:
-            print('%s of type=%s is not classified' % (col, train[col].dtype))
+            print('%s of type=%s is not classified' % (col, profiles[col].dtype))
         elif sumval > 1:
-            print('%s of type=%s is classified into more then one type' % (col, train[col].dtype))
+            print('%s of type=%s is classified into more then one type' % (col, profiles[col].dtype))
         else:
             pass
     ##### If there are more than 1000 unique values, then add it to NLP vars ###
     copy_discretes = copy.deepcopy(discrete_string_vars)
     for each_discrete in copy_discretes:
-        if train[each_discrete].nunique() >= 1000:
+        if filled_nunique[each_discrete] >= 1000:
             nlp_vars.append(each_discrete)
             discrete_string_vars.remove(each_discrete)
-        elif 100 < train[each_discrete].nunique() < 1000:
+        elif 100 < filled_nunique[each_discrete] < 1000:
             pass
         else:
             ### If it is less than 100 unique values, then make it categorical var
@@ -327,9 +543,9 @@ def classify_columns(df_preds, verbose=0):
             len_sum_all_cols, orig_cols_total))
         ls = sum_all_cols.values()
         flat_list = [item for sublist in ls for item in sublist]
-        if len(left_subtract(list(train), flat_list)) == 0:
+        if len(left_subtract(train_cols, flat_list)) == 0:
             print(' Missing columns = None')
         else:
-            print(' Missing columns = %s' % left_subtract(list(train), flat_list))
+            print(' Missing columns = %s' % left_subtract(train_cols, flat_list))
     return sum_all_cols
 ####################################################################################
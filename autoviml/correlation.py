@@ -0,0 +1,171 @@
+import numpy as np
+import pandas as pd
+
+###############################################################################################
+####  Finds pairs of highly correlated variables without building the full correlation    ####
+####  matrix. Columns are standardized once into float32 and multiplied block by block.   ####
+####  Only pairs whose absolute correlation is at least corr_limit are kept. So memory is  ####
+####  the standardized data plus one block of correlations plus the pairs found, instead  ####
+####  of all p * p correlations and their sort.                                            ####
+####  find_correlated_pairs_approx compares short random sketches of the columns instead  ####
+####  and verifies only the candidate pairs it finds. Use it with 100,000+ columns.        ####
+####  method='spearman' ranks each block of columns before standardizing it, so the same   ####
+####  kernels find pairs with high rank (Spearman) correlation.                            ####
+####  iter_correlated_pairs streams pairs one block at a time. Use it when there are too   ####
+####  many pairs to keep in one dataframe.                                                  ####
+###############################################################################################
+CORR_BLOCK_SIZE = 1024
+CORR_METHODS = ['pearson', 'spearman']
+APPROX_SKETCH_SIZE = 256
+VERIFY_CHUNK_SIZE = 10000
+
+
+def check_corr_method(method):
+    """
+    Raises a ValueError if method is not one of the correlation methods in CORR_METHODS.
+    """
+    if method not in CORR_METHODS:
+        raise ValueError('corr_method must be one of %s: got %s' % (CORR_METHODS, method))
+
+
+def standardize_columns(df, dtype=np.float32, method='pearson'):
+    """
+    Returns the columns of df as an array of dtype with mean 0 and length (norm) 1, so that the dot
+    product of two columns is their Pearson correlation. Means and norms are found in float64.
+    With method='spearman' each column is replaced by its ranks first (ties get their average rank),
+    so the dot product of two columns is their Spearman correlation.
+    Constant columns become all zeros: their correlation with every other column is then 0.
+    Columns are converted a block at a time so that no float64 copy of the whole data is made.
+    """
+    check_corr_method(method)
+    n_cols = df.shape[1]
+    standardized = np.empty(df.shape, dtype=dtype)
+    for start in range(0, n_cols, CORR_BLOCK_SIZE):
+        block = df.iloc[:, start:start + CORR_BLOCK_SIZE]
+        if method == 'spearman':
+            block = block.rank()
+        values = block.values.astype(np.float64)
+        values -= values.mean(axis=0)
+        norms = np.sqrt((values ** 2).sum(axis=0))
+        norms[norms == 0] = np.inf
+        standardized[:, start:start + CORR_BLOCK_SIZE] = values / norms
+    return standardized
+
+
+def _block_pairs_above(corr, start, threshold):
+    #### Returns (col1, col2, abs value) arrays of the cells of a block of rows (from row start) of a
+    ####   symmetric matrix that are right of the diagonal and at least threshold in absolute value.
+    ####   The block holds columns start onwards, so its own diagonal starts at its first cell.
+    corr = np.abs(corr)
+    corr[np.tril_indices(corr.shape[0], m=corr.shape[1])] = 0
+    rows, cols = np.nonzero(corr >= threshold)
+    return start + rows, start + cols, corr[rows, cols].astype(np.float64)
+
+
+def _iter_pairs_above(values, threshold, block_size=CORR_BLOCK_SIZE):
+    #### Yields (col1, col2, abs dot product) arrays of all pairs of columns of values whose dot product
+    ####   is at least threshold in absolute value. Only blocks on or to the right of the diagonal are
+    ####   multiplied since the dot products are symmetric.
+    n_cols = values.shape[1]
+    for start in range(0, n_cols, block_size):
+        block = values[:, start:start + block_size]
+        rows, cols, coeff = _block_pairs_above(block.T @ values[:, start:], start, threshold)
+        if len(rows) > 0:
+            yield rows, cols, coeff
+
+
+def iter_correlated_pairs(df, corr_limit=0.70, block_size=CORR_BLOCK_SIZE, method='pearson'):
+    """
+    Yields (var1, var2, coeff) arrays for each block of columns: every pair of columns of df whose
+    absolute correlation (method is 'pearson' or 'spearman') is at least corr_limit. var1 comes before
+    var2 in df.columns and coeff is the absolute correlation. df must have only numeric columns
+    without missing values.
+    """
+    columns = np.array(df.columns, dtype=object)
+    values = standardize_columns(df, method=method)
+    for rows, cols, coeff in _iter_pairs_above(values, corr_limit, block_size):
+        yield columns[rows], columns[cols], coeff
+
+
+def find_correlated_pairs(df, corr_limit=0.70, block_size=CORR_BLOCK_SIZE, method='pearson'):
+    """
+    Returns a dataframe of var1, var2, coeff with every pair of columns of df whose absolute
+    correlation is at least corr_limit, sorted by coeff. See iter_correlated_pairs for details.
+    """
+    return _collect_pairs(iter_correlated_pairs(df, corr_limit, block_size, method))
+
+
+def iter_matrix_pairs(correlation_dataframe, corr_limit=0.70, block_size=CORR_BLOCK_SIZE):
+    """
+    Yields (var1, var2, coeff) arrays for each block of rows of a correlation matrix that is already
+    computed (such as df.corr()): every pair whose absolute correlation is at least corr_limit.
+    """
+    columns = np.array(correlation_dataframe.columns, dtype=object)
+    values = correlation_dataframe.values
+    for start in range(0, len(columns), block_size):
+        rows, cols, coeff = _block_pairs_above(values[start:start + block_size, start:], start, corr_limit)
+        if len(rows) > 0:
+            yield columns[rows], columns[cols], coeff
+
+
+def _collect_pairs(pair_blocks):
+    #### Concatenates (var1, var2, coeff) blocks into one dataframe sorted by coeff
+    var1, var2, coeff = [], [], []
+    for block_var1, block_var2, block_coeff in pair_blocks:
+        var1.append(block_var1)
+        var2.append(block_var2)
+        coeff.append(block_coeff)
+    if len(var1) == 0:
+        return pd.DataFrame({'var1': [], 'var2': [], 'coeff': []})
+    pairs = pd.DataFrame({'var1': np.concatenate(var1), 'var2': np.concatenate(var2),
+                          'coeff': np.concatenate(coeff)})
+    return pairs.sort_values('coeff', kind='mergesort').reset_index(drop=True)
+
+
+def find_correlated_pairs_approx(df, corr_limit=0.70, recall=0.99, sketch_size=APPROX_SKETCH_SIZE,
+                                 block_size=CORR_BLOCK_SIZE, random_state=99, method='pearson'):
+    """
+    ###########################################################################################
+    ####  Approximate version of find_correlated_pairs for data with very many columns.      ####
+    ####  Each standardized column is projected on sketch_size random Gaussian directions    ####
+    ####  and the projection is scaled to length 1. The dot product of two sketches then     ####
+    ####  estimates the correlation of the two columns with an error (standard deviation) of ####
+    ####  about (1 - r ** 2) / sqrt(sketch_size). Pairs whose estimate is within a margin of  ####
+    ####  corr_limit become candidates and only those are verified with their exact          ####
+    ####  correlation. So the cost is p * p * sketch_size instead of p * p * rows.            ####
+    ####  recall: chance that a pair at corr_limit is found. A higher recall uses a wider     ####
+    ####     margin: more candidates are verified so it is slower but misses fewer pairs.   ####
+    ####  sketch_size: more directions give better estimates and fewer candidates but take   ####
+    ####     longer to compare. It only pays off when sketch_size is well below the rows.    ####
+    ####  method: 'pearson' or 'spearman'. Spearman sketches are built from ranked columns.  ####
+    ####  Returns the dataframe of pairs (same as find_correlated_pairs) and a dict report   ####
+    ####  with the number of candidates verified and the number of pairs kept.             ####
+    ###########################################################################################
+    """
+    from scipy.stats import norm
+    columns = np.array(df.columns, dtype=object)
+    values = standardize_columns(df, method=method)
+    rng = np.random.RandomState(random_state)
+    directions = rng.randn(values.shape[0], sketch_size).astype(np.float32)
+    sketches = (values.T @ directions).T
+    lengths = np.sqrt((sketches ** 2).sum(axis=0))
+    lengths[lengths == 0] = np.inf
+    sketches /= lengths
+    margin = norm.ppf(recall) * (1 - corr_limit ** 2) / np.sqrt(sketch_size)
+    report = {'candidates_verified': 0, 'pairs': 0, 'recall': recall, 'sketch_size': sketch_size,
+              'candidate_limit': max(0.0, corr_limit - margin)}
+
+    def verify(candidate_blocks):
+        for rows, cols, estimate in candidate_blocks:
+            report['candidates_verified'] += len(rows)
+            #### Exact correlations of the candidates only. Done in chunks to limit memory.
+            for start in range(0, len(rows), VERIFY_CHUNK_SIZE):
+                chunk_rows = rows[start:start + VERIFY_CHUNK_SIZE]
+                chunk_cols = cols[start:start + VERIFY_CHUNK_SIZE]
+                coeff = np.abs(np.einsum('ij,ij->j', values[:, chunk_rows], values[:, chunk_cols]))
+                keep = coeff >= corr_limit
+                report['pairs'] += int(keep.sum())
+                yield columns[chunk_rows[keep]], columns[chunk_cols[keep]], coeff[keep].astype(np.float64)
+    pairs = _collect_pairs(verify(_iter_pairs_above(sketches, report['candidate_limit'], block_size)))
+    return pairs, report
+###############################################################################################
@@ -0,0 +1,106 @@
+import functools
+import inspect
+
+###############################################################################################
+####  One budget of CPUs for a whole Auto_ViML run. Without it, searches run n_jobs=-1     ####
+####  processes and every model in them also starts n_jobs=-1 threads (plus BLAS and       ####
+####  OpenMP threads), so a machine with c cores runs about c * c threads and thrashes.    ####
+####  CPUBudget(n_cpus) splits the budget instead:                                         ####
+####     split(n_tasks): the outer loop (a search or cross validation) gets up to n_cpus   ####
+####         workers and each model fitted by a worker gets the cores left over.           ####
+####     set_estimator_threads(estimator, n): sets the threads of a model (n_jobs, nthread ####
+####         or thread_count, also inside wrappers such as MultiOutputRegressor).          ####
+####     limit(): limits BLAS and OpenMP threads of this process to n_cpus and those of    ####
+####         joblib worker processes to 1, so any model left at n_jobs=-1 stays in budget. ####
+####  use_cpu_budget is a decorator that runs a function with an n_cpus argument (such as  ####
+####  Auto_ViML) inside limit().                                                           ####
+###############################################################################################
+THREAD_PARAMS = ['n_jobs', 'nthread', 'thread_count']
+
+
+def find_n_cpus(n_cpus=None):
+    """
+    Returns the number of CPUs in a budget. None means all the CPUs this process may use. Negative
+    numbers count back from there as in joblib: -1 is all of them and -2 all but one. A budget is
+    never more than the CPUs this process may use.
+    """
+    from joblib import cpu_count
+    available = cpu_count()
+    if n_cpus is None:
+        return available
+    if n_cpus < 0:
+        return max(1, available + 1 + n_cpus)
+    return max(1, min(available, int(n_cpus)))
+
+
+def set_estimator_threads(estimator, n_threads):
+    """
+    Sets every thread parameter (see THREAD_PARAMS) of estimator that is not None to n_threads and
+    returns it. In wrappers (such as OneVsRestClassifier) the inner model gets the threads and the
+    wrapper itself runs one job, so that threads are not multiplied.
+    """
+    params = estimator.get_params()
+    names = [k for k in params if k.split('__')[-1] in THREAD_PARAMS and params[k] is not None]
+    nested = [k for k in names if '__' in k]
+    settings = dict([(k, n_threads if (k in nested or len(nested) == 0) else 1) for k in names])
+    if type(estimator).__name__.startswith('CatBoost'):
+        #### CatBoost only shows the parameters that were set. It uses all cores unless told otherwise.
+        settings['thread_count'] = n_threads
+    if len(settings) > 0:
+        estimator.set_params(**settings)
+    return estimator
+
+
+class CPUBudget(object):
+    """
+    ###########################################################################################
+    ####  CPUBudget(n_cpus=None) shares n_cpus CPUs between outer workers and inner        ####
+    ####  threads (see above). n_cpus=None uses all the CPUs of this machine.              ####
+    ###########################################################################################
+    """
+    def __init__(self, n_cpus=None):
+        self.n_cpus = find_n_cpus(n_cpus)
+
+    def split(self, n_tasks):
+        """
+        Returns (workers, threads): how many of n_tasks independent fits run at a time and how many
+        threads each of them may use.
+        """
+        workers = max(1, min(self.n_cpus, int(n_tasks)))
+        return workers, max(1, self.n_cpus // workers)
+
+    def set_threads(self, estimator, n_threads=None):
+        """
+        Sets the threads of estimator to n_threads (the whole budget if not given) and returns it.
+        """
+        return set_estimator_threads(estimator, self.n_cpus if n_threads is None else n_threads)
+
+    def limit(self):
+        """
+        Returns a context manager that keeps BLAS and OpenMP threads of this process within the
+        budget and those of joblib worker processes to 1 while it is open.
+        """
+        from contextlib import ExitStack
+        from joblib import parallel_backend
+        from threadpoolctl import threadpool_limits
+        stack = ExitStack()
+        stack.enter_context(threadpool_limits(limits=self.n_cpus))
+        #### n_jobs=1 keeps Parallel(n_jobs=None) running in one process as it does by default
+        stack.enter_context(parallel_backend('loky', n_jobs=1, inner_max_num_threads=1))
+        return stack
+
+
+def use_cpu_budget(func):
+    """
+    Decorator that runs func inside CPUBudget(n_cpus).limit(), where n_cpus is an argument of func.
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        arguments = signature.bind(*args, **kwargs)
+        arguments.apply_defaults()
+        with CPUBudget(arguments.arguments['n_cpus']).limit():
+            return func(*args, **kwargs)
+    return wrapper
+###############################################################################################
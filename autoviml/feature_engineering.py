@@ -328,6 +328,7 @@ from scipy.stats import skew, kurtosis
 from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.tree import DecisionTreeRegressor, DecisionTreeClassifier
 from sklearn.metrics import mean_squared_error, accuracy_score
+from autoviml.row_sampling import RowSampler, use_row_sampling, find_stable_selection
 
 class EntropyBinningTransformer(BaseEstimator, TransformerMixin):
     """
@@ -372,6 +373,8 @@ class EntropyBinningTransformer(BaseEstimator, TransformerMixin):
     - min_samples_leaf: The minimum number of samples required to be at a leaf node of the decision trees.
     - entropy_binning: Whether to apply entropy binning.
     - modeltype: Indicates whether the target variable is for 'Regression' or 'Classification'.
+    - row_sampling: If True and the data is large, select_top_n_vars scores variables on growing samples
+         of rows until the top variables stop changing. Binning thresholds are always fit on all rows.
 
     Methods:
     - fit: Learns the binning thresholds for each variable.
@@ -396,9 +399,10 @@ class EntropyBinningTransformer(BaseEstimator, TransformerMixin):
     X_test_binned = entropy_binner.transform(X_test[top_vars])    
     #########################################################################################################
     """
-    def __init__(self, replace_vars=True, modeltype='Classification', top_n_vars=None):
+    def __init__(self, replace_vars=True, modeltype='Classification', top_n_vars=None, row_sampling=False):
         self.replace_vars = replace_vars
         self.modeltype = modeltype
+        self.row_sampling = row_sampling
         self.max_depth = 10
         self.min_samples_leaf = 2
         self.top_n_vars = top_n_vars
@@ -467,11 +471,38 @@ class EntropyBinningTransformer(BaseEstimator, TransformerMixin):
         outliers before binning can ensure that bins are more representative of the general 
         distribution of the data.
         """
-        scores = {}
         ### Select only float numeric columns to bin ###########
         numvars = X.select_dtypes(include='float').columns.tolist()
         ### Let's keep the remaining vars ######
         self.remvars = [x for x in list(X) if x not in numvars ]
+        n_top = max(n, int(X.shape[1] * 0.1), 2)
+        if use_row_sampling(X.shape[0], self.row_sampling):
+            #### Scores settle on a part of the rows. So grow a sample until the top vars stop changing
+            y_series = pd.Series(np.asarray(y).ravel())
+
+            def select_on_rows(rows):
+                scores = self._score_vars(X.iloc[rows], y_series.iloc[rows].values, numvars,
+                                          skew_threshold, kurtosis_threshold)
+                top_vars = sorted(scores, key=scores.get, reverse=True)[:n_top]
+                #### Scores can be negative (regression). So importance is the margin over the lowest score
+                lowest = min(scores.values())
+                return dict([(x, scores[x] - lowest) for x in top_vars])
+            top_n_vars, _ = find_stable_selection(select_on_rows, RowSampler(y_series, self.modeltype),
+                                                  len(numvars))
+        else:
+            scores = self._score_vars(X, y, numvars, skew_threshold, kurtosis_threshold)
+            # Sort the variables based on the scores and select the top n
+            top_n_vars = sorted(scores, key=scores.get, reverse=True)[:n_top]
+
+        self.remvars += [x for x in numvars if x not in top_n_vars ]
+        return top_n_vars
+
+    def _score_vars(self, X, y, numvars, skew_threshold=1.5, kurtosis_threshold=3):
+        """
+        Scores each variable in numvars by the fit of a one variable decision tree, adjusted
+        for skewness and kurtosis. Returns a dict of variable name to score.
+        """
+        scores = {}
         for col in numvars:
             X_col = X[col].values.reshape(-1, 1)
 
@@ -502,12 +533,7 @@ class EntropyBinningTransformer(BaseEstimator, TransformerMixin):
                 scores[col] = score * (1 + abs(skewness) + abs(kurt))
             else:
                 scores[col] = score
-
-        # Sort the variables based on the scores and select the top n
-        top_n_vars = sorted(scores, key=scores.get, reverse=True)[:max(n, int(X.shape[1] * 0.1), 2)]
-
-        self.remvars += [x for x in numvars if x not in top_n_vars ]
-        return top_n_vars
+        return scores
 
     def transform(self, X):
         """
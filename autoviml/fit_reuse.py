@@ -0,0 +1,81 @@
+import numpy as np
+
+###############################################################################################
+####  Reuses the models fitted during the search instead of training again from scratch.   ####
+####  Without it, Auto_ViML fits the best model on X_train, then calibrates it with        ####
+####  n_splits more fits on X_train + X_cv (multi-class), and then fits it all over again  ####
+####  (n_splits times again when calibrated) on the full train data.                       ####
+####     find_oof_probabilities: the calibrated folds already hold a model per fold. Each  ####
+####         row is predicted by the fold model that did not see it. These out of fold     ####
+####         predictions give held out metrics and the folds average into the final model. ####
+####     continue_training: the best model of the search keeps training on the full train  ####
+####         data (warm start) instead of a new fit. Tree ensembles add a share of trees   ####
+####         and other models with warm_start start their solver from the fitted weights.  ####
+###############################################################################################
+#### Models that continue training add at least this many trees
+REUSE_MIN_TREES = 10
+
+
+def find_oof_probabilities(calibrated, X, y):
+    """
+    Returns the out of fold class probabilities of every row of X from a CalibratedClassifierCV that
+    was fitted on X, y with an integer cv: each row is predicted by the model of the fold that held
+    it out. The folds are found again with the same splitter as the fit used.
+    """
+    from sklearn.model_selection import check_cv
+    folds = check_cv(calibrated.cv, y, classifier=True)
+    proba = np.zeros((len(y), len(calibrated.classes_)))
+    for fold_model, (_, test_rows) in zip(calibrated.calibrated_classifiers_, folds.split(X, y)):
+        X_test = X.iloc[test_rows] if hasattr(X, 'iloc') else X[test_rows]
+        proba[test_rows] = fold_model.predict_proba(X_test)
+    return proba
+
+
+def can_continue_training(model):
+    """
+    Returns True if model is fitted and can keep training from where it stopped (see continue_training).
+    """
+    if type(model).__name__.startswith('XGB'):
+        try:
+            model.get_booster()
+            return True
+        except Exception:
+            return False
+    if 'warm_start' not in model.get_params():
+        return False
+    return hasattr(model, 'estimators_') or hasattr(model, 'coef_')
+
+
+def continue_training(model, X, y, share):
+    """
+    Continues training a fitted model on X, y (the full train data) and returns it. share is the part
+    of X the model has not seen yet (such as len(X_cv) / len(X)):
+        XGBoost adds share of its trees (at least REUSE_MIN_TREES) to the booster. If the model was
+            early stopped, only the trees up to the best iteration are kept.
+        Tree ensembles with warm_start (forests) add share of their trees trained on X.
+        Other models with warm_start (linear models) refit on X starting from their fitted weights.
+    """
+    if type(model).__name__.startswith('XGB'):
+        booster = model.get_booster()
+        best_iteration = getattr(model, 'best_iteration', None)
+        if best_iteration is not None:
+            booster = booster[:best_iteration + 1]
+        n_trees = booster.num_boosted_rounds()
+        extra = max(REUSE_MIN_TREES, int(round(n_trees * share)))
+        model.set_params(n_estimators=extra)
+        if 'early_stopping_rounds' in model.get_params():
+            model.set_params(early_stopping_rounds=None)
+        model.fit(X, y, xgb_model=booster, verbose=False)
+        #### The booster now has all the trees. n_estimators tells the same for anyone reading it.
+        model.set_params(n_estimators=n_trees + extra)
+        return model
+    warm_start = model.get_params()['warm_start']
+    if hasattr(model, 'estimators_'):
+        extra = max(REUSE_MIN_TREES, int(round(model.n_estimators * share)))
+        model.set_params(warm_start=True, n_estimators=model.n_estimators + extra)
+    else:
+        model.set_params(warm_start=True)
+    model.fit(X, y)
+    model.set_params(warm_start=warm_start)
+    return model
+###############################################################################################
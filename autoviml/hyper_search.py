@@ -0,0 +1,377 @@
+import numpy as np
+
+###############################################################################################
+####  Bayesian hyper parameter search used by Auto_ViML when hyper_param='HO'.             ####
+####  TPESearchCV takes the same parameter spaces as RandomizedSearchCV (lists of values,  ####
+####  or scipy distributions such as uniform and randint) and the same scoring and cv.     ####
+####  Instead of drawing every candidate at random, it uses a Tree-structured Parzen       ####
+####  Estimator (TPE): after a few random trials, the trials are split into the best       ####
+####  gamma share ("good") and the rest ("bad"). A density is fitted to the values of each ####
+####  parameter in each group and the next candidate is the one among many draws from the  ####
+####  good density with the highest ratio of good density to bad density.                  ####
+####  Trials are stopped early (median stopping): after each fold, a trial whose mean      ####
+####  score so far is below the median of the completed trials at that fold is stopped.    ####
+####  The search also ends when the best score has not improved in patience trials.        ####
+####  With n_jobs other than 1, a batch of candidates is run at a time in a process pool.  ####
+####  After the search the best parameters are refit on all the data, as in sklearn.       ####
+####  make_halving_search builds the successive halving search for hyper_param='SH'.       ####
+####  All candidates first get a small budget. Only the best 1 / factor of them go on to a ####
+####  budget factor times bigger, and so on until the survivors get the full budget. The   ####
+####  budget (resource) is the number of trees of boosted and forest models and the number ####
+####  of rows for the rest.                                                                ####
+###############################################################################################
+#### Share of trials (best first) used as the good group
+TPE_GAMMA = 0.25
+#### Number of draws from the good density for each candidate picked
+TPE_CANDIDATES = 24
+#### Random trials before the TPE starts picking candidates
+TPE_STARTUP_TRIALS = 5
+#### Weight of the uniform prior in each density, where each trial has a weight of 1
+TPE_PRIOR_WEIGHT = 1.0
+#### Trials are stopped early only when at least this many trials were completed
+TPE_MIN_COMPLETED = 3
+#### The search ends when the best score has not improved in this many trials
+TPE_PATIENCE = 10
+#### Successive halving keeps the best 1 / HALVING_FACTOR of the candidates in each round
+HALVING_FACTOR = 3
+#### Parameters for the number of trees that are used as the budget of successive halving
+HALVING_RESOURCES = ['n_estimators', 'iterations']
+
+
+class _NumericDimension(object):
+    #### A parameter whose values are ordered: a scipy distribution, or a list of numbers that is
+    ####   searched through the positions of its sorted values.
+    def __init__(self, low, high, integer=False, values=None, dist=None):
+        self.low = float(low)
+        self.high = float(high)
+        self.integer = integer
+        self.values = values
+        self.dist = dist
+
+    def sample_prior(self, rng, n):
+        if self.dist is not None:
+            return np.array([self.encode(x) for x in np.atleast_1d(self.dist.rvs(size=n, random_state=rng))])
+        if self.values is not None:
+            return rng.randint(0, len(self.values), n).astype(np.float64)
+        return rng.uniform(self.low, self.high, n)
+
+    def encode(self, value):
+        if self.values is not None:
+            return float(np.argmin(np.abs(np.asarray(self.values, dtype=np.float64) - value)))
+        return float(value)
+
+    def decode(self, x):
+        x = min(max(x, self.low), self.high)
+        if self.values is not None:
+            return self.values[int(round(x))]
+        if self.integer:
+            return int(round(x))
+        return float(x)
+
+    def _parzen(self, observed):
+        #### Each observed value gets a gaussian whose width is the larger gap to its neighbours
+        mus = np.sort(np.asarray(observed, dtype=np.float64))
+        width = self.high - self.low
+        bounds = np.r_[self.low, mus, self.high]
+        sigmas = np.maximum(mus - bounds[:-2], bounds[2:] - mus)
+        sigmas = np.clip(sigmas, width / min(100.0, 1.0 + len(mus)), width)
+        return mus, sigmas
+
+    def sample(self, rng, observed, n):
+        mus, sigmas = self._parzen(observed)
+        weights = np.r_[np.ones(len(mus)), TPE_PRIOR_WEIGHT]
+        components = rng.choice(len(weights), size=n, p=weights / weights.sum())
+        draws = rng.uniform(self.low, self.high, n)
+        gaussian = components < len(mus)
+        draws[gaussian] = rng.normal(mus[components[gaussian]], sigmas[components[gaussian]])
+        return np.clip(draws, self.low, self.high)
+
+    def log_density(self, points, observed):
+        width = self.high - self.low
+        if width <= 0:
+            return np.zeros(len(points))
+        mus, sigmas = self._parzen(observed)
+        z = (points[:, None] - mus[None, :]) / sigmas[None, :]
+        density = (np.exp(-0.5 * z ** 2) / (sigmas[None, :] * np.sqrt(2 * np.pi))).sum(axis=1)
+        density += TPE_PRIOR_WEIGHT / width
+        return np.log(density) - np.log(len(mus) + TPE_PRIOR_WEIGHT)
+
+
+class _ChoiceDimension(object):
+    #### A parameter whose values have no order, such as solvers or class weights
+    def __init__(self, choices):
+        self.choices = choices
+
+    def sample_prior(self, rng, n):
+        return rng.randint(0, len(self.choices), n).astype(np.float64)
+
+    def decode(self, x):
+        return self.choices[int(x)]
+
+    def _probabilities(self, observed):
+        counts = np.bincount(np.asarray(observed, dtype=np.int64), minlength=len(self.choices))
+        return (counts + TPE_PRIOR_WEIGHT) / (counts.sum() + TPE_PRIOR_WEIGHT * len(self.choices))
+
+    def sample(self, rng, observed, n):
+        return rng.choice(len(self.choices), size=n, p=self._probabilities(observed)).astype(np.float64)
+
+    def log_density(self, points, observed):
+        return np.log(self._probabilities(observed)[points.astype(np.int64)])
+
+
+def make_dimension(values):
+    """
+    Returns the search dimension of one entry of a parameter space: a scipy distribution becomes a
+    numeric dimension over its support, a list of numbers becomes a numeric dimension over its sorted
+    values and any other list becomes a choice.
+    """
+    if hasattr(values, 'rvs'):
+        from scipy.stats import rv_discrete
+        low, high = values.support()
+        if not np.isfinite(low) or not np.isfinite(high):
+            low, high = values.ppf(0.001), values.ppf(0.999)
+        return _NumericDimension(low, high, integer=isinstance(values.dist, rv_discrete), dist=values)
+    values = list(values)
+    numeric = [isinstance(x, (int, float, np.number)) and not isinstance(x, (bool, np.bool_)) for x in values]
+    if len(values) > 1 and all(numeric):
+        values = np.unique(values).tolist()
+        return _NumericDimension(0, len(values) - 1, integer=True, values=values)
+    return _ChoiceDimension(values)
+
+
+def _run_trial(estimator, params, X, y, folds, scorer, fit_params, stop_scores, return_train_score):
+    #### Fits and scores one candidate fold by fold. stop_scores (one per fold) stops the trial once its
+    ####   mean test score so far is below the stop score of that fold. A fit that errors ends the trial.
+    from sklearn.base import clone
+    from sklearn.utils import _safe_indexing
+    result = {'test': [], 'train': [], 'stopped': False, 'error': None}
+    for fold, (train, test) in enumerate(folds):
+        X_train, y_train = _safe_indexing(X, train), _safe_indexing(y, train)
+        try:
+            model = clone(estimator).set_params(**params)
+            model.fit(X_train, y_train, **fit_params)
+            result['test'].append(scorer(model, _safe_indexing(X, test), _safe_indexing(y, test)))
+            if return_train_score:
+                result['train'].append(scorer(model, X_train, y_train))
+        except Exception as e:
+            result['error'] = str(e)
+            return result
+        if stop_scores is not None and fold < len(folds) - 1 and np.mean(result['test']) < stop_scores[fold]:
+            result['stopped'] = True
+            return result
+    return result
+
+
+def find_halving_resource(estimator, param_distributions):
+    """
+    Returns the resource, the max_resources and the param_distributions (without the resource) for a
+    successive halving search of estimator. The number of trees (n_estimators for XGBoost and forests,
+    iterations for CatBoost, also inside wrappers such as MultiOutputRegressor) is used when the
+    estimator has one. Its largest value in param_distributions (or the value set in the estimator)
+    is the full budget. Other estimators use the rows ('n_samples') as the resource.
+    """
+    estimator_params = estimator.get_params()
+    for name in estimator_params:
+        if name.split('__')[-1] not in HALVING_RESOURCES:
+            continue
+        values = param_distributions.get(name, estimator_params[name])
+        if hasattr(values, 'rvs'):
+            max_resources = values.support()[1]
+        elif np.ndim(values) > 0:
+            max_resources = max(values)
+        else:
+            max_resources = values
+        if max_resources is None or not np.isfinite(max_resources) or max_resources < HALVING_FACTOR:
+            continue
+        params = dict([(k, v) for (k, v) in param_distributions.items() if k != name])
+        return name, int(max_resources), params
+    return 'n_samples', 'auto', param_distributions
+
+
+def make_halving_search(estimator, param_distributions, n_candidates=10, scoring=None, refit=True, cv=5,
+                        random_state=None, n_jobs=None, verbose=0, factor=HALVING_FACTOR):
+    """
+    Returns sklearn's HalvingRandomSearchCV for estimator over n_candidates drawn from param_distributions.
+    The resource comes from find_halving_resource and the first round is as small as it can be while
+    the last round still gets the full budget. Any true refit (such as a metric name) refits the best.
+    """
+    from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+    from sklearn.model_selection import HalvingRandomSearchCV
+    resource, max_resources, params = find_halving_resource(estimator, param_distributions)
+    if verbose:
+        print('    Successive halving of %d candidates using %s as the budget' % (n_candidates, resource))
+    return HalvingRandomSearchCV(estimator, param_distributions=params, n_candidates=n_candidates,
+                                 factor=factor, resource=resource, max_resources=max_resources,
+                                 min_resources='exhaust', scoring=scoring, refit=bool(refit), cv=cv,
+                                 return_train_score=True, random_state=random_state, n_jobs=n_jobs,
+                                 verbose=0)
+
+
+class TPESearchCV(object):
+    """
+    ###########################################################################################
+    ####  TPESearchCV(estimator, param_distributions, n_iter, scoring, cv) searches the    ####
+    ####  parameters of estimator with a TPE (see above). Use it like RandomizedSearchCV:  ####
+    ####     fit(X, y, **fit_params) runs the search and refits the best parameters.       ####
+    ####     best_params_, best_score_, best_estimator_ and cv_results_ are as in sklearn. ####
+    ####     n_fits_ is the number of fold fits made by the search (without the refit).    ####
+    ####  n_iter: the most trials to run. patience: the search ends when the best score    ####
+    ####     has not improved in this many trials (None runs all n_iter trials).           ####
+    ####  early_stopping: stop weak trials after any fold (median stopping).               ####
+    ####  n_jobs: number of processes running trials in parallel (-1 means all cores).     ####
+    ###########################################################################################
+    """
+    def __init__(self, estimator, param_distributions, n_iter=10, scoring=None, refit=True, cv=5,
+                 return_train_score=False, random_state=None, n_jobs=None, verbose=0,
+                 patience=TPE_PATIENCE, early_stopping=True):
+        self.estimator = estimator
+        self.param_distributions = param_distributions
+        self.n_iter = n_iter
+        self.scoring = scoring
+        self.refit = refit
+        self.cv = cv
+        self.return_train_score = return_train_score
+        self.random_state = random_state
+        self.n_jobs = n_jobs
+        self.verbose = verbose
+        self.patience = patience
+        self.early_stopping = early_stopping
+
+    def _suggest(self, trials, rng, n, seen):
+        #### Returns n new points (one value per dimension). Random until there are enough trials.
+        n_startup = min(TPE_STARTUP_TRIALS, max(2, self.n_iter // 3))
+        points = []
+        if len(trials) >= n_startup:
+            scores = np.array([x['score'] for x in trials])
+            order = np.argsort(-scores, kind='mergesort')
+            n_good = max(1, int(np.ceil(TPE_GAMMA * len(trials))))
+            good, bad = order[:n_good], order[n_good:]
+            n_draws = TPE_CANDIDATES * n
+            draws = np.empty((n_draws, len(self.dimensions_)))
+            gain = np.zeros(n_draws)
+            for i, dim in enumerate(self.dimensions_):
+                good_x = [trials[j]['point'][i] for j in good]
+                bad_x = [trials[j]['point'][i] for j in bad]
+                draws[:, i] = dim.sample(rng, good_x, n_draws)
+                gain += dim.log_density(draws[:, i], good_x) - dim.log_density(draws[:, i], bad_x)
+            for row in np.argsort(-gain, kind='mergesort'):
+                key = repr(self._decode(draws[row]))
+                if key not in seen:
+                    seen.add(key)
+                    points.append(draws[row])
+                if len(points) == n:
+                    return points
+        #### Random points from the prior fill the rest. Repeats of earlier points are skipped if possible.
+        for attempt in range(100 * n):
+            if len(points) == n:
+                return points
+            point = np.array([dim.sample_prior(rng, 1)[0] for dim in self.dimensions_])
+            key = repr(self._decode(point))
+            if key not in seen:
+                seen.add(key)
+                points.append(point)
+        while len(points) < n:
+            points.append(np.array([dim.sample_prior(rng, 1)[0] for dim in self.dimensions_]))
+        return points
+
+    def _decode(self, point):
+        return dict([(name, dim.decode(x)) for (name, dim, x) in zip(self.names_, self.dimensions_, point)])
+
+    def _stop_scores(self, trials, n_folds):
+        #### Median of the running mean test scores of the completed trials after each fold
+        if not self.early_stopping:
+            return None
+        completed = [x['test'] for x in trials if not x['stopped'] and x['error'] is None]
+        if len(completed) < TPE_MIN_COMPLETED:
+            return None
+        running = np.cumsum(np.array(completed), axis=1) / np.arange(1, n_folds + 1)
+        return np.median(running, axis=0)
+
+    def fit(self, X, y=None, **fit_params):
+        from joblib import Parallel, delayed, effective_n_jobs
+        from sklearn.base import clone, is_classifier
+        from sklearn.metrics import check_scoring
+        from sklearn.model_selection import check_cv
+        scorer = check_scoring(self.estimator, scoring=self.scoring)
+        folds = list(check_cv(self.cv, y, classifier=is_classifier(self.estimator)).split(X, y))
+        self.names_ = list(self.param_distributions)
+        self.dimensions_ = [make_dimension(self.param_distributions[x]) for x in self.names_]
+        rng = np.random.RandomState(self.random_state)
+        n_workers = min(effective_n_jobs(self.n_jobs), self.n_iter)
+        trials = []
+        seen = set()
+        best_score, best_trial = -np.inf, 0
+        while len(trials) < self.n_iter:
+            points = self._suggest(trials, rng, min(n_workers, self.n_iter - len(trials)), seen)
+            stop_scores = self._stop_scores(trials, len(folds))
+            results = Parallel(n_jobs=min(n_workers, len(points)))(delayed(_run_trial)(
+                self.estimator, self._decode(x), X, y, folds, scorer, fit_params, stop_scores,
+                self.return_train_score) for x in points)
+            for point, result in zip(points, results):
+                #### Stopped trials keep the mean of the folds they ran. Failed trials score lowest.
+                result['point'] = point
+                result['params'] = self._decode(point)
+                result['score'] = np.mean(result['test']) if result['error'] is None else -np.inf
+                trials.append(result)
+                if result['error'] is not None:
+                    print('    Trial with %s failed due to %s' % (result['params'], result['error']))
+                elif not result['stopped'] and result['score'] > best_score:
+                    best_score, best_trial = result['score'], len(trials) - 1
+            if self.verbose:
+                print('    TPE trials done = %d, best score so far = %0.4f' % (len(trials), best_score))
+            if self.patience is not None and len(trials) - 1 - best_trial >= self.patience:
+                break
+        completed = [x for x in trials if not x['stopped'] and x['error'] is None]
+        if len(completed) == 0:
+            raise ValueError('All %d trials of the TPE search failed. Last error: %s' % (
+                len(trials), trials[-1]['error']))
+        self.n_fits_ = sum([len(x['test']) + (x['error'] is not None) for x in trials])
+        self.cv_results_ = self._make_results(trials)
+        best = trials[best_trial]
+        self.best_index_ = best_trial
+        self.best_params_ = best['params']
+        self.best_score_ = best_score
+        if self.verbose:
+            n_stopped = len([x for x in trials if x['stopped']])
+            print('    TPE search ran %d trials (%d stopped early) using %d of %d fold fits' % (
+                len(trials), n_stopped, self.n_fits_, len(trials) * len(folds)))
+        if self.refit:
+            self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_)
+            self.best_estimator_.fit(X, y, **fit_params)
+        return self
+
+    def _make_results(self, trials):
+        results = {'params': [x['params'] for x in trials]}
+        for name in self.names_:
+            results['param_' + name] = np.ma.MaskedArray([x['params'][name] for x in trials], dtype=object)
+        scores = np.array([np.mean(x['test']) if len(x['test']) > 0 else np.nan for x in trials])
+        results['mean_test_score'] = scores
+        results['std_test_score'] = np.array([np.std(x['test']) if len(x['test']) > 0 else np.nan for x in trials])
+        if self.return_train_score:
+            results['mean_train_score'] = np.array([np.mean(x['train']) if len(x['train']) > 0 else np.nan
+                                                    for x in trials])
+        results['n_folds_run'] = np.array([len(x['test']) for x in trials])
+        results['stopped_early'] = np.array([x['stopped'] for x in trials])
+        #### Trials stopped early only have the mean of some folds. They rank after all finished trials
+        ####   and failed trials rank last.
+        groups = np.array([2 if x['error'] is not None else int(x['stopped']) for x in trials])
+        order = np.lexsort((-np.nan_to_num(scores, nan=-np.inf), groups))
+        ranks = np.empty(len(trials), dtype=np.int64)
+        ranks[order] = np.arange(1, len(trials) + 1)
+        results['rank_test_score'] = ranks
+        return results
+
+    def predict(self, X):
+        return self.best_estimator_.predict(X)
+
+    def predict_proba(self, X):
+        return self.best_estimator_.predict_proba(X)
+
+    def score(self, X, y=None):
+        from sklearn.metrics import check_scoring
+        return check_scoring(self.best_estimator_, scoring=self.scoring)(self.best_estimator_, X, y)
+
+    @property
+    def classes_(self):
+        return self.best_estimator_.classes_
+###############################################################################################
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+###############################################################################################
+####  Mutual information scorers used to rank features in SULOV and other rankers.       ####
+####  sklearn's mutual_info_classif and mutual_info_regression use k-nearest neighbors. ####
+####  They are very slow on millions of rows. HistogramMI puts every feature in quantile  ####
+####  bins once and then finds mutual information from counts of (bin, target) pairs.    ####
+####  Counting is vectorized over blocks of features and blocks can run in parallel.      ####
+####  Use score_mutual_info(X, y, modeltype, mi_scorer) to score with any of them:        ####
+####     mi_scorer=None: sklearn's k-nearest neighbor estimators (the default)             ####
+####     mi_scorer='histogram': a new HistogramMI for this call                             ####
+####     mi_scorer=HistogramMI(...): your own HistogramMI (bins, n_jobs)                    ####
+####     mi_scorer=any function(X, y) that returns one score per feature.                  ####
+###############################################################################################
+MI_BINS = 32
+#### Each block of features is counted with about this many cells (rows * features) at a time
+MI_BLOCK_CELLS = 1 << 22
+
+
+def quantize_columns(X, n_bins=MI_BINS):
+    """
+    Returns an array of the same shape as X with each column replaced by its quantile bin (0 to n_bins-1).
+    Columns with fewer distinct values than bins keep each value in its own bin.
+    """
+    X = np.asarray(X)
+    n_rows, n_cols = X.shape
+    codes = np.empty((n_rows, n_cols), dtype=np.uint8 if n_bins <= 256 else np.uint16)
+    quantiles = np.linspace(0, 1, n_bins + 1)[1:-1]
+    block_size = max(1, MI_BLOCK_CELLS // max(1, n_rows))
+    for start in range(0, n_cols, block_size):
+        block = X[:, start:start + block_size].astype(np.float64)
+        edges = np.nanquantile(block, quantiles, axis=0)
+        for col in range(block.shape[1]):
+            codes[:, start + col] = np.searchsorted(np.unique(edges[:, col]), block[:, col], side='right')
+    return codes
+
+
+def _block_mutual_info(codes, target_codes, n_bins, n_classes):
+    #### Mutual information (in nats) of each column of codes with target_codes from their joint counts
+    n_rows, n_cols = codes.shape
+    offsets = np.arange(n_cols, dtype=np.int64) * (n_bins * n_classes)
+    cells = codes.astype(np.int64) * n_classes + target_codes[:, None] + offsets
+    counts = np.bincount(cells.ravel(), minlength=n_cols * n_bins * n_classes)
+    joint = counts.reshape(n_cols, n_bins, n_classes) / float(n_rows)
+    marginal_x = joint.sum(axis=2, keepdims=True)
+    marginal_y = joint.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        terms = joint * np.log(joint / (marginal_x * marginal_y))
+    return np.nansum(terms, axis=(1, 2))
+
+
+class HistogramMI(object):
+    """
+    ###########################################################################################
+    ####  HistogramMI(discrete_target=True, n_bins=32, n_jobs=1) scores features by their    ####
+    ####  mutual information with the target using histograms:                            ####
+    ####     fit(X): puts every feature in n_bins quantile bins. Do this once.               ####
+    ####     score(y, rows=None): returns the mutual information of every fitted feature    ####
+    ####         with y. rows (positions) scores only those rows and y must then be the    ####
+    ####         target of those rows. So samples of rows reuse the bins found in fit.     ####
+    ####     Calling it as a function scorer(X, y) does fit(X).score(y). So it can also be  ####
+    ####         used as the score_func of sklearn's SelectKBest.                           ####
+    ####  discrete_target: True for classification. For regression, the target is also    ####
+    ####         put in n_bins quantile bins.                                               ####
+    ####  n_jobs: number of processes counting blocks of features (-1 means all cores).    ####
+    ###########################################################################################
+    """
+    def __init__(self, discrete_target=True, n_bins=MI_BINS, n_jobs=1):
+        self.discrete_target = discrete_target
+        self.n_bins = n_bins
+        self.n_jobs = n_jobs
+
+    def fit(self, X):
+        self.codes_ = quantize_columns(X, self.n_bins)
+        return self
+
+    def _encode_target(self, y):
+        y = np.asarray(y).ravel()
+        if self.discrete_target:
+            target_codes = pd.factorize(y)[0]
+        else:
+            target_codes = quantize_columns(y.reshape(-1, 1), self.n_bins)[:, 0]
+        target_codes = target_codes.astype(np.int64)
+        return target_codes, int(target_codes.max()) + 1 if len(target_codes) > 0 else 1
+
+    def score(self, y, rows=None):
+        codes = self.codes_ if rows is None else self.codes_[rows]
+        target_codes, n_classes = self._encode_target(y)
+        n_rows, n_cols = codes.shape
+        block_size = max(1, MI_BLOCK_CELLS // max(1, n_rows))
+        blocks = [(start, start + block_size) for start in range(0, n_cols, block_size)]
+        if self.n_jobs == 1 or len(blocks) == 1:
+            scores = [_block_mutual_info(codes[:, a:b], target_codes, self.n_bins, n_classes) for (a, b) in blocks]
+        else:
+            from joblib import Parallel, delayed
+            scores = Parallel(n_jobs=self.n_jobs)(delayed(_block_mutual_info)(
+                codes[:, a:b], target_codes, self.n_bins, n_classes) for (a, b) in blocks)
+        return np.concatenate(scores)
+
+    def __call__(self, X, y):
+        return self.fit(X).score(y)
+
+
+def score_mutual_info(X, y, modeltype, mi_scorer=None, n_jobs=1):
+    """
+    Returns the mutual information score of every column of X with y using mi_scorer (see above).
+    n_jobs is the number of processes of the HistogramMI made for mi_scorer='histogram'.
+    """
+    if mi_scorer is None:
+        from sklearn.feature_selection import SelectKBest, mutual_info_regression, mutual_info_classif
+        if modeltype == 'Regression':
+            fs = SelectKBest(score_func=mutual_info_regression, k=X.shape[1])
+        else:
+            fs = SelectKBest(score_func=mutual_info_classif, k=X.shape[1])
+        return fs.fit(X, y).scores_
+    if isinstance(mi_scorer, str):
+        if mi_scorer != 'histogram':
+            raise ValueError("mi_scorer must be None, 'histogram', a HistogramMI or a function: got %s" % mi_scorer)
+        mi_scorer = HistogramMI(discrete_target=modeltype != 'Regression', n_jobs=n_jobs)
+    scores = mi_scorer(X, y)
+    if isinstance(scores, tuple):
+        #### sklearn score functions such as f_classif return (scores, pvalues)
+        scores = scores[0]
+    return np.asarray(scores)
+###############################################################################################
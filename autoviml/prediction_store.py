@@ -0,0 +1,174 @@
+import copy
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from autoviml.__version__ import __version__
+from autoviml.profile_cache import ProfileCache, fingerprint_dataframe, DEFAULT_CACHE_BYTES
+
+###############################################################################################
+####  PredictionStore keeps the predictions (and fitted models) of the simple models that  ####
+####  Stacking, Ensembling and calibration fit, so that the same model is never fitted     ####
+####  twice on the same data. Entries are keyed by the model's settings (type and every    ####
+####  parameter), a fingerprint of the data it was fitted on (see profile_cache), the      ####
+####  fold scheme for out of fold predictions and the data it predicted on:                ####
+####     cross_val_predict: out of fold predictions, like sklearn's cross_val_predict.     ####
+####     fit: a fitted model. At most max_models fitted models are kept (in memory only).  ####
+####     fit_predict: a fitted model and its predictions on other data.                    ####
+####  Predictions are removed least recently used first beyond max_memory_bytes. With      ####
+####  a cache_dir, predictions are also kept on disk (a ProfileCache) for repeat runs on   ####
+####  the same data. A store with max_memory_bytes=0 and no cache_dir keeps nothing.       ####
+###############################################################################################
+DEFAULT_MEMORY_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_MODELS = 8
+#### Change this when the contents of stored predictions change
+STORE_FORMAT = 1
+
+
+def fingerprint_data(data):
+    """
+    Returns the fingerprint (see fingerprint_dataframe) of a dataframe, series or array.
+    """
+    if isinstance(data, pd.Series):
+        data = data.to_frame()
+    elif not isinstance(data, pd.DataFrame):
+        data = np.asarray(data)
+        data = pd.DataFrame(data.reshape(len(data), -1))
+    return fingerprint_dataframe(data)
+
+
+def describe_estimator(estimator):
+    """
+    Returns a text with the type of estimator and all of its parameters (also those of models inside it).
+    """
+    params = sorted([(k, repr(v)) for (k, v) in estimator.get_params(deep=True).items()])
+    return repr((type(estimator).__module__, type(estimator).__name__, params))
+
+
+class PredictionStore(object):
+    """
+    ###########################################################################################
+    ####  PredictionStore(max_memory_bytes, cache_dir, max_disk_bytes, max_models) caches  ####
+    ####  predictions and fitted models (see above). Use it in place of fit and predict:   ####
+    ####     cross_val_predict(estimator, X, y, cv, method, n_jobs) returns out of fold    ####
+    ####         predictions. cv must be a splitter with fixed folds (random_state set).   ####
+    ####     fit(estimator, X, y) returns estimator fitted on X, y or a copy of the same   ####
+    ####         model fitted before. The store keeps its own copy of each fitted model,   ####
+    ####         so changing or refitting a returned model does not change the store.      ####
+    ####     fit_predict(estimator, X, y, X_test, method) returns (fitted model,           ####
+    ####         predictions on X_test). If the predictions come from the store, the       ####
+    ####         model is not fitted unless need_model is True.                            ####
+    ####     predict(model, X, y, X_test, method) returns the predictions on X_test of a   ####
+    ####         model already fitted on X, y. It shares entries with fit_predict.         ####
+    ####  hits and misses count the predictions and models found or not in the store.      ####
+    ###########################################################################################
+    """
+    def __init__(self, max_memory_bytes=DEFAULT_MEMORY_BYTES, cache_dir=None, max_disk_bytes=DEFAULT_CACHE_BYTES,
+                 max_models=DEFAULT_MAX_MODELS):
+        self.max_memory_bytes = max_memory_bytes
+        self.max_models = max_models
+        self.memory_bytes = 0
+        self._memory = OrderedDict()
+        self._models = OrderedDict()
+        self.disk = None
+        if cache_dir is not None:
+            if cache_dir is True:
+                cache_dir = os.path.join(tempfile.gettempdir(), 'autoviml_predictions')
+            self.disk = ProfileCache(cache_dir, max_disk_bytes)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def active(self):
+        return self.max_memory_bytes > 0 or self.disk is not None
+
+    def make_key(self, kind, estimator, X, y, **settings):
+        settings = sorted([(k, repr(v)) for (k, v) in settings.items()])
+        description = repr((STORE_FORMAT, __version__, kind, describe_estimator(estimator), settings))
+        return '_'.join([fingerprint_data(X), fingerprint_data(y),
+                         hashlib.blake2b(description.encode('utf-8'), digest_size=12).hexdigest()])
+
+    def _get(self, key):
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return self._memory[key][0]
+        value = self.disk.get(key) if self.disk is not None else None
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._remember(key, value)
+        return value
+
+    def _remember(self, key, value):
+        size = np.asarray(value).nbytes
+        if size > self.max_memory_bytes:
+            return
+        self._memory[key] = (value, size)
+        self.memory_bytes += size
+        while self.memory_bytes > self.max_memory_bytes:
+            _, (_, old_size) = self._memory.popitem(last=False)
+            self.memory_bytes -= old_size
+
+    def _put(self, key, value):
+        self._remember(key, value)
+        if self.disk is not None:
+            self.disk.put(key, value)
+
+    def cross_val_predict(self, estimator, X, y, cv, method='predict', n_jobs=None):
+        from sklearn.model_selection import cross_val_predict
+        if not self.active:
+            return cross_val_predict(estimator, X, y, cv=cv, n_jobs=n_jobs, method=method)
+        key = self.make_key('oof', estimator, X, y, cv=cv, method=method)
+        predictions = self._get(key)
+        if predictions is None:
+            predictions = cross_val_predict(estimator, X, y, cv=cv, n_jobs=n_jobs, method=method)
+            self._put(key, predictions)
+        return predictions
+
+    def fit(self, estimator, X, y, **fit_params):
+        if not self.active or self.max_models <= 0:
+            return estimator.fit(X, y, **fit_params)
+        key = self.make_key('model', estimator, X, y, fit_params=fit_params)
+        if key in self._models:
+            self._models.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(self._models[key])
+        self.misses += 1
+        model = estimator.fit(X, y, **fit_params)
+        self._models[key] = copy.deepcopy(model)
+        while len(self._models) > self.max_models:
+            self._models.popitem(last=False)
+        return model
+
+    def fit_predict(self, estimator, X, y, X_test, method='predict', need_model=False):
+        if not self.active:
+            return estimator, getattr(estimator.fit(X, y), method)(X_test)
+        key = self._predict_key(estimator, X, y, X_test, method)
+        predictions = self._get(key)
+        if predictions is None:
+            estimator = self.fit(estimator, X, y)
+            predictions = getattr(estimator, method)(X_test)
+            self._put(key, predictions)
+        elif need_model:
+            estimator = self.fit(estimator, X, y)
+        return estimator, predictions
+
+    def predict(self, model, X, y, X_test, method='predict'):
+        if not self.active:
+            return getattr(model, method)(X_test)
+        key = self._predict_key(model, X, y, X_test, method)
+        predictions = self._get(key)
+        if predictions is None:
+            predictions = getattr(model, method)(X_test)
+            self._put(key, predictions)
+        return predictions
+
+    def _predict_key(self, estimator, X, y, X_test, method):
+        return self.make_key('predict', estimator, X, y, X_test=fingerprint_data(X_test), method=method)
+###############################################################################################
@@ -0,0 +1,133 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from autoviml.__version__ import __version__
+
+###############################################################################################
+####  ProfileCache keeps the column profiles and column classification of training data  ####
+####  on disk. Entries are keyed by a fingerprint of the data (its columns, dtypes and    ####
+####  every value) so that a repeat run on the same data with different flags skips      ####
+####  profiling and classifying columns. Any change in the data gives a new fingerprint.  ####
+####  The least recently used entries are removed when the cache grows beyond max_bytes. ####
+###############################################################################################
+DEFAULT_CACHE_BYTES = 500 * 1024 * 1024
+#### Change this when the contents of cached profiles or classifications change
+CACHE_FORMAT = 1
+
+
+def fingerprint_dataframe(df):
+    """
+    Returns a hex digest that changes whenever the shape, column names, dtypes, index or any value of df
+    changes. Values are hashed column by column with pandas' own vectorized 64-bit hash.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(repr((df.shape, [str(x) for x in df.columns], [str(x) for x in df.dtypes])).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df.index, categorize=False).values.tobytes())
+    for col in range(df.shape[1]):
+        series = df.iloc[:, col]
+        try:
+            hashes = pd.util.hash_pandas_object(series, index=False, categorize=False).values
+        except TypeError:
+            #### Columns of unhashable values such as lists are hashed through their text
+            hashes = pd.util.hash_pandas_object(series.astype(str), index=False, categorize=False).values
+        digest.update(np.ascontiguousarray(hashes).tobytes())
+    return digest.hexdigest()
+
+
+class ProfileCache(object):
+    """
+    ###########################################################################################
+    ####  ProfileCache(cache_dir, max_bytes) stores one pickle file per entry in cache_dir.   ####
+    ####     get(key) returns the cached value or None. put(key, value) stores it.            ####
+    ####     make_key(df, **settings) builds a key from a fingerprint of df and any settings  ####
+    ####         that change the results (such as the target or sketch mode).                 ####
+    ####  Reading an entry marks it as recently used. When the files add up to more than     ####
+    ####  max_bytes, the least recently used ones are removed. If cache_dir is not given, a  ####
+    ####  folder named autoviml_cache in the system temp folder is used.                      ####
+    ###########################################################################################
+    """
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_CACHE_BYTES):
+        if cache_dir is None:
+            cache_dir = os.path.join(tempfile.gettempdir(), 'autoviml_cache')
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def make_key(self, df, **settings):
+        settings = sorted([(k, repr(v)) for (k, v) in settings.items()])
+        extra = repr((CACHE_FORMAT, __version__, settings)).encode('utf-8')
+        return fingerprint_dataframe(df) + '_' + hashlib.blake2b(extra, digest_size=8).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.pkl')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            #### The modified time of an entry is the time it was last used
+            os.utime(path, None)
+            self.hits += 1
+            return value
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            print('    Could not read cache entry %s due to %s. Ignoring it...' % (path, e))
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        try:
+            #### Write to a temp file first so that another run never reads a half written entry
+            handle, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(handle, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self._path(key))
+            self.evict()
+        except Exception as e:
+            print('    Could not write cache entry due to %s. Continuing...' % e)
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache holds at most max_bytes.
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.pkl'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum([x[1] for x in entries])
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        """
+        Removes all entries from the cache.
+        """
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.pkl') or name.endswith('.tmp'):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+###############################################################################################
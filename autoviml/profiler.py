@@ -0,0 +1,193 @@
+import json
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+
+
+###############################################################################################
+def get_peak_memory_usage():
+    """
+    Returns the peak resident memory (RSS) in bytes used by this process so far. This helps you size
+    the machine or container needed to run Auto_ViML on your data. Returns 0 if it cannot be found.
+    """
+    try:
+        import resource
+        import sys
+        peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == 'darwin':
+            ### Mac OS reports ru_maxrss in bytes while Linux reports it in kilobytes
+            return peak_memory
+        return peak_memory * 1024
+    except:
+        try:
+            ### resource is not available on Windows. So we try psutil if it is installed
+            import psutil
+            memory_info = psutil.Process().memory_info()
+            return getattr(memory_info, 'peak_wset', memory_info.rss)
+        except:
+            return 0
+
+
+def find_shape(data):
+    """
+    Returns the (rows, columns) of a DataFrame, Series or array. Returns (0, 0) for the '' sentinel
+    that Auto_ViML uses when there is no test data and for anything else without a shape.
+    """
+    shape = getattr(data, 'shape', None)
+    if shape is None or len(shape) == 0:
+        return 0, 0
+    if len(shape) == 1:
+        return int(shape[0]), 1
+    return int(shape[0]), int(shape[1])
+
+
+###############################################################################################
+class StageProfiler(object):
+    """
+    ###########################################################################################
+    ####  StageProfiler records the wall time, CPU time, peak memory (RSS) delta and the row  ####
+    ####  and column counts of each stage in Auto_ViML. Every stage becomes one record (dict)####
+    ####  and the same stage name can be recorded many times (for example, once per target). ####
+    ####  Use it in two ways:                                                                ####
+    ####     profiler.start('SULOV', train) ... profiler.stop('SULOV', train_sel)            ####
+    ####     with profiler.stage('SULOV', train): ...                                        ####
+    ####  callback: optional function that is called with each stage record as it finishes. ####
+    ####     Use it to send stage timings to your own logging or monitoring system.          ####
+    ####  report() returns a dict with all the records plus totals by stage. to_json() returns####
+    ####  the same report as a JSON string and writes it to a file if a filename is given.   ####
+    ####  peak_rss_delta is the growth in the high-water mark of the process memory during  ####
+    ####  the stage. So it is 0 when a stage did not need more memory than any stage before.####
+    ###########################################################################################
+    """
+    def __init__(self, callback=None, verbose=0):
+        self.callback = callback
+        self.verbose = verbose
+        self.records = []
+        self.running = OrderedDict()
+        self.start_time = time.time()
+
+    def start(self, name, data=None):
+        """
+        Starts timing a stage. data (optional) is the input DataFrame whose shape is recorded.
+        """
+        rows, cols = find_shape(data)
+        self.running[name] = {
+            'wall_start': time.time(),
+            'cpu_start': time.process_time(),
+            'peak_rss_start': get_peak_memory_usage(),
+            'rows_in': rows,
+            'cols_in': cols,
+        }
+
+    def stop(self, name, data=None, **extra):
+        """
+        Stops timing a stage and returns its record. data (optional) is the output DataFrame whose
+        shape is recorded. Any extra keyword arguments are added to the record as they are.
+        """
+        if name not in self.running:
+            return {}
+        begin = self.running.pop(name)
+        peak_rss = get_peak_memory_usage()
+        if data is None:
+            rows, cols = begin['rows_in'], begin['cols_in']
+        else:
+            rows, cols = find_shape(data)
+        record = OrderedDict()
+        record['stage'] = name
+        record['wall_time'] = round(time.time() - begin['wall_start'], 4)
+        record['cpu_time'] = round(time.process_time() - begin['cpu_start'], 4)
+        record['peak_rss'] = peak_rss
+        record['peak_rss_delta'] = max(0, peak_rss - begin['peak_rss_start'])
+        record['rows_in'] = begin['rows_in']
+        record['cols_in'] = begin['cols_in']
+        record['rows_out'] = rows
+        record['cols_out'] = cols
+        record.update(extra)
+        self.records.append(record)
+        if self.verbose >= 2:
+            print('    Stage %s took %0.1f seconds (CPU %0.1f seconds)' % (name, record['wall_time'],
+                                                                          record['cpu_time']))
+        if self.callback is not None:
+            try:
+                self.callback(dict(record))
+            except Exception as e:
+                print('    Profiler callback failed for stage %s due to %s. Continuing...' % (name, e))
+        return record
+
+    @contextmanager
+    def stage(self, name, data=None):
+        """
+        Context manager version of start and stop. The output shape is the same as the input shape.
+        """
+        self.start(name, data)
+        try:
+            yield self
+        finally:
+            self.stop(name)
+
+    def stop_all(self):
+        """
+        Stops any stages still running. This happens if a stage raised an error and was skipped.
+        """
+        for name in list(self.running.keys()):
+            self.stop(name, status='incomplete')
+
+    def summary(self):
+        """
+        Returns totals by stage name in the order the stages were first run.
+        """
+        totals = OrderedDict()
+        for record in self.records:
+            name = record['stage']
+            if name not in totals:
+                totals[name] = OrderedDict([('calls', 0), ('wall_time', 0.0), ('cpu_time', 0.0),
+                                            ('peak_rss_delta', 0)])
+            totals[name]['calls'] += 1
+            totals[name]['wall_time'] = round(totals[name]['wall_time'] + record['wall_time'], 4)
+            totals[name]['cpu_time'] = round(totals[name]['cpu_time'] + record['cpu_time'], 4)
+            totals[name]['peak_rss_delta'] += record['peak_rss_delta']
+        return totals
+
+    def report(self):
+        """
+        Returns the full report as a dict: one record per stage, totals by stage and run totals.
+        """
+        return {
+            'stages': [dict(record) for record in self.records],
+            'summary': {name: dict(values) for name, values in self.summary().items()},
+            'total_wall_time': round(time.time() - self.start_time, 4),
+            'peak_rss': get_peak_memory_usage(),
+        }
+
+    def to_json(self, filename=None, indent=2):
+        """
+        Returns the report as a JSON string. If filename is given, it also writes it to that file.
+        """
+        report_json = json.dumps(self.report(), indent=indent, default=_json_default)
+        if filename:
+            with open(filename, 'w') as f:
+                f.write(report_json)
+        return report_json
+
+    def print_report(self):
+        """
+        Prints totals by stage as a table, slowest stage first.
+        """
+        totals = self.summary()
+        if len(totals) == 0:
+            return
+        print('Time and memory used by each stage (slowest first):')
+        print('    %-25s %6s %10s %10s %12s' % ('Stage', 'Calls', 'Wall(s)', 'CPU(s)', 'Peak RSS +MB'))
+        for name, values in sorted(totals.items(), key=lambda x: -x[1]['wall_time']):
+            print('    %-25s %6d %10.1f %10.1f %12.1f' % (name, values['calls'], values['wall_time'],
+                                                       values['cpu_time'], values['peak_rss_delta'] / 1e6))
+
+
+def _json_default(value):
+    #### numpy numbers found in extra fields are not JSON serializable by default ######
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+###############################################################################################
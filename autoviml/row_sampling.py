@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+
+###############################################################################################
+####  Feature selection stages (SULOV mutual information, find_top_features_xgb and       ####
+####  EntropyBinningTransformer.select_top_n_vars) rank features. Those rankings settle   ####
+####  on a small part of the rows. So on large data sets, these stages first run on a     ####
+####  stratified (classification) or quantile-preserving (regression) sample of rows and  ####
+####  keep doubling the sample until the selected features stop changing. The final      ####
+####  model is still trained on all rows. Data sets with fewer than SAMPLING_MIN_ROWS    ####
+####  rows are never sampled, so results on small data are exactly the same as before.   ####
+###############################################################################################
+SAMPLING_MIN_ROWS = 250000
+ROWS_PER_COLUMN = 500
+SAMPLING_START_ROWS = 20000
+
+
+def use_row_sampling(n_rows, row_sampling=False):
+    """
+    Returns True if a feature selection stage should run on samples of rows instead of all rows.
+    """
+    return bool(row_sampling) and n_rows >= SAMPLING_MIN_ROWS
+
+
+def find_sample_size(n_rows, n_cols):
+    """
+    Returns the number of rows to start sampling with. It grows with the number of columns since
+    rankings among more features need more rows to settle. It never exceeds the rows in the data.
+    """
+    return int(min(n_rows, max(SAMPLING_START_ROWS, ROWS_PER_COLUMN * n_cols)))
+
+
+class RowSampler(object):
+    """
+    ###########################################################################################
+    ####  RowSampler draws nested samples of rows that keep the shape of the target:        ####
+    ####     Classification: each class keeps its share of rows (stratified). Rare classes  ####
+    ####         always keep at least two rows (if they have them), so that a sample can    ####
+    ####         still be split into stratified train and validation rows.                 ####
+    ####     Regression: each quantile bin of the target keeps its share of rows.          ####
+    ####  Samples are nested: a larger sample contains all the rows of a smaller one. So    ####
+    ####  growing the sample only adds rows and a change in selection is due to more data. ####
+    ####  sample_index(n) returns sorted row positions so the original row order is kept.   ####
+    ###########################################################################################
+    """
+    def __init__(self, y, modeltype, n_bins=10, random_state=99):
+        if isinstance(y, pd.DataFrame):
+            #### Multi-label targets are stratified on the first label only
+            y = y.iloc[:, 0]
+        y = pd.Series(np.asarray(y).ravel())
+        self.n_rows = len(y)
+        if modeltype == 'Regression':
+            try:
+                strata = pd.qcut(y, q=n_bins, labels=False, duplicates='drop')
+            except:
+                strata = pd.Series(np.zeros(self.n_rows, dtype=int))
+            strata = strata.fillna(-1)
+        else:
+            strata = y.astype(str)
+        rng = np.random.RandomState(random_state)
+        #### Shuffle rows within each stratum once. Every sample takes the first rows of each stratum.
+        self.strata = [rng.permutation(positions) for positions in strata.groupby(strata.values).indices.values()]
+
+    def sample_index(self, n_rows):
+        """
+        Returns sorted row positions of a sample of about n_rows rows.
+        """
+        if n_rows >= self.n_rows:
+            return np.arange(self.n_rows)
+        fraction = n_rows / self.n_rows
+        rows = [positions[:max(2, int(np.ceil(fraction * len(positions))))] for positions in self.strata]
+        return np.sort(np.concatenate(rows))
+
+
+def find_stratify_labels(y):
+    """
+    Returns y to stratify a train / validation split on, or None (a plain random split) if any class
+    has fewer than 2 rows, since a stratified split of such a class raises an error.
+    """
+    values = np.asarray(y)
+    if values.ndim > 1 and values.shape[1] > 1:
+        #### Multi-label targets are stratified on each combination of labels, as in sklearn
+        values = np.array([str(x) for x in values.tolist()])
+    counts = pd.Series(values.ravel()).value_counts()
+    if len(counts) == 0 or counts.min() < 2:
+        return None
+    return y
+
+
+def find_core_features(selection, min_ratio=0.25):
+    """
+    Returns the part of a selection (dict of feature name to importance) whose importance is at least
+    min_ratio of the most important feature. The rest are weak or noise features whose order
+    changes by chance from sample to sample, however many rows are used.
+    """
+    if len(selection) == 0:
+        return {}
+    top = max(selection.values())
+    if top <= 0:
+        return dict(selection)
+    return dict([(k, v) for (k, v) in selection.items() if v >= min_ratio * top])
+
+
+def find_overlap(previous, selected, min_ratio=0.25):
+    """
+    Returns the weighted overlap (Jaccard) of the core features of two selections. Each selection is
+    a dict of feature name to importance. Importances are scaled to add up to 1 so that the most
+    important features count the most. 1.0 means the same core features with the same importances.
+    """
+    weights = []
+    for selection in [find_core_features(previous, min_ratio), find_core_features(selected, min_ratio)]:
+        total = float(sum(max(0, x) for x in selection.values()))
+        if total > 0:
+            weights.append(dict([(k, max(0, v) / total) for (k, v) in selection.items()]))
+        else:
+            weights.append(dict([(k, 1.0 / len(selection)) for k in selection]))
+    features = set(weights[0]) | set(weights[1])
+    if len(features) == 0:
+        return 1.0
+    common = sum(min(weights[0].get(x, 0), weights[1].get(x, 0)) for x in features)
+    union = sum(max(weights[0].get(x, 0), weights[1].get(x, 0)) for x in features)
+    return common / union
+
+
+def find_stable_selection(select_function, sampler, n_cols, growth=2, min_overlap=0.9, verbose=0):
+    """
+    Runs select_function(row_positions) on growing samples of rows until the selected features
+    stop changing, and returns (list of selected features, number of rows used). select_function
+    must return a dict of selected feature name to its importance (mutual info, gain, etc.).
+    The selection is stable when the weighted overlap of the core features (see find_overlap)
+    between two rounds is at least min_overlap.
+    If the selection never settles, the last round runs on all rows just as without sampling.
+    """
+    n_rows = find_sample_size(sampler.n_rows, n_cols)
+    previous = None
+    while True:
+        selected = select_function(sampler.sample_index(n_rows))
+        if previous is not None and find_overlap(previous, selected) >= min_overlap:
+            if verbose >= 1:
+                print('    Selected features are stable on %d of %d rows' % (n_rows, sampler.n_rows))
+            break
+        if n_rows >= sampler.n_rows:
+            break
+        if verbose >= 1:
+            print('    Selected %d features using %d rows. Adding more rows...' % (len(selected), n_rows))
+        previous = selected
+        n_rows = int(min(sampler.n_rows, n_rows * growth))
+    return list(selected), n_rows
+###############################################################################################
@@ -0,0 +1,375 @@
+import copy
+import os
+import pickle
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+##################################################################################
+def left_subtract(l1, l2):
+    lst = []
+    for i in l1:
+        if i not in l2:
+            lst.append(i)
+    return lst
+
+
+##################################################################################
+class AutoViMLPipeline:
+    """
+    #########################################################################################################
+    ####   AutoViMLPipeline holds every fitted transformer that Auto_ViML builds while training a model:  ####
+    ####   label encoders and missing value fill constants, Polynomial features, Auto_NLP vectorizers,   ####
+    ####   date-time features, entropy binning thresholds, KMeans featurizer, Stacking model, scaler     ####
+    ####   and the final model. It replays exactly those transforms on new data so that you can score    ####
+    ####   new batches without re-running the whole Auto_ViML search. It can be saved to disk and loaded. ####
+    #########################################################################################################
+    ####  U S A G E  #####
+    model, features, trainm, testm, pipe = Auto_ViML(train, target, test, return_pipeline=True)
+    pipe.save('autoviml_pipeline.pkl')
+
+    pipe = load_pipeline('autoviml_pipeline.pkl')
+    X_new = pipe.transform(new_df)      ### returns the scaled features that the model needs
+    y_new = pipe.predict(new_df)        ### returns predictions in the original target classes
+    scores = pipe.score(new_df)         ### returns ID columns, predictions and probabilities in one dataframe
+    pipe.score_file('big_test.csv', 'big_test_scores.csv', chunksize=100000)   ### streams large files in chunks
+    #########################################################################################################
+    """
+    def __init__(self, target, modeltype, model_label='Single_Label'):
+        if not isinstance(target, list):
+            target = [target]
+        self.target = copy.deepcopy(target)
+        self.modeltype = modeltype
+        self.model_label = model_label
+        self.id_cols = []
+        #### encoder is the fitted BulkEncoderImputer that label encodes and fills missing values
+        self.encoder = None
+        self.missing_cols = []
+        self.imputer = None
+        self.imputer_cols = []
+        self.float_fill_cols = []
+        self.num_bool_vars = []
+        self.red_preds = []
+        #### Polynomial and Interaction variables added by Add_Poly
+        self.add_poly = 0
+        self.poly_degree = 2
+        self.poly_md = None
+        self.poly_numvars = []
+        self.poly_vars = []
+        self.poly_x_vars = []
+        self.poly_int_vars = []
+        #### nlp_transformers is a list of (nlp_column, fitted nlp transformer or None, predictors after NLP)
+        self.nlp_transformers = []
+        #### date_features is a dictionary of date column and the date time features added from it
+        self.date_features = OrderedDict()
+        self.integer_cats = []
+        self.selected_features = []
+        self.binning_thresholds = OrderedDict()
+        self.km_label = ''
+        self.km_featurizer = None
+        self.km_features = []
+        self.int_cats = []
+        self.stacking_model = None
+        self.stacking_features = []
+        self.stacking_cols = []
+        self.features = []
+        self.scaler = None
+        self.model = None
+        self.model_name = ''
+        self.label_dict = dict()
+        self.m_thresh = 0.5
+        self.rare_class = 1
+        self.modify_targets_flag = False
+        self.targets_negative_flag = False
+        #### profile is the StageProfiler report (time and memory of each stage) of the Auto_ViML run
+        self.profile = dict()
+        self.fitted = False
+
+    def set_label_dict(self, label_dict):
+        """
+        Auto_ViML's label_dict is a nested defaultdict built with a lambda which cannot be pickled.
+        So we only keep the classes, dictionary and transformer of each target as plain dictionaries.
+        """
+        self.label_dict = dict()
+        for each_target in self.target:
+            if each_target not in label_dict:
+                continue
+            each_dict = label_dict[each_target]
+            self.label_dict[each_target] = {
+                'classes': list(each_dict['classes']),
+                'dictionary': dict(each_dict['dictionary']),
+                'transformer': copy.deepcopy(each_dict['transformer']),
+            }
+
+    def transform(self, df, verbose=0):
+        """
+        Replays the fitted Auto_ViML data preparation steps on a new dataframe and returns the final
+        (scaled) features that the model was trained on. It does not modify the input dataframe.
+        """
+        start_time = time.time()
+        orig_df = df
+        test = df.copy()
+        ####  Columns that were missing in test data during training were filled by an Iterative Imputer
+        for each_col in self.missing_cols:
+            test[each_col] = np.nan
+        ###### Label encode and fill missing values the same way that train data was filled ############
+        if self.encoder is not None:
+            test = self.encoder.transform(test)
+        if self.imputer is not None:
+            test[self.imputer_cols] = self.imputer.transform(test[self.imputer_cols])
+        #### Any remaining missing values in float columns are set to zero just as in Auto_ViML
+        for each_col in self.float_fill_cols:
+            if test[each_col].dtype == float:
+                test[[each_col]] = test[[each_col]].fillna(0.0)
+        for each_bool_num in self.num_bool_vars:
+            test[each_bool_num] = test[each_bool_num].astype(int)
+        test = test[self.red_preds]
+        ##########  Add the same Polynomial and Interaction variables selected in train data ###########
+        if self.poly_md is not None:
+            from autoviml.Auto_ViML import add_poly_vars_select
+            _, _, test_x_df, _, _, _ = add_poly_vars_select(test, self.poly_numvars, self.target[0],
+                                                            self.modeltype, self.poly_degree, self.add_poly, self.poly_md,
+                                                            scaling='None', fit_flag=False, verbose=0)
+            if len(self.poly_vars) == 1:
+                test[self.poly_vars[0]] = test_x_df[self.poly_x_vars].values
+            else:
+                test[self.poly_vars] = test_x_df[self.poly_x_vars].values
+            for each_pred in self.poly_int_vars:
+                test[each_pred] = test[each_pred].astype(int)
+        ##########  Auto_NLP transformations for each NLP column ########################################
+        for nlp_column, nlp_transformer, nlp_preds in self.nlp_transformers:
+            if nlp_transformer is None:
+                test = test.drop(nlp_column, axis=1)
+            else:
+                from autoviml.Auto_NLP import transform_nlp_column_using_transformer
+                test = transform_nlp_column_using_transformer(test, nlp_column, nlp_transformer)
+                test = test[nlp_preds]
+        ##########  Date time features are always created from the original date columns ##############
+        if len(self.date_features) > 0:
+            from autoviml.Auto_ViML import create_time_series_features
+            for date_col, date_col_adds in self.date_features.items():
+                date_df_test = create_time_series_features(orig_df, date_col)
+                #### A missing flag may not get created in small batches that have no missing dates
+                test = test.join(date_df_test.reindex(columns=date_col_adds, fill_value=0))
+        for important_cat in self.integer_cats:
+            test[important_cat] = test[important_cat].astype(int)
+        test = test[self.selected_features]
+        ##########  Entropy Binning uses the thresholds learnt on full train data #######################
+        for each_num, entropy_threshold in self.binning_thresholds.items():
+            if isinstance(each_num, str):
+                bincol = each_num + '_bin'
+            else:
+                bincol = 'bin_' + str(each_num)
+            test[bincol] = np.digitize(test[each_num].values, entropy_threshold)
+            test.drop(each_num, axis=1, inplace=True)
+        ##########  KMeans Featurizer adds a cluster label using the fitted centroids ##################
+        if self.km_featurizer is not None:
+            km_clusters = self.km_featurizer.transform(test[self.km_features])
+            test[self.km_label] = np.c_[test[self.km_features], km_clusters][:, -1]
+            for imp_cat in self.int_cats:
+                test[imp_cat] = test[imp_cat].astype(int)
+        ##########  Stacking adds predictions of a simpler model trained on full train data ############
+        if self.stacking_model is not None:
+            if self.modeltype == 'Regression':
+                stacks = self.stacking_model.predict(test[self.stacking_features])
+            else:
+                stacks = self.stacking_model.predict_proba(test[self.stacking_features])
+            test = test.join(pd.DataFrame(stacks, index=test.index, columns=self.stacking_cols))
+        X_test = test[self.features]
+        if self.scaler is not None:
+            X_test = pd.DataFrame(self.scaler.transform(X_test), index=X_test.index,
+                                  columns=self.features)
+        if verbose >= 1:
+            print('    Transformed %d rows into %d features in %0.2f seconds' % (
+                X_test.shape[0], X_test.shape[1], time.time() - start_time))
+        return X_test
+
+    def _predict_encoded(self, X_test):
+        """
+        Returns label encoded predictions and probabilities (if available) from the fitted model.
+        """
+        y_pred = self.model.predict(X_test)
+        ##### This next step is very important since some models give series, others give arrays.
+        if isinstance(y_pred, pd.Series) or isinstance(y_pred, pd.DataFrame):
+            y_pred = y_pred.values
+        y_proba = None
+        if self.modeltype == 'Regression':
+            if self.modify_targets_flag:
+                from autoviml.Auto_ViML import modify_array_to_integer
+                y_pred = modify_array_to_integer(y_pred, self.targets_negative_flag)
+            return y_pred, y_proba
+        if self.model_label == 'Single_Label':
+            ### In some cases such as CatBoost, the output for multi-class is 2-D with shape (,1)
+            if len(y_pred.shape) > 1 and y_pred.shape[1] == 1:
+                y_pred = y_pred.ravel()
+            y_proba = self.model.predict_proba(X_test)
+            if len(self.label_dict[self.target[0]]['classes']) <= 2 and self.m_thresh != 0.5:
+                ### The model uses the threshold that was found best for the rare class during training
+                predicted = copy.deepcopy(y_proba)
+                predicted[:, 0] = (predicted[:, 0] >= (1 - self.m_thresh)).astype('int')
+                predicted[:, 1] = (predicted[:, 1] > self.m_thresh).astype('int')
+                y_pred = predicted[:, self.rare_class]
+        return y_pred, y_proba
+
+    def predict(self, df):
+        """
+        Returns predictions for a new dataframe. For classification problems, the predictions are
+        converted back to the original classes of the target variable.
+        """
+        X_test = self.transform(df)
+        y_pred, _ = self._predict_encoded(X_test)
+        if self.modeltype == 'Regression':
+            return y_pred
+        if self.model_label == 'Single_Label':
+            return self._inverse_transform(self.target[0], y_pred)
+        y_preds = []
+        for each_target, i in zip(self.target, range(len(self.target))):
+            y_preds.append(self._inverse_transform(each_target, y_pred[:, i]))
+        return np.c_[tuple(y_preds)]
+
+    def predict_proba(self, df):
+        """
+        Returns class probabilities for a new dataframe in single label classification problems.
+        """
+        if self.modeltype == 'Regression' or self.model_label != 'Single_Label':
+            print('predict_proba is available only for single label classification problems')
+            return None
+        X_test = self.transform(df)
+        return self.model.predict_proba(X_test)
+
+    def score(self, df):
+        """
+        Returns a dataframe with ID columns (if any), predictions and probability columns for a new
+        dataframe. The column names are the same as those in the test_modified dataframe of Auto_ViML.
+        """
+        X_test = self.transform(df)
+        y_pred, y_proba = self._predict_encoded(X_test)
+        id_cols = [x for x in self.id_cols if x in df.columns]
+        scores = df[id_cols].copy()
+        if self.modeltype == 'Regression':
+            if self.model_label == 'Single_Label':
+                scores[self.target[0] + '_predictions'] = y_pred
+            else:
+                for each_target, i in zip(self.target, range(len(self.target))):
+                    scores[each_target + '_predictions'] = y_pred[:, i]
+            return scores
+        if self.model_label == 'Single_Label':
+            each_target = self.target[0]
+            scores[each_target + '_predictions'] = self._inverse_transform(each_target, y_pred)
+            for each_class in self.label_dict[each_target]['classes']:
+                if isinstance(each_class, str):
+                    proba_col = each_target + '_proba_' + each_class
+                else:
+                    proba_col = each_target + '_proba_' + str(each_class)
+                count = int(self.label_dict[each_target]['dictionary'][each_class])
+                scores[proba_col] = y_proba[:, count]
+        else:
+            for each_target, i in zip(self.target, range(len(self.target))):
+                scores[each_target + '_predictions'] = self._inverse_transform(each_target, y_pred[:, i])
+        return scores
+
+    def _inverse_transform(self, each_target, y_pred):
+        transformer = self.label_dict[each_target]['transformer']
+        if len(transformer) == 0:
+            return y_pred
+        return pd.Series(y_pred).map(transformer).values
+
+    def score_file(self, filename, output_filename, chunksize=100000, sep=',', verbose=0):
+        """
+        Streams a CSV or Parquet file through the fitted pipeline in chunks of rows and appends the
+        ID columns, predictions and probabilities of each chunk to output_filename (CSV or Parquet).
+        Only one chunk is held in memory at a time, so peak memory is bounded by chunksize and not by
+        the size of the file. Returns the number of rows scored.
+        """
+        start_time = time.time()
+        if os.path.exists(output_filename):
+            os.remove(output_filename)
+        output_parquet = is_parquet_file(output_filename)
+        parquet_writer = None
+        rows_scored = 0
+        for chunk_number, chunk in enumerate(read_file_in_chunks(filename, chunksize, sep)):
+            scores = self.score(chunk)
+            if output_parquet:
+                parquet_writer = write_parquet_chunk(scores, output_filename, parquet_writer)
+            else:
+                scores.to_csv(output_filename, mode='a', header=(chunk_number == 0), index=False)
+            rows_scored += scores.shape[0]
+            if verbose >= 1:
+                print('    Scored chunk %d: %d rows so far in %0.1f seconds' % (
+                    chunk_number + 1, rows_scored, time.time() - start_time))
+        if parquet_writer is not None:
+            parquet_writer.close()
+        print('    Scored %d rows from %s into %s in %0.1f seconds' % (
+            rows_scored, filename, output_filename, time.time() - start_time))
+        return rows_scored
+
+    def save(self, filename):
+        """
+        Saves the fitted pipeline to disk using pickle. Load it back with load_pipeline(filename).
+        """
+        with open(filename, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        print('    Saved Auto_ViML pipeline to %s' % filename)
+        return filename
+
+
+##################################################################################
+def is_parquet_file(filename):
+    return os.path.splitext(filename)[1].lower() in ['.parquet', '.pq']
+
+
+def read_file_in_chunks(filename, chunksize=100000, sep=','):
+    """
+    Yields dataframes of at most chunksize rows from a CSV or Parquet file. Parquet needs pyarrow.
+    """
+    if is_parquet_file(filename):
+        try:
+            import pyarrow.parquet as pq
+        except:
+            print('    Error: pyarrow must be installed to read Parquet files in chunks. pip install pyarrow')
+            raise
+        parquet_file = pq.ParquetFile(filename)
+        for batch in parquet_file.iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        for chunk in pd.read_csv(filename, sep=sep, chunksize=chunksize):
+            yield chunk
+
+
+def write_parquet_chunk(df, filename, parquet_writer=None):
+    """
+    Appends a dataframe to a Parquet file as a new row group. The schema is set by the first chunk.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if parquet_writer is None:
+        parquet_writer = pq.ParquetWriter(filename, table.schema)
+    else:
+        table = table.cast(parquet_writer.schema)
+    parquet_writer.write_table(table)
+    return parquet_writer
+
+
+def score_file(pipeline, filename, output_filename, chunksize=100000, sep=',', verbose=0):
+    """
+    Scores a large CSV or Parquet file in chunks using a fitted AutoViMLPipeline or the filename of a
+    saved pipeline. Predictions are appended to output_filename chunk by chunk to keep memory bounded.
+    """
+    if isinstance(pipeline, str):
+        pipeline = load_pipeline(pipeline)
+    return pipeline.score_file(filename, output_filename, chunksize=chunksize, sep=sep, verbose=verbose)
+
+
+##################################################################################
+def load_pipeline(filename):
+    """
+    Loads a fitted AutoViMLPipeline that was saved to disk using pipeline.save(filename).
+    """
+    with open(filename, 'rb') as f:
+        pipeline = pickle.load(f)
+    return pipeline
+##################################################################################
@@ -1,8 +1,6 @@
 import random
 
 import numpy as np
-import pandas as pd
-import networkx as nx
 
 np.random.seed(99)
 random.seed(42)
@@ -16,27 +14,26 @@ def warn(*args, **kwargs):
     pass
 warnings.warn = warn
 ####################################################################################
-import copy
-from sklearn.feature_selection import mutual_info_regression, mutual_info_classif
-from sklearn.feature_selection import SelectKBest
-from itertools import combinations
-import matplotlib.patches as mpatches
-import matplotlib.pyplot as plt
 from collections import defaultdict
+from autoviml.row_sampling import RowSampler, use_row_sampling, find_stable_selection
+from autoviml.correlation import find_correlated_pairs_approx, iter_correlated_pairs
+from autoviml.mutual_info import HistogramMI, score_mutual_info
 #################################################################################################
-def remove_highly_correlated_vars_fast(df, corr_limit=0.70):
+def remove_highly_correlated_vars_fast(df, corr_limit=0.70, corr_method='pearson'):
     """
     This is a simple method to remove highly correlated features fast using Pearson's Correlation.
     Use this only for float and integer variables. It will automatically select those only.
     It can be used for very large data sets where featurewiz has trouble with memory
+    Every variable that is highly correlated to a variable before it in df is removed.
     """
-    # Creating correlation matrix
-    cor_matrix = df.corr().abs().astype(np.float16)
-    # Selecting upper triangle of correlation matrix
-    upper_tri = cor_matrix.where(np.triu(np.ones(cor_matrix.shape),
-                                         k=1).astype(np.bool))
-    # Finding index of feature columns with correlation greater than 0.95
-    to_drop = [column for column in upper_tri.columns if any(upper_tri[column] > corr_limit)]
+    df = df.select_dtypes(include='number')
+    if df.isnull().sum().sum() > 0:
+        df = df.fillna(0)
+    # Finding feature columns with correlation greater than corr_limit to an earlier column
+    drop_set = set()
+    for var1, var2, coeff in iter_correlated_pairs(df, corr_limit, method=corr_method):
+        drop_set.update(var2[coeff > corr_limit])
+    to_drop = [column for column in df.columns if column in drop_set]
     print()
     print('Highly correlated columns to remove: %s' % to_drop)
     return to_drop
@@ -74,9 +71,157 @@ def find_remove_duplicates(list_of_values):
     return output
 
 
+##################################################################################
+def build_correlation_graph(pairs):
+    """
+    Returns the graph of highly correlated variables from pairs (var1, var2, coeff): a dict of each
+    variable to the set of variables it is highly correlated to, and a dict of each pair (var1, var2)
+    to its absolute correlation. Only variables in some pair are in the graph.
+    pairs is either a dataframe with var1, var2 and coeff columns or a stream of (var1, var2, coeff)
+    array blocks such as iter_correlated_pairs. A stream is added one block at a time.
+    """
+    if hasattr(pairs, 'columns'):
+        pairs = [(pairs['var1'].values, pairs['var2'].values, pairs['coeff'].values)]
+    graph = defaultdict(set)
+    edges = dict()
+    for block_var1, block_var2, block_coeff in pairs:
+        for var1, var2, coeff in zip(block_var1, block_var2, block_coeff):
+            graph[var1].add(var2)
+            graph[var2].add(var1)
+            edges[(var1, var2)] = coeff
+    return dict(graph), edges
+
+
+##################################################################################
+def select_by_mutual_info(mutual_info, corr_pair_dict):
+    """
+    Selects variables in order of highest mutual info score. Every selected variable knocks out
+    the variables that are highly correlated to it. Returns the list of selected variables.
+    corr_pair_dict maps each variable to the variables (list or set) it is highly correlated to.
+    Each variable and each pair is looked at once, so this takes time in proportion to their number.
+    """
+    #### The first variable in list has the highest correlation to the target variable ###
+    sorted_by_mutual_info = [key for (key, val) in
+                             sorted(mutual_info.items(), key=lambda kv: kv[1], reverse=True)]
+    #####   Now we select the final list of correlated variables ###########
+    selected_corr_list = []
+    knocked_out = set()
+    #### select each variable by the highest mutual info and knock out what vars are correlated to it
+    for each_corr_name in sorted_by_mutual_info:
+        if each_corr_name in knocked_out:
+            continue
+        selected_corr_list.append(each_corr_name)
+        knocked_out.update(corr_pair_dict.get(each_corr_name, ()))
+    return selected_corr_list
+
+
+##################################################################################
+def select_uncorrelated_vars(df, preds_in, modeltype, target, corr_limit=0.70, verbose=0,
+                             row_sampling=False, approx_recall=None, mi_scorer=None, corr_method='pearson',
+                             n_jobs=1):
+    """
+    This is the SULOV method without any printing of results or drawing. It returns a dict with:
+        selected: float variables kept (uncorrelated ones first, then correlated ones by mutual info)
+        removed: float variables knocked out since they are highly correlated to a selected variable
+        other_vars: variables in preds_in that are not float and hence not considered
+        graph: dict of each highly correlated variable to the set of variables it is correlated to
+        edges: dict of each highly correlated pair (var1, var2) to its absolute correlation
+        mutual_info: dict of each highly correlated variable to its mutual info score with target
+    See FE_remove_variables_using_SULOV_method for details on the arguments.
+    """
+    numvars = df[preds_in].select_dtypes(include='float').columns.tolist()
+    result = prune_correlated_vars(df, numvars, modeltype, target, corr_limit, verbose, row_sampling=row_sampling,
+                                   approx_recall=approx_recall, mi_scorer=mi_scorer, corr_method=corr_method,
+                                   n_jobs=n_jobs)
+    result['other_vars'] = left_subtract(preds_in, numvars)
+    return result
+
+
+##################################################################################
+def prune_correlated_vars(df, numvars, modeltype, target, corr_limit=0.70, verbose=0,
+                          row_sampling=False, approx_recall=None, mi_scorer=None, corr_method='pearson',
+                          n_jobs=1):
+    """
+    This is the correlation pruning engine behind SULOV. It works on any list of numeric variables
+    (numvars) and returns the same dict as select_uncorrelated_vars without other_vars.
+        corr_method: 'pearson' or 'spearman'. Spearman finds pairs with high rank correlation.
+        approx_recall: None finds all pairs exactly. A number (say 0.99) finds them from sketches.
+        mi_scorer: None, 'histogram', a HistogramMI or any function(X, y). See autoviml.mutual_info.
+        row_sampling: if True, mutual info is found on growing samples of rows of large data.
+        n_jobs: number of processes a new HistogramMI (mi_scorer='histogram') scores blocks of features in.
+    Pairs are found block by block and fed into the graph as they are found. See autoviml.correlation.
+    """
+    df_target = df[target]
+    df = df[numvars]
+    if df.isnull().sum().sum() > 0:
+        df = df.fillna(0)
+    result = {'selected': numvars, 'removed': [], 'graph': {}, 'edges': {}, 'mutual_info': {}}
+    ### Only pairs with absolute correlation of corr_limit or more are found. The full matrix is never built.
+    if approx_recall is None:
+        pairs = iter_correlated_pairs(df, corr_limit, method=corr_method)
+    else:
+        pairs, pairs_report = find_correlated_pairs_approx(df, corr_limit, recall=approx_recall,
+                                                             method=corr_method)
+        print('    Approximate search verified %d candidate pairs and found %d highly correlated pairs' % (
+            pairs_report['candidates_verified'], pairs_report['pairs']))
+    corr_pair_dict, edges = build_correlation_graph(pairs)
+    result['graph'], result['edges'] = corr_pair_dict, edges
+    corr_list = [x for x in numvars if x in corr_pair_dict]
+    ###### This is for ordering the variables in the highest to lowest importance to target ###
+    if len(corr_list) == 0:
+        return result
+    if mi_scorer == 'histogram':
+        mi_scorer = HistogramMI(discrete_target=modeltype != 'Regression', n_jobs=n_jobs)
+    ##### you must ensure there are no infinite nor null values in corr_list df ##
+    df_fit = df[corr_list]
+    print('    there are no null values in dataset...')
+    ##### Ready to perform fit and find mutual information score ####
+    mutual_info = {}
+    try:
+        if isinstance(mi_scorer, HistogramMI):
+            #### Features are put in bins once. Every sample of rows below reuses the same bins.
+            mi_scorer.fit(df_fit)
+        if use_row_sampling(df_fit.shape[0], row_sampling):
+            #### Mutual info scores settle on a part of the rows. So grow a sample until selection is stable
+
+            def select_on_rows(rows):
+                if isinstance(mi_scorer, HistogramMI):
+                    scores = mi_scorer.score(df_target.iloc[rows], rows)
+                else:
+                    scores = score_mutual_info(df_fit.iloc[rows], df_target.iloc[rows], modeltype, mi_scorer)
+                mutual_info.update(zip(corr_list, scores))
+                selected = select_by_mutual_info(mutual_info, corr_pair_dict)
+                return dict([(x, mutual_info[x]) for x in selected])
+            sampler = RowSampler(df_target, modeltype)
+            find_stable_selection(select_on_rows, sampler, len(corr_list), verbose=verbose)
+        elif isinstance(mi_scorer, HistogramMI):
+            mutual_info.update(zip(corr_list, mi_scorer.score(df_target)))
+        else:
+            mutual_info.update(zip(corr_list, score_mutual_info(df_fit, df_target, modeltype, mi_scorer)))
+    except:
+        print('    SelectKBest() function is erroring. Returning with all %s variables...' % len(numvars))
+        return result
+    result['mutual_info'] = mutual_info
+    try:
+        selected_corr_list = select_by_mutual_info(mutual_info, corr_pair_dict)
+        ##### Now we combine the uncorrelated list to the selected correlated list above
+        corr_set = set(corr_list)
+        final_list = [x for x in numvars if x not in corr_set] + selected_corr_list
+    except Exception as e:
+        print('    SULOV Method crashing due to %s' % e)
+        #### Dropping highly correlated Features fast using simple linear correlation ###
+        final_list = left_subtract(numvars, remove_highly_correlated_vars_fast(df, corr_limit, corr_method))
+    final_set = set(final_list)
+    result['selected'] = final_list
+    result['removed'] = [x for x in numvars if x not in final_set]
+    return result
+
+
 ##################################################################################
 def FE_remove_variables_using_SULOV_method(df, preds_in, modeltype, target,
-                                           corr_limit=0.70, verbose=0, dask_xgboost_flag=False):
+                                           corr_limit=0.70, verbose=0, dask_xgboost_flag=False,
+                                           headless=False, row_sampling=False, approx_recall=None, mi_scorer=None,
+                                           corr_method='pearson', n_jobs=1):
     """
     FE stands for Feature Engineering - it means this function performs feature engineering
     ###########################################################################################
@@ -91,187 +236,122 @@ def FE_remove_variables_using_SULOV_method(df, preds_in, modeltype, target,
     a ranked list of these correlated variables: when we select one, we knock out others
     that it is correlated to. Then we select next var. This way we knock out correlated variables.
     Finally we are left with uncorrelated variables that are also highly important in mutual score.
+    Correlated pairs are found block by block in float32 and only pairs at or above corr_limit are kept.
+    If approx_recall is given (say 0.99), correlated pairs are found from random sketches of the columns
+    and only candidate pairs are verified exactly. approx_recall is the chance of finding a pair right at
+    corr_limit. Use this for 100,000+ variables. See autoviml.correlation for details.
+    mi_scorer: None uses sklearn's mutual_info_classif / mutual_info_regression. Use 'histogram' or a
+    HistogramMI for much faster scores on millions of rows. See autoviml.mutual_info for details.
+    n_jobs: number of processes that score blocks of features when mi_scorer is 'histogram'.
+    corr_method: 'pearson' (default) or 'spearman'. Spearman also catches variables that move together
+    without a straight line relation (such as x and log(x)).
+    If headless is True, the correlation network is neither built nor drawn. Same features are returned.
+    If row_sampling is True and the data is large, mutual info scores are found on growing samples of
+    rows until the selected variables stop changing. See autoviml.row_sampling for details.
+    To get the selected and removed variables and the graph of correlated pairs without any drawing,
+    use select_uncorrelated_vars which this function calls.
     ########  YOU MUST INCLUDE THE ABOVE MESSAGE IF YOU COPY THIS CODE IN YOUR LIBRARY ##########
     """
-
-    df = copy.deepcopy(df)
-    df_target = df[target]
     numvars = df[preds_in].select_dtypes(include='float').columns.tolist()
-    remvars = left_subtract(preds_in, numvars)
-    df = df[numvars]
-    ### for some reason, doing a mass fillna of vars doesn't work! Hence doing it individually!
-    null_vars = np.array(numvars)[df.isnull().sum() > 0]
-    for each_num in null_vars:
-        ### Remember that fillna only works at the dataframe level!
-        df[[each_num]] = df[[each_num]].fillna(0)
-    target = copy.deepcopy(target)
-
     print('#######################################################################################')
     print('#####  SULOV:  Searching for Uncorrelated List Of Variables in %s features ############' % len(numvars))
     print('#######################################################################################')
-    ### This is a shorter version of getting unduplicated and highly correlated vars ##
-    correlation_dataframe = df.corr().abs().unstack().sort_values().drop_duplicates()
-    corrdf = pd.DataFrame(correlation_dataframe[:].reset_index())
-    corrdf.columns = ['var1', 'var2', 'coeff']
-    corrdf1 = corrdf[corrdf['coeff'] >= corr_limit]
-    correlated_pair = list(zip(corrdf1['var1'].values.tolist(), corrdf1['var2'].values.tolist()))
-    corr_pair_dict = dict(return_dictionary_list(correlated_pair))
-    corr_list = find_remove_duplicates(corrdf1['var1'].values.tolist() + corrdf1['var2'].values.tolist())
-    keys_in_dict = list(corr_pair_dict.keys())
-    reverse_correlated_pair = [(y, x) for (x, y) in correlated_pair]
-    reverse_corr_pair_dict = dict(return_dictionary_list(reverse_correlated_pair))
-    #### corr_pair_dict is used later to make the network diagram to see which vars are correlated to which
-    for key, val in reverse_corr_pair_dict.items():
-        if key in keys_in_dict:
-            if len(key) > 1:
-                corr_pair_dict[key] += val
-        else:
-            corr_pair_dict[key] = val
-
-    ###### This is for ordering the variables in the highest to lowest importance to target ###
-    if len(corr_list) == 0:
-        final_list = list(correlation_dataframe)
+    result = select_uncorrelated_vars(df, preds_in, modeltype, target, corr_limit, verbose,
+                                      row_sampling=row_sampling, approx_recall=approx_recall,
+                                      mi_scorer=mi_scorer, corr_method=corr_method, n_jobs=n_jobs)
+    final_list, removed_cols, remvars = result['selected'], result['removed'], result['other_vars']
+    if len(result['graph']) == 0:
         print('Selecting all (%d) variables since none of numeric vars are highly correlated...' % len(numvars))
         return numvars
-    else:
-        if isinstance(target, list):
-            target = target[0]
-        max_feats = len(corr_list)
-        if modeltype == 'Regression':
-            sel_function = mutual_info_regression
-            fs = SelectKBest(score_func=sel_function, k=max_feats)
-        else:
-            sel_function = mutual_info_classif
-            fs = SelectKBest(score_func=sel_function, k=max_feats)
-        ##### you must ensure there are no infinite nor null values in corr_list df ##
-        df_fit = df[corr_list]
-        ### Now check if there are any NaN values in the dataset #####
-
-        if df_fit.isnull().sum().sum() > 0:
-            df_fit = df_fit.dropna()
-        else:
-            print('    there are no null values in dataset...')
-        ##### Reduce memory usage and find mutual information score ####       
-        # try:
-        #    df_fit = reduce_mem_usage(df_fit)
-        # except:
-        #    print('Reduce memory erroring. Continuing...')
-        ##### Ready to perform fit and find mutual information score ####
-        try:
-            fs.fit(df_fit, df_target)
-        except:
-            print('    SelectKBest() function is erroring. Returning with all %s variables...' % len(numvars))
-            return numvars
-        try:
-            #################################################################################
-            #######   This is the main section where we use mutual info score to select vars        
-            #################################################################################
-            mutual_info = dict(zip(corr_list, fs.scores_))
-            #### The first variable in list has the highest correlation to the target variable ###
-            sorted_by_mutual_info = [key for (key, val) in
-                                     sorted(mutual_info.items(), key=lambda kv: kv[1], reverse=True)]
-            #####   Now we select the final list of correlated variables ###########
-            selected_corr_list = []
-            #### You have to make multiple copies of this sorted list since it is iterated many times ####
-            orig_sorted = copy.deepcopy(sorted_by_mutual_info)
-            copy_sorted = copy.deepcopy(sorted_by_mutual_info)
-            copy_pair = copy.deepcopy(corr_pair_dict)
-            #### select each variable by the highest mutual info and see what vars are correlated to it
-            for each_corr_name in copy_sorted:
-                ### add the selected var to the selected_corr_list
-                selected_corr_list.append(each_corr_name)
-                for each_remove in copy_pair[each_corr_name]:
-                    #### Now remove each variable that is highly correlated to the selected variable
-                    if each_remove in copy_sorted:
-                        copy_sorted.remove(each_remove)
-            ##### Now we combine the uncorrelated list to the selected correlated list above
-            rem_col_list = left_subtract(numvars, corr_list)
-            final_list = rem_col_list + selected_corr_list
-            removed_cols = left_subtract(numvars, final_list)
-        except Exception as e:
-            print('    SULOV Method crashing due to %s' % e)
-            #### Dropping highly correlated Features fast using simple linear correlation ###
-            removed_cols = remove_highly_correlated_vars_fast(df, corr_limit)
-            final_list = left_subtract(numvars, removed_cols)
-        if len(removed_cols) > 0:
-            print('    Removing (%d) highly correlated variables:' % (len(removed_cols)))
-            if len(removed_cols) <= 30:
-                print('    %s' % removed_cols)
-            if len(final_list) <= 30:
-                print('    Following (%d) vars selected: %s' % (len(final_list), final_list))
-        ##############    D R A W   C O R R E L A T I O N   N E T W O R K ##################
-        selected = copy.deepcopy(final_list)
+    if len(result['mutual_info']) == 0:
+        return numvars
+    if len(removed_cols) > 0:
+        print('    Removing (%d) highly correlated variables:' % (len(removed_cols)))
+        if len(removed_cols) <= 30:
+            print('    %s' % removed_cols)
+        if len(final_list) <= 30:
+            print('    Following (%d) vars selected: %s' % (len(final_list), final_list))
+    ##############    D R A W   C O R R E L A T I O N   N E T W O R K ##################
+    if not headless:
         try:
-            #### Now start building the graph ###################
-            gf = nx.Graph()
-            ### the mutual info score gives the size of the bubble ###
-            multiplier = 2100
-            for each in orig_sorted:
-                gf.add_node(each, size=int(max(1, mutual_info[each] * multiplier)))
-            ######### This is where you calculate the size of each node to draw
-            sizes = [mutual_info[x] * multiplier for x in list(gf.nodes())]
-            ####  The sizes of the bubbles for each node is determined by its mutual information score value
-            corr = df_fit.corr()
-            high_corr = corr[abs(corr) > corr_limit]
-            ## high_corr is the dataframe of a few variables that are highly correlated to each other
-            combos = combinations(corr_list, 2)
-            ### this gives the strength of correlation between 2 nodes ##
-            multiplier = 20
-            for (var1, var2) in combos:
-                if np.isnan(high_corr.loc[var1, var2]):
-                    pass
-                else:
-                    gf.add_edge(var1, var2, weight=multiplier * high_corr.loc[var1, var2])
-            ######## Now start building the networkx graph ##########################
-            widths = nx.get_edge_attributes(gf, 'weight')
-            nodelist = gf.nodes()
-            cols = 5
-            height_size = 5
-            width_size = 15
-            rows = int(len(corr_list) / cols)
-            if rows < 1:
-                rows = 1
-            plt.figure(figsize=(width_size, min(20, height_size * rows)))
-            pos = nx.shell_layout(gf)
-            nx.draw_networkx_nodes(gf, pos,
-                                   nodelist=nodelist,
-                                   node_size=sizes,
-                                   node_color='blue',
-                                   alpha=0.5)
-            nx.draw_networkx_edges(gf, pos,
-                                   edgelist=widths.keys(),
-                                   width=list(widths.values()),
-                                   edge_color='lightblue',
-                                   alpha=0.6)
-            pos_higher = {}
-            x_off = 0.04  # offset on the x axis
-            y_off = 0.04  # offset on the y axis
-            for k, v in pos.items():
-                pos_higher[k] = (v[0] + x_off, v[1] + y_off)
-            if len(selected) == 0:
-                nx.draw_networkx_labels(gf, pos=pos_higher,
-                                        labels=dict(zip(nodelist, nodelist)),
-                                        font_color='black')
-            else:
-                nx.draw_networkx_labels(gf, pos=pos_higher,
-                                        labels=dict(zip(nodelist,
-                                                        [x + ' (selected)' if x in selected else x + ' (removed)' for x
-                                                         in nodelist])),
-                                        font_color='black')
-            plt.box(True)
-            plt.title("""In SULOV, we repeatedly remove features with lower mutual info scores among highly correlated pairs (see figure),
-                        SULOV selects the feature with higher mutual info score related to target when choosing between a pair. """,
-                      fontsize=10)
-            plt.suptitle('How SULOV Method Works by Removing Highly Correlated Features', fontsize=20, y=1.03)
-            red_patch = mpatches.Patch(color='blue', label='Bigger circle denotes higher mutual info score with target')
-            blue_patch = mpatches.Patch(color='lightblue',
-                                        label='Thicker line denotes higher correlation between two variables')
-            plt.legend(handles=[red_patch, blue_patch], loc='best')
-            plt.show()
-            #####    N E T W O R K     D I A G R A M    C O M P L E T E   #################
-            return final_list + remvars
+            draw_correlation_graph(result, corr_limit)
         except Exception as e:
             print('    Networkx library visualization crashing due to %s' % e)
             print('Continuing with SULOV. %d features selected' % len(final_list))
-            return final_list + remvars
+    return final_list + remvars
+
+
+##################################################################################
+def draw_correlation_graph(result, corr_limit=0.70):
+    """
+    Draws the network of highly correlated variables found by select_uncorrelated_vars. The size of
+    each bubble is its mutual info score and the width of each line is the correlation of the pair.
+    """
+    #### networkx and matplotlib are slow to import. So they are imported only to draw the graph.
+    import networkx as nx
+    import matplotlib.patches as mpatches
+    import matplotlib.pyplot as plt
+    mutual_info = result['mutual_info']
+    selected = result['selected']
+    corr_list = list(result['graph'])
+    orig_sorted = [key for (key, val) in sorted(mutual_info.items(), key=lambda kv: kv[1], reverse=True)]
+    #### Now start building the graph ###################
+    gf = nx.Graph()
+    ### the mutual info score gives the size of the bubble ###
+    multiplier = 2100
+    for each in orig_sorted:
+        gf.add_node(each, size=int(max(1, mutual_info[each] * multiplier)))
+    ######### This is where you calculate the size of each node to draw
+    sizes = [mutual_info[x] * multiplier for x in list(gf.nodes())]
+    ### this gives the strength of correlation between 2 nodes ##
+    multiplier = 20
+    for (var1, var2), coeff in result['edges'].items():
+        gf.add_edge(var1, var2, weight=multiplier * coeff)
+    ######## Now start building the networkx graph ##########################
+    widths = nx.get_edge_attributes(gf, 'weight')
+    nodelist = gf.nodes()
+    cols = 5
+    height_size = 5
+    width_size = 15
+    rows = int(len(corr_list) / cols)
+    if rows < 1:
+        rows = 1
+    plt.figure(figsize=(width_size, min(20, height_size * rows)))
+    pos = nx.shell_layout(gf)
+    nx.draw_networkx_nodes(gf, pos,
+                           nodelist=nodelist,
+                           node_size=sizes,
+                           node_color='blue',
+                           alpha=0.5)
+    nx.draw_networkx_edges(gf, pos,
+                           edgelist=widths.keys(),
+                           width=list(widths.values()),
+                           edge_color='lightblue',
+                           alpha=0.6)
+    pos_higher = {}
+    x_off = 0.04  # offset on the x axis
+    y_off = 0.04  # offset on the y axis
+    for k, v in pos.items():
+        pos_higher[k] = (v[0] + x_off, v[1] + y_off)
+    if len(selected) == 0:
+        nx.draw_networkx_labels(gf, pos=pos_higher,
+                                labels=dict(zip(nodelist, nodelist)),
+                                font_color='black')
+    else:
+        nx.draw_networkx_labels(gf, pos=pos_higher,
+                                labels=dict(zip(nodelist,
+                                                [x + ' (selected)' if x in selected else x + ' (removed)' for x
+                                                 in nodelist])),
+                                font_color='black')
+    plt.box(True)
+    plt.title("""In SULOV, we repeatedly remove features with lower mutual info scores among highly correlated pairs (see figure),
+                SULOV selects the feature with higher mutual info score related to target when choosing between a pair. """,
+              fontsize=10)
+    plt.suptitle('How SULOV Method Works by Removing Highly Correlated Features', fontsize=20, y=1.03)
+    red_patch = mpatches.Patch(color='blue', label='Bigger circle denotes higher mutual info score with target')
+    blue_patch = mpatches.Patch(color='lightblue',
+                                label='Thicker line denotes higher correlation between two variables')
+    plt.legend(handles=[red_patch, blue_patch], loc='best')
+    plt.show()
+    #####    N E T W O R K     D I A G R A M    C O M P L E T E   #################
 ###################################################################################
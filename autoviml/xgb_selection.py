@@ -0,0 +1,242 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from autoviml.mutual_info import quantize_columns
+from autoviml.row_sampling import find_stratify_labels
+
+###############################################################################################
+####  Faster feature selection with XGBoost for find_top_features_xgb. The default         ####
+####  'windows' mode there refits an XGB model on shrinking windows of columns and turns   ####
+####  the pandas data into an XGB matrix for every fit. XGBFeatureSelector instead puts    ####
+####  every column in at most 256 quantile bins once (one byte per value) and trains       ####
+####  boosters with the hist tree method on column slices of those bins:                   ####
+####     'quantized': same rounds over shrinking windows as 'windows', on the binned data. ####
+####     'single': one fit on all columns. The top features by gain are then checked by    ####
+####         permuting each one in the validation rows: features whose permutation does    ####
+####         not raise the validation loss are dropped.                                    ####
+####     'rfe': recursive feature elimination. One booster is trained on all columns and   ####
+####         keeps training (warm start) while the features with the lowest total gain are ####
+####         dropped a step at a time. Elimination stops when the validation loss gets     ####
+####         worse and the features of the last good step are returned.                    ####
+####  The train / validation split is the same in every round and the bins are reused      ####
+####  across samples of rows (see autoviml.row_sampling).                                  ####
+###############################################################################################
+XGB_MAX_BIN = 256
+SELECTION_MODES = ['windows', 'quantized', 'single', 'rfe']
+#### Share of the remaining features dropped in each step of 'rfe'
+RFE_DROP_FRACTION = 0.25
+#### Each step of 'rfe' adds at most this share of n_estimators trees to the booster
+RFE_STEP_TREES = 0.1
+#### A step of 'rfe' whose validation loss is worse than the best loss by more than this share stops it
+RFE_TOLERANCE = 0.01
+
+
+def check_selection_mode(mode):
+    """
+    Raises a ValueError if mode is not one of the feature selection modes in SELECTION_MODES.
+    """
+    if mode not in SELECTION_MODES:
+        raise ValueError('xgb_selection must be one of %s: got %s' % (SELECTION_MODES, mode))
+
+
+def find_xgb_params(model_xgb, modeltype, n_classes):
+    """
+    Returns the parameters of an XGB sklearn model as a dict for xgboost.train using the hist method.
+    Multi-class models use multi:softprob so that the validation loss can be found from probabilities.
+    """
+    params = dict([(k, v) for (k, v) in model_xgb.get_xgb_params().items() if v is not None])
+    params['tree_method'] = 'hist'
+    params['max_bin'] = XGB_MAX_BIN
+    if modeltype != 'Regression' and n_classes > 2:
+        params['objective'] = 'multi:softprob'
+        params['num_class'] = n_classes
+    return params
+
+
+def split_rows(y, modeltype, test_size=0.2, seed=1):
+    """
+    Returns the row positions of the train and validation rows. Regression keeps the last test_size
+    of rows for validation (the rows may be in time order). Classification uses a stratified split
+    unless a class has fewer than 2 rows.
+    """
+    positions = np.arange(len(y))
+    if modeltype == 'Regression':
+        train_part = int((1 - test_size) * len(y))
+        return positions[:train_part], positions[train_part:]
+    from sklearn.model_selection import train_test_split
+    return train_test_split(positions, test_size=test_size, random_state=seed,
+                            stratify=find_stratify_labels(y))
+
+
+def validation_loss(preds, y, modeltype):
+    """
+    Returns the mean squared error (Regression) or log loss (Classification) of XGB predictions.
+    """
+    if modeltype == 'Regression':
+        return float(np.mean((preds - y) ** 2))
+    eps = 1e-15
+    if preds.ndim == 1:
+        preds = np.clip(preds, eps, 1 - eps)
+        return float(-np.mean(y * np.log(preds) + (1 - y) * np.log(1 - preds)))
+    return float(-np.mean(np.log(np.clip(preds[np.arange(len(y)), y], eps, 1))))
+
+
+def find_top_gains(booster, columns, top_num=None, importance_type='gain'):
+    """
+    Returns an OrderedDict of the features of a booster (trained without feature names on the given
+    columns) to their gain, highest first. Only the top_num features are returned if it is given.
+    """
+    gains = booster.get_score(importance_type=importance_type)
+    gains = sorted([(columns[int(k[1:])], v) for (k, v) in gains.items()], key=lambda kv: kv[1], reverse=True)
+    return OrderedDict(gains if top_num is None else gains[:top_num])
+
+
+class XGBFeatureSelector(object):
+    """
+    ###########################################################################################
+    ####  XGBFeatureSelector(model_xgb, modeltype, mode) finds important features with XGB:  ####
+    ####     fit(X): puts every column of X in quantile bins. Do this once.                    ####
+    ####     select(y, rows=None): returns an OrderedDict of important features to their gain. ####
+    ####         rows (positions) selects only on those rows and y must then be the target   ####
+    ####         of those rows. So samples of rows reuse the bins found in fit.               ####
+    ####  model_xgb: the XGB sklearn model whose parameters are used (n_estimators, depth...). ####
+    ####  mode: 'quantized', 'single' or 'rfe' (see above).                                    ####
+    ####  top_num, iter_limit: features kept per round and columns dropped between rounds.     ####
+    ###########################################################################################
+    """
+    def __init__(self, model_xgb, modeltype, mode='quantized', top_num=10, iter_limit=2, eval_metric='logloss',
+                 test_size=0.2, seed=1, early_stopping=5):
+        check_selection_mode(mode)
+        self.model_xgb = model_xgb
+        self.modeltype = modeltype
+        self.mode = mode
+        self.top_num = top_num
+        self.iter_limit = iter_limit
+        self.eval_metric = eval_metric
+        self.test_size = test_size
+        self.seed = seed
+        self.early_stopping = early_stopping
+
+    def fit(self, X):
+        self.columns_ = list(X.columns)
+        self.codes_ = quantize_columns(X.values, XGB_MAX_BIN)
+        return self
+
+    def select(self, y, rows=None):
+        codes = self.codes_ if rows is None else self.codes_[rows]
+        y = np.asarray(y).ravel()
+        n_classes = 1
+        if self.modeltype != 'Regression':
+            classes, y = np.unique(y, return_inverse=True)
+            n_classes = len(classes)
+        params = find_xgb_params(self.model_xgb, self.modeltype, n_classes)
+        params['eval_metric'] = self.eval_metric
+        train_rows, valid_rows = split_rows(y, self.modeltype, self.test_size, self.seed)
+        X_train, y_train = codes[train_rows], y[train_rows]
+        X_valid, y_valid = codes[valid_rows], y[valid_rows]
+        if self.mode == 'single':
+            return self._select_single(params, X_train, y_train, X_valid, y_valid)
+        if self.mode == 'rfe':
+            return self._select_rfe(params, X_train, y_train, X_valid, y_valid)
+        return self._select_windows(params, X_train, y_train, X_valid, y_valid)
+
+    def _train(self, params, X_train, y_train, X_valid, y_valid):
+        import xgboost as xgb
+        dtrain = xgb.DMatrix(X_train, label=y_train)
+        dvalid = xgb.DMatrix(X_valid, label=y_valid)
+        return xgb.train(params, dtrain, num_boost_round=self.model_xgb.n_estimators,
+                         evals=[(dtrain, 'train'), (dvalid, 'valid')],
+                         early_stopping_rounds=self.early_stopping, verbose_eval=False)
+
+    def _window_starts(self):
+        #### Same rounds as the windows mode: each round drops iter_limit more columns from the left
+        n_cols = len(self.columns_)
+        return [i for i in range(0, n_cols, self.iter_limit) if n_cols - i >= 2]
+
+    def _select_windows(self, params, X_train, y_train, X_valid, y_valid):
+        important_features = OrderedDict()
+        for start in self._window_starts():
+            print('        using %d variables...' % (len(self.columns_) - start))
+            booster = self._train(params, X_train[:, start:], y_train, X_valid[:, start:], y_valid)
+            for feature, gain in find_top_gains(booster, self.columns_[start:], self.top_num).items():
+                important_features[feature] = max(important_features.get(feature, 0), gain)
+        return important_features
+
+    def _select_single(self, params, X_train, y_train, X_valid, y_valid):
+        import xgboost as xgb
+        print('        using %d variables in a single fit...' % len(self.columns_))
+        booster = self._train(params, X_train, y_train, X_valid, y_valid)
+        gains = find_top_gains(booster, self.columns_)
+        #### Only as many features as the windows mode could select are checked by permutation
+        candidates = list(gains)[:max(self.top_num, len(self._window_starts()) * self.top_num)]
+        iteration_range = (0, booster.best_iteration + 1)
+        base_loss = validation_loss(booster.predict(xgb.DMatrix(X_valid), iteration_range=iteration_range),
+                                    y_valid, self.modeltype)
+        rng = np.random.RandomState(self.seed)
+        X_valid = X_valid.copy()
+        index = dict([(x, i) for (i, x) in enumerate(self.columns_)])
+        keep = set()
+        for feature in candidates:
+            col = index[feature]
+            saved = X_valid[:, col].copy()
+            X_valid[:, col] = rng.permutation(saved)
+            loss = validation_loss(booster.predict(xgb.DMatrix(X_valid), iteration_range=iteration_range),
+                                   y_valid, self.modeltype)
+            X_valid[:, col] = saved
+            if loss > base_loss:
+                keep.add(feature)
+        #### Always keep at least top_num features: the highest gain ones fill the rest
+        for feature in candidates:
+            if len(keep) >= self.top_num:
+                break
+            keep.add(feature)
+        return OrderedDict([(x, gains[x]) for x in candidates if x in keep])
+
+    def _select_rfe(self, params, X_train, y_train, X_valid, y_valid):
+        import xgboost as xgb
+        n_cols = len(self.columns_)
+        #### The train and validation matrices never change. Dropped features get a zero feature weight
+        ####   and colsample_bytree shrinks with the features left, so new trees only use the features left.
+        ####   Old trees still see the same data, so continuing from the previous booster stays valid.
+        dtrain = xgb.DMatrix(X_train, label=y_train)
+        dvalid = xgb.DMatrix(X_valid, label=y_valid)
+        colsample = params.get('colsample_bytree', 1)
+        #### Elimination goes down to top_num features unless the validation loss gets worse before that
+        n_final = min(n_cols, self.top_num)
+        step_trees = max(10, int(self.model_xgb.n_estimators * RFE_STEP_TREES))
+        index = dict([(x, i) for (i, x) in enumerate(self.columns_)])
+        features = list(self.columns_)
+        booster = None
+        best_loss = None
+        selected = OrderedDict()
+        while True:
+            weights = np.zeros(n_cols)
+            weights[[index[x] for x in features]] = 1
+            dtrain.set_info(feature_weights=weights)
+            params['colsample_bytree'] = colsample * len(features) / n_cols
+            booster = xgb.train(params, dtrain, xgb_model=booster,
+                                num_boost_round=self.model_xgb.n_estimators if booster is None else step_trees,
+                                evals=[(dvalid, 'valid')], early_stopping_rounds=self.early_stopping,
+                                verbose_eval=False)
+            loss = booster.best_score
+            print('        using %d variables: validation %s = %0.4f' % (len(features), self.eval_metric, loss))
+            if best_loss is not None and loss > best_loss * (1 + RFE_TOLERANCE):
+                print('        validation %s got worse. Keeping the previous %d variables' % (
+                    self.eval_metric, len(selected)))
+                break
+            best_loss = loss if best_loss is None else min(best_loss, loss)
+            gains = find_top_gains(booster, self.columns_, importance_type='total_gain')
+            ranked = sorted(features, key=lambda x: gains.get(x, 0), reverse=True)
+            selected = OrderedDict([(x, gains.get(x, 0)) for x in ranked])
+            if len(features) <= n_final:
+                break
+            #### Features that no tree uses are dropped at once. The rest are dropped by lowest total gain.
+            n_keep = max(n_final, int(len(features) * (1 - RFE_DROP_FRACTION)))
+            features = [x for x in ranked[:n_keep] if gains.get(x, 0) > 0]
+            if len(features) < self.top_num:
+                features = ranked[:self.top_num]
+            if len(features) == len(selected):
+                break
+        return selected
+###############################################################################################
@@ -0,0 +1,454 @@
+"""
+#########################################################################################################
+####          Auto_ViML Benchmarks: time and memory of each stage at several data scales            #####
+#########################################################################################################
+####   This builds synthetic data sets with fixed seeds so every run sees the same data. It runs    #####
+####   the main Auto_ViML stages on them and records wall time, CPU time and peak memory (RSS)      #####
+####   growth of each run using the same StageProfiler that Auto_ViML uses.                         #####
+####   Each benchmark runs in a fresh process by default so that the peak memory of one benchmark   #####
+####   does not hide the peak memory of the next one. Use --no-isolate for faster, rougher runs.    #####
+#########################################################################################################
+####   U S A G E  (from the root of the repo)                                                       #####
+####     python benchmarks/run_benchmarks.py --save-baseline benchmarks/baseline.json               #####
+####     python benchmarks/run_benchmarks.py --output results.json                                  #####
+####     python benchmarks/run_benchmarks.py --scales 1000x10 20000x50 --only SULOV classify_columns#####
+####     python benchmarks/run_benchmarks.py --baseline other_baseline.json --tolerance 0.25        #####
+####   Each result is compared to the one stored in the baseline (benchmarks/baseline.json unless   #####
+####   --baseline is given) and flagged as a regression if it is slower (or uses more memory) by    #####
+####   more than tolerance. The exit code is 1 if any regression was found so that you can use it   #####
+####   in a CI job. Baselines are machine specific! So none is stored in the repo: create one on    #####
+####   your machine (or CI runner) with --save-baseline first. Without a baseline file the script   #####
+####   stops with exit code 2 before running anything, unless --no-baseline is given.               #####
+#########################################################################################################
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import time
+import traceback
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+#### This lets you run the script from a source checkout without installing autoviml ######
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SEED = 99
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+DEFAULT_SCALES = ['1000x10', '5000x20', '20000x40']
+WORDS = ['price', 'quality', 'delivery', 'service', 'broken', 'excellent', 'late', 'refund', 'happy',
+         'terrible', 'fast', 'cheap', 'support', 'return', 'great', 'awful', 'box', 'size', 'color', 'fit']
+
+
+##################################################################################################
+####   S Y N T H E T I C   D A T A   G E N E R A T O R S                                      ####
+####   Each returns a dataframe with predictors and target(s), and the list of target names.  ####
+##################################################################################################
+def make_numeric_data(n_rows, n_cols, seed=SEED, modeltype='Binary_Classification'):
+    """
+    Numeric features where every third feature is highly correlated with the one before it.
+    This gives SULOV and the correlation removers some real work to do.
+    """
+    rng = np.random.RandomState(seed)
+    X = rng.randn(n_rows, n_cols)
+    for i in range(2, n_cols, 3):
+        X[:, i] = X[:, i - 1] * 0.9 + rng.randn(n_rows) * 0.1
+    df = pd.DataFrame(X, columns=['num_%d' % i for i in range(n_cols)])
+    signal = X[:, :min(5, n_cols)].sum(axis=1) + rng.randn(n_rows)
+    if modeltype == 'Regression':
+        df['target'] = signal * 10
+    else:
+        df['target'] = (signal > 0).astype(int)
+    return df, ['target']
+
+
+def make_categorical_data(n_rows, n_cols, seed=SEED, n_levels=8):
+    """
+    Half numeric and half low cardinality string features.
+    """
+    rng = np.random.RandomState(seed)
+    n_cats = max(1, n_cols // 2)
+    df, targets = make_numeric_data(n_rows, n_cols - n_cats, seed)
+    levels = ['level_%d' % i for i in range(n_levels)]
+    for i in range(n_cats):
+        df['cat_%d' % i] = rng.choice(levels, n_rows)
+    df.loc[rng.rand(n_rows) < 0.05, 'cat_0'] = np.nan
+    df['target'] = ((df['target'] + (df['cat_0'] == 'level_0')) > 0).astype(int)
+    return df, targets
+
+
+def make_high_cardinality_data(n_rows, n_cols, seed=SEED):
+    """
+    Numeric features plus string features with thousands of levels such as zip codes or user names.
+    """
+    rng = np.random.RandomState(seed)
+    n_cats = max(1, n_cols // 4)
+    df, targets = make_numeric_data(n_rows, n_cols - n_cats, seed)
+    n_levels = max(10, n_rows // 5)
+    for i in range(n_cats):
+        df['highcard_%d' % i] = ['id_%d' % x for x in rng.randint(0, n_levels, n_rows)]
+    return df, targets
+
+
+def make_text_data(n_rows, n_cols, seed=SEED, words_per_row=12):
+    """
+    One free text column whose words depend on the target, plus numeric features.
+    """
+    rng = np.random.RandomState(seed)
+    df, targets = make_numeric_data(n_rows, max(1, n_cols - 1), seed)
+    positive, negative = WORDS[:10], WORDS[10:]
+    texts = []
+    for label in df['target'].values:
+        bag = positive if label == 1 else negative
+        chosen = np.where(rng.rand(words_per_row) < 0.7, rng.choice(bag, words_per_row),
+                          rng.choice(WORDS, words_per_row))
+        texts.append(' '.join(chosen))
+    df['review_text'] = texts
+    return df, targets
+
+
+def make_datetime_data(n_rows, n_cols, seed=SEED):
+    """
+    Numeric features plus one datetime column at hourly frequency.
+    """
+    df, targets = make_numeric_data(n_rows, max(1, n_cols - 1), seed)
+    df['event_time'] = pd.date_range('2020-01-01', periods=n_rows, freq='H')
+    return df, targets
+
+
+def make_imbalanced_data(n_rows, n_cols, seed=SEED, rare_fraction=0.03):
+    """
+    Binary target where the rare class is only rare_fraction of the rows.
+    """
+    rng = np.random.RandomState(seed)
+    df, targets = make_numeric_data(n_rows, n_cols, seed)
+    signal = df.iloc[:, :min(5, n_cols)].sum(axis=1) + rng.randn(n_rows)
+    df['target'] = (signal > np.percentile(signal, 100 * (1 - rare_fraction))).astype(int)
+    return df, targets
+
+
+def make_multilabel_data(n_rows, n_cols, seed=SEED):
+    """
+    Two binary targets that depend on different features.
+    """
+    rng = np.random.RandomState(seed)
+    df, _ = make_numeric_data(n_rows, n_cols, seed)
+    df = df.drop('target', axis=1)
+    df['target_1'] = ((df.iloc[:, 0] + rng.randn(n_rows)) > 0).astype(int)
+    df['target_2'] = ((df.iloc[:, -1] - df.iloc[:, 1] + rng.randn(n_rows)) > 0).astype(int)
+    return df, ['target_1', 'target_2']
+
+
+GENERATORS = OrderedDict([
+    ('numeric', make_numeric_data),
+    ('categorical', make_categorical_data),
+    ('high_cardinality', make_high_cardinality_data),
+    ('text', make_text_data),
+    ('datetime', make_datetime_data),
+    ('imbalanced', make_imbalanced_data),
+    ('multilabel', make_multilabel_data),
+])
+
+
+##################################################################################################
+####   B E N C H M A R K S                                                                    ####
+####   Each benchmark takes a dataframe and its targets and runs one Auto_ViML stage on it.   ####
+##################################################################################################
+def numeric_preds(df, targets):
+    return [x for x in df.select_dtypes(include='number').columns if x not in targets]
+
+
+def bench_classify_columns(df, targets):
+    from autoviml.classify_method import classify_columns
+    preds = [x for x in list(df) if x not in targets]
+    classify_columns(df[preds], verbose=0)
+
+
+def bench_sulov(df, targets):
+    from autoviml.sulov_method import FE_remove_variables_using_SULOV_method
+    FE_remove_variables_using_SULOV_method(df, numeric_preds(df, targets), 'Binary_Classification',
+                                           targets[0], 0.70, verbose=0)
+
+
+def bench_find_top_features_xgb(df, targets):
+    from autoviml.Auto_ViML import find_top_features_xgb
+    preds = numeric_preds(df, targets)
+    find_top_features_xgb(df, preds, preds, targets[0], 'Binary_Classification')
+
+
+def bench_auto_nlp(df, targets):
+    from autoviml.Auto_NLP import Auto_NLP
+    split = int(len(df) * 0.8)
+    train, test = df.iloc[:split], df.iloc[split:].drop(targets, axis=1)
+    Auto_NLP('review_text', train, test, targets[0], score_type='balanced_accuracy',
+             modeltype='Binary_Classification', top_num_features=100, verbose=0, build_model=False)
+
+
+def bench_ensembling(df, targets):
+    from autoviml.QuickML_Ensembling import QuickML_Ensembling
+    preds = numeric_preds(df, targets)
+    split = int(len(df) * 0.8)
+    QuickML_Ensembling(df[preds].iloc[:split], df[targets[0]].iloc[:split], df[preds].iloc[split:], '',
+                       modeltype='Binary_Classification', Boosting_Flag=None, scoring='', verbose=0)
+
+
+def bench_stacking(df, targets):
+    from autoviml.QuickML_Stacking import QuickML_Stacking
+    preds = numeric_preds(df, targets)
+    split = int(len(df) * 0.8)
+    QuickML_Stacking(df[preds].iloc[:split], df[targets[0]].iloc[:split], df[preds].iloc[split:],
+                     'Binary_Classification', None, '', verbose=0)
+
+
+def bench_entropy_binning(df, targets):
+    from autoviml.feature_engineering import EntropyBinningTransformer
+    preds = numeric_preds(df, targets)
+    binner = EntropyBinningTransformer(replace_vars=False, modeltype='Classification', top_n_vars=None)
+    binner.fit_transform(df[preds], df[targets[0]])
+
+
+def bench_auto_viml(df, targets):
+    import matplotlib
+    matplotlib.use('Agg')
+    from autoviml.Auto_ViML import Auto_ViML
+    split = int(len(df) * 0.8)
+    train, test = df.iloc[:split], df.iloc[split:].drop(targets, axis=1)
+    cwd = os.getcwd()
+    #### Auto_ViML writes its output files under the current folder. So run it in a scratch folder.
+    scratch = os.path.join(cwd, 'benchmark_outputs')
+    os.makedirs(scratch, exist_ok=True)
+    os.chdir(scratch)
+    try:
+        Auto_ViML(train, targets if len(targets) > 1 else targets[0], test, hyper_param='RS',
+                  Boosting_Flag=None, verbose=0)
+    finally:
+        os.chdir(cwd)
+
+
+#### benchmark name -> (function, data sets it runs on, maximum rows it runs on or None for all scales)
+BENCHMARKS = OrderedDict([
+    ('classify_columns', (bench_classify_columns, list(GENERATORS.keys()), None)),
+    ('SULOV', (bench_sulov, ['numeric'], None)),
+    ('find_top_features_xgb', (bench_find_top_features_xgb, ['numeric', 'imbalanced'], None)),
+    ('Auto_NLP', (bench_auto_nlp, ['text'], 5000)),
+    ('QuickML_Ensembling', (bench_ensembling, ['numeric'], 20000)),
+    ('QuickML_Stacking', (bench_stacking, ['numeric'], None)),
+    ('EntropyBinningTransformer', (bench_entropy_binning, ['numeric'], None)),
+    ('Auto_ViML', (bench_auto_viml, ['numeric', 'categorical', 'imbalanced', 'multilabel'], 5000)),
+])
+
+
+##################################################################################################
+def parse_scale(scale):
+    rows, cols = scale.lower().split('x')
+    return int(rows), int(cols)
+
+
+def run_case(case):
+    """
+    Runs one benchmark case and returns its result record. Errors are recorded and not raised.
+    """
+    with open(os.devnull, 'w') as devnull:
+        with contextlib.redirect_stdout(sys.stdout if case.get('verbose', 0) >= 1 else devnull):
+            #### autoviml is imported before the timer starts so that import time is not counted
+            from autoviml.profiler import StageProfiler
+    func = BENCHMARKS[case['benchmark']][0]
+    df, targets = GENERATORS[case['dataset']](case['rows'], case['cols'], seed=case['seed'])
+    profiler = StageProfiler()
+    status, error = 'ok', ''
+    profiler.start(case['benchmark'], df)
+    try:
+        #### Auto_ViML stages print a lot. Only show their output when verbose is set.
+        with open(os.devnull, 'w') as devnull:
+            with contextlib.redirect_stdout(sys.stdout if case.get('verbose', 0) >= 1 else devnull):
+                func(df, targets)
+    except Exception as e:
+        status = 'error'
+        error = '%s: %s' % (type(e).__name__, e)
+        if case.get('verbose', 0) >= 1:
+            traceback.print_exc()
+    record = profiler.stop(case['benchmark'])
+    result = OrderedDict([(key, case[key]) for key in ['benchmark', 'dataset', 'rows', 'cols']])
+    for key in ['wall_time', 'cpu_time', 'peak_rss', 'peak_rss_delta']:
+        result[key] = record[key]
+    result['status'] = status
+    result['error'] = error
+    return result
+
+
+def _run_case_in_queue(case, queue):
+    queue.put(run_case(case))
+
+
+def run_case_isolated(case):
+    """
+    Runs one benchmark case in a fresh process so that peak memory is measured from a clean start.
+    """
+    import multiprocessing
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    process = ctx.Process(target=_run_case_in_queue, args=(case, queue))
+    process.start()
+    try:
+        result = queue.get(timeout=case['timeout'])
+    except Exception:
+        result = OrderedDict([(key, case[key]) for key in ['benchmark', 'dataset', 'rows', 'cols']])
+        result.update(wall_time=None, cpu_time=None, peak_rss=None, peak_rss_delta=None,
+                      status='error', error='Benchmark timed out or crashed')
+        process.terminate()
+    process.join()
+    return result
+
+
+def result_key(result):
+    return '%s|%s|%dx%d' % (result['benchmark'], result['dataset'], result['rows'], result['cols'])
+
+
+def find_regressions(results, baseline_results, tolerance=0.25, min_seconds=0.5, min_memory=50e6):
+    """
+    Compares results with a stored baseline and returns a list of regressions.
+    A result is a regression if it is slower, or uses more memory, than its baseline by more than
+    tolerance (as a fraction) and also by more than min_seconds (or min_memory bytes). The
+    absolute limits stop tiny benchmarks from being flagged due to timing noise. A benchmark that
+    ran in the baseline but errors now is also a regression.
+    """
+    baseline = dict([(result_key(x), x) for x in baseline_results])
+    regressions = []
+    for result in results:
+        key = result_key(result)
+        if key not in baseline:
+            continue
+        old = baseline[key]
+        if old['status'] == 'ok' and result['status'] != 'ok':
+            regressions.append({'key': key, 'metric': 'status', 'baseline': old['status'],
+                                'current': result['status'], 'error': result['error']})
+            continue
+        if result['status'] != 'ok' or old['status'] != 'ok':
+            continue
+        for metric, min_change in [('wall_time', min_seconds), ('peak_rss_delta', min_memory)]:
+            change = result[metric] - old[metric]
+            if change > min_change and result[metric] > old[metric] * (1 + tolerance):
+                regressions.append({'key': key, 'metric': metric, 'baseline': old[metric],
+                                    'current': result[metric],
+                                    'ratio': round(result[metric] / max(old[metric], 1e-9), 3)})
+    return regressions
+
+
+def find_metadata(seed):
+    import sklearn
+    import xgboost
+    with open(os.devnull, 'w') as devnull:
+        with contextlib.redirect_stdout(devnull):
+            from autoviml.__version__ import __version__
+    return OrderedDict([
+        ('autoviml', __version__),
+        ('python', platform.python_version()),
+        ('platform', platform.platform()),
+        ('cpu_count', os.cpu_count()),
+        ('numpy', np.__version__),
+        ('pandas', pd.__version__),
+        ('sklearn', sklearn.__version__),
+        ('xgboost', xgboost.__version__),
+        ('seed', seed),
+        ('timestamp', time.strftime('%Y-%m-%dT%H:%M:%S')),
+    ])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time and memory benchmarks for Auto_ViML stages.')
+    parser.add_argument('--scales', nargs='+', default=DEFAULT_SCALES,
+                        help='Data sizes as ROWSxCOLS. Default: %s' % ' '.join(DEFAULT_SCALES))
+    parser.add_argument('--only', nargs='+', default=None, choices=list(BENCHMARKS.keys()),
+                        help='Run only these benchmarks')
+    parser.add_argument('--datasets', nargs='+', default=None, choices=list(GENERATORS.keys()),
+                        help='Run only on these synthetic data sets')
+    parser.add_argument('--output', default='', help='Write results as JSON to this file')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                        help='Compare with the results stored in this JSON file. Default: %s' % DEFAULT_BASELINE)
+    parser.add_argument('--no-baseline', action='store_true', help='Do not compare with any baseline')
+    parser.add_argument('--save-baseline', default='', help='Store these results as a baseline in this file')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Fraction by which a result may be worse than its baseline. Default 0.25')
+    parser.add_argument('--min-seconds', type=float, default=0.5,
+                        help='Ignore slowdowns smaller than this many seconds. Default 0.5')
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--timeout', type=float, default=3600, help='Seconds before a benchmark is stopped')
+    parser.add_argument('--no-isolate', action='store_true',
+                        help='Run all benchmarks in this process. Faster, but peak memory is less accurate')
+    parser.add_argument('--verbose', type=int, default=0)
+    args = parser.parse_args(argv)
+    if args.no_baseline:
+        args.baseline = ''
+    elif not os.path.exists(args.baseline):
+        if args.save_baseline:
+            #### This run creates the first baseline. There is nothing to compare with yet.
+            args.baseline = ''
+        else:
+            print('ERROR: baseline file %s not found. Regressions cannot be checked without it.' % args.baseline)
+            print('    Baselines are machine specific. Create one on this machine first with:')
+            print('        python benchmarks/run_benchmarks.py --save-baseline %s' % args.baseline)
+            print('    (use the same --scales, --only and --datasets) or pass --no-baseline to skip the check.')
+            return 2
+
+    cases = []
+    for scale in args.scales:
+        rows, cols = parse_scale(scale)
+        for name, (_, datasets, max_rows) in BENCHMARKS.items():
+            if args.only and name not in args.only:
+                continue
+            if max_rows is not None and rows > max_rows:
+                continue
+            for dataset in datasets:
+                if args.datasets and dataset not in args.datasets:
+                    continue
+                cases.append({'benchmark': name, 'dataset': dataset, 'rows': rows, 'cols': cols,
+                              'seed': args.seed, 'timeout': args.timeout, 'verbose': args.verbose})
+    print('Running %d benchmarks...' % len(cases))
+    results = []
+    for case in cases:
+        if args.no_isolate:
+            result = run_case(case)
+        else:
+            result = run_case_isolated(case)
+        results.append(result)
+        if result['status'] == 'ok':
+            print('    %-26s %-17s %7dx%-4d %8.2fs %10.1fMB' % (result['benchmark'], result['dataset'],
+                                                               result['rows'], result['cols'], result['wall_time'],
+                                                               result['peak_rss_delta'] / 1e6))
+        else:
+            print('    %-26s %-17s %7dx%-4d ERROR %s' % (result['benchmark'], result['dataset'], result['rows'],
+                                                         result['cols'], result['error'][:80]))
+    output = OrderedDict([('metadata', find_metadata(args.seed)), ('results', results), ('regressions', [])])
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        output['regressions'] = find_regressions(results, baseline['results'], args.tolerance, args.min_seconds)
+        missing = [result_key(x) for x in results if result_key(x) not in
+                   set([result_key(y) for y in baseline['results']])]
+        if len(missing) > 0:
+            print('WARNING: %d of %d benchmarks are not in baseline %s and were not checked: %s' % (
+                len(missing), len(results), args.baseline, ', '.join(missing[:5])))
+        if len(output['regressions']) > 0:
+            print('%d regressions found compared to baseline %s:' % (len(output['regressions']), args.baseline))
+            for regression in output['regressions']:
+                print('    %s %s: baseline = %s, current = %s' % (regression['key'], regression['metric'],
+                                                                 regression['baseline'], regression['current']))
+        else:
+            print('No regressions found compared to baseline %s' % args.baseline)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2)
+        print('Results written to %s' % args.output)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(OrderedDict([('metadata', output['metadata']), ('results', results)]), f, indent=2)
+        print('Baseline written to %s' % args.save_baseline)
+    return 1 if len(output['regressions']) > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
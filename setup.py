@@ -28,7 +28,7 @@ setuptools.setup(
         "textblob",
         "nltk",
         "regex",
-        "xgboost>=0.82,<1.7",
+        "xgboost>=1.4,<1.7",
         "vaderSentiment",
         "imbalanced-learn>=0.10.1",
         "shap>=0.36.0",
@@ -0,0 +1,34 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+from autoviml.Auto_ViML import BulkEncoderImputer
+
+
+def make_train():
+    return pd.DataFrame({'color': ['b', 'a', np.nan, 'c', 'a'],
+                         'size': [1.0, np.nan, 3.0, 4.0, 5.0],
+                         'count': [3, 1, 2, 5, 4]})
+
+
+def test_train_codes_and_missing_flags():
+    encoder = BulkEncoderImputer()
+    train = encoder.fit_transform(make_train())
+    assert train['color'].tolist() == [1, 0, -1, 2, 0]
+    assert train['size'].tolist() == [1.0, 0.0, 3.0, 4.0, 5.0]
+    assert train['color_Missing_Flag'].tolist() == [0, 0, 1, 0, 0]
+    assert list(train) == ['color', 'size', 'count', 'color_Missing_Flag', 'size_Missing_Flag']
+
+
+def test_unseen_values_get_one_code_without_changing_encoder():
+    encoder = BulkEncoderImputer().fit(make_train())
+    encoders = copy.deepcopy(encoder.encoders_)
+    test = pd.DataFrame({'color': ['y', 'x', 'a', np.nan], 'size': [2.0] * 4, 'count': [1] * 4})
+    whole = encoder.transform(test)['color'].tolist()
+    assert whole == [3, 3, 0, -1]
+    assert encoder.encoders_ == encoders
+    #### The codes do not depend on how the rows are split into batches or on their order
+    chunks = [encoder.transform(test.iloc[:1]), encoder.transform(test.iloc[1:])]
+    assert pd.concat(chunks)['color'].tolist() == whole
+    assert encoder.transform(test.iloc[::-1])['color'].tolist() == whole[::-1]
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+from autoviml import classify_method
+from autoviml.classify_method import profile_columns
+
+
+def make_data(rows=200, cols=40):
+    rng = np.random.RandomState(0)
+    df = pd.DataFrame(rng.normal(size=(rows, cols)), columns=['x%d' % i for i in range(cols)])
+    df['text'] = rng.choice(['a', 'b', None], size=rows)
+    return df
+
+
+def test_parallel_profiles_equal_serial_profiles(monkeypatch):
+    monkeypatch.setattr(classify_method, 'PARALLEL_MIN_COLS', 10)
+    monkeypatch.setattr(classify_method, 'PARALLEL_MIN_SHARD_COLS', 10)
+    monkeypatch.setattr(classify_method, 'find_n_cpus', lambda n_jobs: 2)
+    df = make_data()
+    serial = profile_columns(df)
+    parallel = profile_columns(df, n_jobs=2)
+    assert list(parallel) == list(serial)
+    assert [x.to_dict() for x in parallel.values()] == [x.to_dict() for x in serial.values()]
+
+
+def test_workers_are_capped_at_the_cpus(monkeypatch):
+    monkeypatch.setattr(classify_method, 'PARALLEL_MIN_COLS', 10)
+    monkeypatch.setattr(classify_method, 'PARALLEL_MIN_SHARD_COLS', 10)
+    monkeypatch.setattr(classify_method, 'find_n_cpus', lambda n_jobs: 1)
+    #### With one CPU the shards are profiled in this process: no workers are started
+    monkeypatch.setattr(classify_method, '_profile_shard', lambda df, sketch=False: 'serial')
+    assert profile_columns(make_data(), n_jobs=8) == 'serial'
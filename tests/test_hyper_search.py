@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+from sklearn.base import BaseEstimator
+
+from autoviml.hyper_search import TPESearchCV
+
+
+class ParamScore(BaseEstimator):
+    #### Its score on every fold is set by its parameters, so a search over it is deterministic
+    def __init__(self, a=0, b='x'):
+        self.a = a
+        self.b = b
+
+    def fit(self, X, y):
+        if self.b == 'fail':
+            raise ValueError('bad b')
+        self.fitted_ = True
+        return self
+
+    def score(self, X, y):
+        return -(self.a - 7) ** 2 - (self.b == 'y')
+
+
+X = np.arange(60).reshape(-1, 1)
+y = np.arange(60)
+
+
+def test_finds_best_trial_and_counts_fits():
+    search = TPESearchCV(ParamScore(), {'a': list(range(10)), 'b': ['x', 'y']}, n_iter=20, cv=3,
+                         random_state=0, n_jobs=1, patience=None, early_stopping=False)
+    search.fit(X, y)
+    scores = search.cv_results_['mean_test_score']
+    assert search.best_index_ == int(np.argmax(scores))
+    assert search.best_score_ == scores.max()
+    assert search.best_params_ == search.cv_results_['params'][search.best_index_]
+    assert search.best_params_ == {'a': 7, 'b': 'x'}
+    assert search.best_estimator_.fitted_ and search.best_estimator_.a == 7
+    assert search.n_fits_ == 20 * 3
+    assert search.cv_results_['rank_test_score'][search.best_index_] == 1
+
+
+def test_same_seed_gives_same_trials():
+    results = []
+    for i in range(2):
+        search = TPESearchCV(ParamScore(), {'a': list(range(10)), 'b': ['x', 'y']}, n_iter=8, cv=3,
+                             random_state=5, n_jobs=1, patience=None)
+        results.append(search.fit(X, y).cv_results_['params'])
+    assert results[0] == results[1]
+
+
+def test_weak_trials_are_stopped_early():
+    search = TPESearchCV(ParamScore(), {'a': list(range(10))}, n_iter=10, cv=3, random_state=0,
+                         n_jobs=1, patience=None, early_stopping=True)
+    search.fit(X, y)
+    folds_run = search.cv_results_['n_folds_run']
+    stopped = search.cv_results_['stopped_early']
+    assert stopped.sum() > 0
+    assert (folds_run[stopped] == 1).all() and (folds_run[~stopped] == 3).all()
+    assert search.n_fits_ == folds_run.sum() < 10 * 3
+    assert search.best_params_ == {'a': 7}
+    assert not stopped[search.best_index_]
+    ranks = search.cv_results_['rank_test_score']
+    assert ranks[search.best_index_] == 1
+    assert ranks[~stopped].max() < ranks[stopped].min()
+    assert sorted(ranks) == list(range(1, 11))
+
+
+def test_search_ends_after_patience_trials_without_improvement():
+    search = TPESearchCV(ParamScore(), {'b': ['x', 'z', 'w']}, n_iter=20, cv=3, random_state=0,
+                         n_jobs=1, patience=4)
+    search.fit(X, y)
+    #### Every trial scores the same, so the first one stays the best
+    assert len(search.cv_results_['params']) == 5
+    assert search.best_index_ == 0
+    assert search.n_fits_ == 5 * 3
+
+
+def test_failed_trials_score_lowest():
+    search = TPESearchCV(ParamScore(), {'a': [6, 7], 'b': ['x', 'fail']}, n_iter=4, cv=3, random_state=0,
+                         n_jobs=1, patience=None, early_stopping=False)
+    search.fit(X, y)
+    failed = [x['b'] == 'fail' for x in search.cv_results_['params']]
+    assert sum(failed) == 2
+    assert search.best_params_ == {'a': 7, 'b': 'x'}
+    assert (search.cv_results_['rank_test_score'][np.array(failed)] > 2).all()
+    #### A failed trial counts the one fit that raised
+    assert search.n_fits_ == 2 * 3 + 2
+    with pytest.raises(ValueError):
+        TPESearchCV(ParamScore(b='fail'), {'a': [1, 2]}, n_iter=2, cv=3, n_jobs=1).fit(X, y)
+
+
+def test_stopped_and_failed_trials_rank_after_finished_ones():
+    search = TPESearchCV(ParamScore(), {'a': list(range(10))})
+    search.names_ = ['a']
+    trials = [{'params': {'a': 1}, 'test': [0.5, 0.5], 'stopped': False, 'error': None},
+              {'params': {'a': 2}, 'test': [0.9], 'stopped': True, 'error': None},
+              {'params': {'a': 3}, 'test': [], 'stopped': False, 'error': 'bad'},
+              {'params': {'a': 4}, 'test': [0.6, 0.6], 'stopped': False, 'error': None}]
+    #### The stopped trial has the highest partial mean but ranks after both finished trials
+    assert search._make_results(trials)['rank_test_score'].tolist() == [2, 3, 4, 1]
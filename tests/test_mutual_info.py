@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from autoviml import mutual_info, sulov_method
+from autoviml.mutual_info import HistogramMI
+from autoviml.sulov_method import prune_correlated_vars
+
+
+def make_data(rows=500, cols=12, seed=0):
+    rng = np.random.RandomState(seed)
+    X = pd.DataFrame(rng.normal(size=(rows, cols)), columns=['x%d' % i for i in range(cols)])
+    #### Pairs of nearly equal columns so that SULOV has correlated variables to knock out
+    for i in range(0, cols, 2):
+        X['x%d' % (i + 1)] = X['x%d' % i] + rng.normal(scale=0.1, size=rows)
+    y = (X['x0'] + X['x4'] > 0).astype(int)
+    return X, y
+
+
+def test_parallel_blocks_give_the_serial_scores(monkeypatch):
+    #### Small blocks so that the features are scored in several blocks
+    monkeypatch.setattr(mutual_info, 'MI_BLOCK_CELLS', 1000)
+    X, y = make_data()
+    serial = HistogramMI(n_jobs=1).fit(X).score(y)
+    parallel = HistogramMI(n_jobs=2).fit(X).score(y)
+    np.testing.assert_array_equal(parallel, serial)
+    rows = np.arange(0, 500, 3)
+    np.testing.assert_array_equal(HistogramMI(n_jobs=2).fit(X).score(y.iloc[rows], rows),
+                                  HistogramMI(n_jobs=1).fit(X).score(y.iloc[rows], rows))
+
+
+def test_prune_correlated_vars_passes_n_jobs(monkeypatch):
+    monkeypatch.setattr(mutual_info, 'MI_BLOCK_CELLS', 1000)
+    used_jobs = []
+
+    class RecordingMI(HistogramMI):
+        def score(self, y, rows=None):
+            used_jobs.append(self.n_jobs)
+            return HistogramMI.score(self, y, rows)
+    monkeypatch.setattr(sulov_method, 'HistogramMI', RecordingMI)
+    X, y = make_data()
+    df = X.assign(target=y)
+    results = [prune_correlated_vars(df, list(X), 'Binary_Classification', 'target', mi_scorer='histogram',
+                                     n_jobs=n_jobs) for n_jobs in [1, 2]]
+    assert results[0]['selected'] == results[1]['selected']
+    assert results[0]['mutual_info'] == results[1]['mutual_info']
+    assert len(results[0]['removed']) == 6
+    assert used_jobs == [1, 2]
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+from sklearn.model_selection import KFold
+
+from autoviml.prediction_store import PredictionStore
+
+
+def make_data(seed, rows=40):
+    rng = np.random.RandomState(seed)
+    X = pd.DataFrame(rng.normal(size=(rows, 3)), columns=['a', 'b', 'c'])
+    y = pd.Series(X.values.dot([1.0, -2.0, 0.5]) * (seed + 1) + rng.normal(scale=0.01, size=rows))
+    return X, y
+
+
+def test_fit_hit_and_miss():
+    X, y = make_data(0)
+    store = PredictionStore()
+    first = store.fit(LinearRegression(), X, y)
+    second = store.fit(LinearRegression(), X, y)
+    assert (store.hits, store.misses) == (1, 1)
+    np.testing.assert_allclose(first.coef_, second.coef_)
+    store.fit(LinearRegression(fit_intercept=False), X, y)
+    assert store.misses == 2
+
+
+def test_fit_refitting_returned_model_does_not_change_store():
+    X1, y1 = make_data(0)
+    X2, y2 = make_data(1)
+    store = PredictionStore()
+    model = store.fit(LinearRegression(), X1, y1)
+    coef1 = model.coef_.copy()
+    #### Refit the returned model in place on other data, through the store and directly
+    model = store.fit(model, X2, y2)
+    model.fit(X2, y2)
+    cached = store.fit(LinearRegression(), X1, y1)
+    np.testing.assert_allclose(cached.coef_, coef1)
+    assert not np.allclose(cached.coef_, model.coef_)
+    #### A hit gives a copy, so changing it leaves the store alone too
+    cached.fit(X2, y2)
+    np.testing.assert_allclose(store.fit(LinearRegression(), X1, y1).coef_, coef1)
+
+
+def test_fit_keeps_last_max_models():
+    store = PredictionStore(max_models=2)
+    data = [make_data(seed) for seed in range(3)]
+    for X, y in data:
+        store.fit(LinearRegression(), X, y)
+    store.fit(LinearRegression(), *data[2])
+    store.fit(LinearRegression(), *data[0])
+    assert (store.hits, store.misses) == (1, 4)
+
+
+def test_cross_val_predict_is_keyed_by_data_and_folds():
+    X1, y1 = make_data(0)
+    X2, y2 = make_data(1)
+    store = PredictionStore()
+    cv = KFold(4, shuffle=True, random_state=0)
+    first = store.cross_val_predict(LinearRegression(), X1, y1, cv)
+    np.testing.assert_allclose(store.cross_val_predict(LinearRegression(), X1, y1, cv), first)
+    other = store.cross_val_predict(LinearRegression(), X2, y2, cv)
+    store.cross_val_predict(LinearRegression(), X1, y1, KFold(4, shuffle=True, random_state=1))
+    assert (store.hits, store.misses) == (1, 3)
+    assert not np.allclose(other, first)
+
+
+def test_predictions_evicted_least_recently_used_by_bytes():
+    X_test, _ = make_data(9, rows=10)
+    #### Each entry holds 10 float64 predictions (80 bytes), so the store keeps two of them
+    store = PredictionStore(max_memory_bytes=200, max_models=0)
+    data = [make_data(seed) for seed in range(3)]
+    store.fit_predict(LinearRegression(), *data[0], X_test)
+    store.fit_predict(LinearRegression(), *data[1], X_test)
+    store.fit_predict(LinearRegression(), *data[0], X_test)
+    store.fit_predict(LinearRegression(), *data[2], X_test)
+    assert store.memory_bytes == 160
+    assert (store.hits, store.misses) == (1, 3)
+    store.fit_predict(LinearRegression(), *data[0], X_test)
+    assert store.hits == 2
+    store.fit_predict(LinearRegression(), *data[1], X_test)
+    assert store.misses == 4
+
+
+def test_predict_shares_entries_with_fit_predict():
+    X, y = make_data(0)
+    X_test, _ = make_data(9, rows=10)
+    store = PredictionStore(max_models=0)
+    model, first = store.fit_predict(LinearRegression(), X, y, X_test)
+    #### A model fitted on other data is not asked for predictions when they are in the store
+    model.fit(*make_data(1))
+    np.testing.assert_allclose(store.predict(model, X, y, X_test), first)
+    assert (store.hits, store.misses) == (1, 1)
+    #### Other data to predict on is a miss and is predicted by the model
+    assert len(store.predict(model, X, y, X)) == len(X)
+    assert store.misses == 2
+
+
+def test_inactive_store_keeps_nothing():
+    X, y = make_data(0)
+    store = PredictionStore(max_memory_bytes=0)
+    store.fit(LinearRegression(), X, y)
+    store.fit_predict(LinearRegression(), X, y, X)
+    store.predict(LinearRegression().fit(X, y), X, y, X)
+    assert not store.active
+    assert (store.hits, store.misses, store.memory_bytes) == (0, 0, 0)
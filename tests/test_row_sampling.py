@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from autoviml.row_sampling import RowSampler, find_stratify_labels, use_row_sampling
+from autoviml.xgb_selection import split_rows
+
+
+def make_target():
+    #### One large class, one rare class of 3 rows and one class of a single row
+    return pd.Series(['a'] * 1000 + ['b'] * 3 + ['c'])
+
+
+def test_row_sampling_is_off_by_default():
+    assert not use_row_sampling(10 ** 7)
+    assert use_row_sampling(10 ** 7, True)
+
+
+def test_sample_keeps_two_rows_of_rare_classes():
+    y = make_target()
+    rows = RowSampler(y, 'Classification').sample_index(100)
+    counts = y.iloc[rows].value_counts()
+    assert counts['b'] == 2 and counts['c'] == 1
+    assert len(rows) < 110
+
+
+def test_stratify_labels_skip_classes_with_one_row():
+    y = make_target()
+    assert find_stratify_labels(y) is None
+    assert find_stratify_labels(y[y != 'c']) is not None
+    assert find_stratify_labels(np.c_[y.values, y.values]) is None
+
+
+def test_split_rows_with_a_single_row_class():
+    y = make_target()
+    train, valid = split_rows(y, 'Classification')
+    assert len(train) + len(valid) == len(y)
+    #### With 2 or more rows in every class the split is stratified
+    train, valid = split_rows(y[y != 'c'], 'Classification')
+    assert y.iloc[valid].value_counts()['b'] == 1